@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for api.notion.com
+Serves the in-memory Notion emulator (notion_mcp.emulator) over HTTP with
+configurable latency, 429 injection and cursor pagination, and counts every
+request it receives
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# notion_mcp lives next to mcp-notion-server.py, one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notion_mcp.emulator import NotionEmulator  # noqa: E402
+
+
+class FakeNotionAPI:
+    """
+    Starlette app exposing a NotionEmulator under /v1
+
+    latency/jitter delay every response; error_rate injects 429s at random;
+    rate_limit (requests/second) makes the server enforce its own budget
+    like Notion does. /__stats and /__reset expose the request counters.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 retry_after: float = 1.0, rate_limit: Optional[float] = None, seed: int = 0):
+        self.emulator = NotionEmulator(latency=latency, jitter=jitter, rate_limit=rate_limit or 0.0,
+                                       error_rate=error_rate, retry_after=retry_after, seed=seed)
+        # Workspace page the projects are created under (NOTION_PARENT_PAGE_ID)
+        self.root_page_id = self.emulator.root_page_id
+        self.app = Starlette(routes=[
+            Route("/v1/{path:path}", self.forward, methods=["GET", "POST", "PATCH", "DELETE"]),
+            Route("/__stats", self.stats, methods=["GET"]),
+            Route("/__reset", self.reset, methods=["POST"]),
+        ])
+
+    async def forward(self, request: Request):
+        raw = await request.body()
+        status, payload, headers = await self.emulator.handle(
+            request.method, "/" + request.path_params["path"],
+            json.loads(raw) if raw else {}, dict(request.query_params)
+        )
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    async def stats(self, request: Request):
+        return JSONResponse(self.emulator.stats())
+
+    async def reset(self, request: Request):
+        self.emulator.reset_stats()
+        return JSONResponse({"ok": True})
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the Notion API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 429 per request")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429s (s)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Server-side requests/second budget")
+    args = parser.parse_args()
+
+    api = FakeNotionAPI(args.latency, args.jitter, args.error_rate, args.retry_after, args.rate_limit)
+    print(f"NOTION_API_URL=http://127.0.0.1:{args.port}/v1 NOTION_PARENT_PAGE_ID={api.root_page_id}")
+    uvicorn.run(api.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
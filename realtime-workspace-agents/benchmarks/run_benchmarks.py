@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks for the Notion MCP server
+Drives mcp-notion-server.py over stdio against the local Notion stand-in
+(fake_notion.py) and reports latency percentiles, throughput and Notion
+requests per tool call as JSON
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import re
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import uvicorn
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from fake_notion import FakeNotionAPI
+
+
+SERVER_SCRIPT = Path(__file__).resolve().parent.parent / "mcp-notion-server.py"
+TOOLS = ("createNotionProject", "updateNotionTasks", "enrichNotionContent")
+PAGE_ID_PATTERN = re.compile(r"Page ID: ([0-9a-f-]{36})")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Notion MCP server benchmarks")
+    parser.add_argument("--tools", nargs="+", choices=TOOLS, default=list(TOOLS))
+    parser.add_argument("--sizes", type=_int_list, default=[1, 10, 50],
+                        help="Payload sizes: team members, tasks or content entries per call")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16],
+                        help="Concurrent tool calls on the session")
+    parser.add_argument("--calls", type=int, default=20, help="Measured calls per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured calls per scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="Notion stand-in latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of injected 429s (s)")
+    parser.add_argument("--server-rate-limit", type=float, default=None,
+                        help="Requests/second budget enforced by the stand-in (Notion: 3)")
+    parser.add_argument("--notion-rate", type=float, default=100.0,
+                        help="NOTION_RATE_LIMIT given to the MCP server (use 3 to match Notion)")
+    parser.add_argument("--write-behind", action="store_true", help="Enable NOTION_WRITE_BEHIND")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile: the smallest sample at or above `fraction` of them
+
+    >>> samples = list(range(1, 21))
+    >>> percentile(samples, 0.5), percentile(samples, 0.95), percentile(samples, 0.99)
+    (10, 19, 20)
+    >>> percentile(list(range(1, 101)), 0.95), percentile([3, 1, 2], 0.5), percentile([7], 0.0)
+    (95, 2, 7)
+    """
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Workload:
+    """Builds unique arguments for every call (so none is deduplicated)"""
+
+    def __init__(self, session: ClientSession):
+        self.session = session
+        self.project_id = ""
+
+    async def prepare(self):
+        """Creates the project that update/enrich calls write to"""
+        result = await self.session.call_tool("createNotionProject", self.create_project(1))
+        match = PAGE_ID_PATTERN.search(result.content[0].text)
+        if not match:
+            raise RuntimeError(f"Could not create the benchmark project: {result.content[0].text}")
+        self.project_id = match.group(1)
+
+    def create_project(self, size: int) -> Dict[str, Any]:
+        run = uuid.uuid4().hex[:8]
+        return {
+            "projectName": f"Bench {run}",
+            "projectDescription": "Benchmark project",
+            "projectType": "development",
+            "teamMembers": [f"Member {index}" for index in range(size)],
+        }
+
+    def update_tasks(self, size: int) -> Dict[str, Any]:
+        run = uuid.uuid4().hex[:8]
+        new_tasks = [{"task": f"Task {run}-{index}", "assignedTo": "Bench", "priority": "medium"}
+                     for index in range(size)]
+        # A quarter of the payload updates tasks created by the same call, found by title
+        updated = [{"taskId": task["task"], "newStatus": "done"} for task in new_tasks[: size // 4]]
+        return {"projectId": self.project_id, "newTasks": new_tasks, "updatedTasks": updated}
+
+    def enrich_content(self, size: int) -> Dict[str, Any]:
+        run = uuid.uuid4().hex[:8]
+        return {
+            "projectId": self.project_id,
+            "enrichmentType": "meeting_notes",
+            "content": {f"point {run}-{index}": "Discussed during the benchmark" for index in range(size)},
+        }
+
+    def arguments(self, tool: str) -> Callable[[int], Dict[str, Any]]:
+        return {
+            "createNotionProject": self.create_project,
+            "updateNotionTasks": self.update_tasks,
+            "enrichNotionContent": self.enrich_content,
+        }[tool]
+
+
+async def run_scenario(session: ClientSession, api: FakeNotionAPI, workload: Workload,
+                       tool: str, size: int, concurrency: int, calls: int, warmup: int) -> Dict[str, Any]:
+    """Issues `calls` calls of one tool with at most `concurrency` in flight"""
+    build = workload.arguments(tool)
+    for _ in range(warmup):
+        await session.call_tool(tool, build(size))
+
+    api.emulator.reset_stats()
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(calls))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            arguments = build(size)
+            started = time.perf_counter()
+            try:
+                result = await session.call_tool(tool, arguments)
+                failed = result.isError
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    notion_requests = sum(api.emulator.requests.values())
+    return {
+        "tool": tool,
+        "payloadSize": size,
+        "concurrency": concurrency,
+        "calls": calls,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "callsPerSecond": round(calls / elapsed, 2),
+        "latencyMs": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+        },
+        "notionRequests": notion_requests,
+        "notionRequestsPerCall": round(notion_requests / calls, 2),
+        "notionRequestsByRoute": dict(api.emulator.requests),
+        "throttled": api.emulator.throttled,
+    }
+
+
+@contextlib.asynccontextmanager
+async def fake_notion_server(api: FakeNotionAPI):
+    """Runs the stand-in on a free local port for the duration of the block"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    api = FakeNotionAPI(args.latency, args.jitter, args.error_rate, args.retry_after, args.server_rate_limit)
+    async with fake_notion_server(api) as base_url:
+        env = {
+            **os.environ,
+            "NOTION_TOKEN": "benchmark-token",
+            "NOTION_API_URL": base_url,
+            "NOTION_PARENT_PAGE_ID": api.root_page_id,
+            "NOTION_RATE_LIMIT": str(args.notion_rate),
+            "NOTION_RATE_BURST": str(max(3, int(args.notion_rate))),
+            "NOTION_WRITE_BEHIND": "1" if args.write_behind else "",
+            "PYTHONPATH": str(SERVER_SCRIPT.parent),
+        }
+        params = StdioServerParameters(command=sys.executable, args=[str(SERVER_SCRIPT)], env=env)
+
+        started = time.perf_counter()
+        async with stdio_client(params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                startup = time.perf_counter() - started
+                workload = Workload(session)
+                await workload.prepare()
+
+                scenarios = []
+                for tool in args.tools:
+                    for size in args.sizes:
+                        for concurrency in args.concurrency:
+                            result = await run_scenario(session, api, workload, tool, size,
+                                                        concurrency, args.calls, args.warmup)
+                            scenarios.append(result)
+                            print(f"{tool:<22} size={size:<4} conc={concurrency:<3} "
+                                  f"p50={result['latencyMs']['p50']:>8}ms "
+                                  f"p99={result['latencyMs']['p99']:>8}ms "
+                                  f"{result['callsPerSecond']:>7} calls/s "
+                                  f"{result['notionRequestsPerCall']:>6} req/call",
+                                  file=sys.stderr)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "startupSeconds": round(startup, 3),
+        },
+        "settings": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "errorRate": args.error_rate,
+            "retryAfter": args.retry_after,
+            "serverRateLimit": args.server_rate_limit,
+            "notionRate": args.notion_rate,
+            "writeBehind": args.write_behind,
+            "calls": args.calls,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    args = parse_args()
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ pip3 install openai-agents
 
 # Installer les dépendances MCP
 echo "📦 Installation des dépendances MCP..."
-pip3 install mcp
+pip3 install mcp httpx
 
 # Vérifier les installations
 echo "🔍 Vérification des installations..."
@@ -4,184 +4,692 @@ MCP Server for Notion Integration
 Implements tools to create projects, update tasks, and enrich content in Notion
 """
 
-import json
+# First import: starts the startup clock (see --startup-report)
+from notion_mcp.startup import startup
+
 import os
 import sys
 import asyncio
-from pathlib import Path
-from typing import Any, Dict, List, Optional
-from datetime import datetime
-import requests
+import time
+from typing import Any, Callable, Dict, List, Optional
+startup.mark("stdlib")
 
 from mcp.server import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.models import InitializationOptions
-from mcp.server.stdio import stdio_server
 from mcp.types import (
-    CallToolRequest,
-    CallToolResult,
-    ListToolsRequest,
-    ListToolsResult,
     Tool,
     TextContent,
+    Resource,
     INTERNAL_ERROR,
     INVALID_PARAMS,
     METHOD_NOT_FOUND,
-    JSONRPCError,
+    ErrorData,
+)
+from mcp.shared.exceptions import McpError
+startup.mark("mcp")
+
+from notion_mcp.calls import ToolCallRunner, ToolCallTimeout, WriteLog
+from notion_mcp.blocks import (
+    MAX_CHILDREN_PER_APPEND, TASK_DELETED_STATUS, chunk_children, is_done_status,
+    block_plain_text, parse_task_label, to_do_block, task_label,
 )
+from notion_mcp.catalogue import ArgumentError, ToolCatalogue
+from notion_mcp.client import NotionAPIError, NotionClient, normalize_notion_id
+from notion_mcp.dedupe import IDEMPOTENCY_KEY, CallDeduplicator
+from notion_mcp.journal import JournalEntry, MutationJournal, current_entry
+from notion_mcp.metrics import ServerMetrics
+from notion_mcp.pagination import iter_block_children
+from notion_mcp.progress import ProgressReporter
+from notion_mcp.templates import BlockSpec, TemplateLibrary
+from notion_mcp.transport import parse_transport_args, serve_http, serve_sse, serve_stdio
+from notion_mcp.ratelimit import Priority, RateLimitScheduler, current_priority
+from notion_mcp.workspaces import Workspace, WorkspaceError, WorkspacePool
+# notion_mcp.cache, .index, .planner and .writebehind are imported where first needed
+startup.mark("notion_mcp")
+
+
+# Scheduler lane of each tool: user-visible work first, enrichment last
+TOOL_PRIORITIES = {
+    "createNotionProject": Priority.INTERACTIVE,
+    "updateNotionTasks": Priority.NORMAL,
+    "enrichNotionContent": Priority.BACKGROUND,
+    "findNotionTasks": Priority.INTERACTIVE,
+}
+
+# Tools that write to Notion: identical repeats are suppressed
+DEDUPLICATED_TOOLS = {"createNotionProject", "updateNotionTasks", "enrichNotionContent"}
+
+IDEMPOTENCY_KEY_SCHEMA = {
+    "type": "string",
+    "description": "Optional key identifying this call; repeats with the same key return the first result"
+}
+
+# Optional on every tool: which Notion workspace the call runs against (NOTION_TOKEN's by default)
+WORKSPACE_SCHEMAS = {
+    "workspace": {
+        "type": "string",
+        "description": "Name of a workspace configured on the server (NOTION_WORKSPACES)"
+    },
+    "notionToken": {
+        "type": "string",
+        "description": "Notion integration token of the workspace to use, instead of a configured name"
+    },
+}
+
+
+# Seeded in every new project (page to-do list and tasks database)
+INITIAL_PROJECT_TASKS = [
+    {"task": "Plan the project", "priority": "high"},
+    {"task": "Define the objectives", "priority": "high"},
+    {"task": "Organize the kick-off meeting", "priority": "medium"},
+]
+
+PROJECT_PHASES = ["Planning", "Execution", "Review", "Delivery"]
+
+# Block types an enrichment section is made of (besides its heading)
+ENRICHMENT_ENTRY_TYPES = frozenset({"bulleted_list_item"})
+
+METRICS_RESOURCE_URI = "metrics://notion-mcp/prometheus"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Client-side budget against the emulator (requests/second and burst) unless NOTION_RATE_LIMIT is set
+SIMULATION_RATE_LIMIT = 1000.0
 
 
 class NotionMCPServer:
     """MCP Server for Notion integration"""
     
-    def __init__(self):
+    def __init__(self, max_inflight_calls: Optional[int] = None, max_inflight_per_tool: Optional[int] = None,
+                 tool_timeout: Optional[float] = None):
         """Initialize the MCP server"""
         self.server = Server("notion-mcp-server")
-        self.notion_token = os.getenv("NOTION_TOKEN")
-        self.notion_api_url = "https://api.notion.com/v1"
+        # Tool calls executed at once across every connected session, each with a deadline
+        self.calls = ToolCallRunner(self._roll_back, max_inflight_calls, max_inflight_per_tool, tool_timeout)
+        # Per-tool latency, errors and outbound work (not wired into the client when disabled)
+        self.metrics = ServerMetrics()
+        # Notion client, rate limiter, cache, write-behind queue and index of each workspace:
+        # built by the first tool call against it, closed once it has been idle for a while
+        self.workspaces = WorkspacePool(self._build_workspace)
+        # Identical tool calls in flight or within the TTL run only once
+        self.deduplicator = CallDeduplicator()
+        # Opt-in: write calls are journaled on disk before they run and replayed after a crash
+        journal_path = os.getenv("NOTION_JOURNAL_PATH")
+        self.journal = MutationJournal(journal_path) if journal_path else None
+        self._replay: Optional[asyncio.Task] = None
+        self._register_metrics()
+        # Project page and enrichment section layouts, compiled once per project/enrichment type
+        self.templates = TemplateLibrary({
+            "project": self._project_page_template,
+            "enrichment": self._enrichment_template,
+        })
+        # Tool definitions, handlers and compiled argument validators, built once
+        self.catalogue = ToolCatalogue(self._tool_definitions())
         self.setup_handlers()
     
-    def setup_handlers(self):
-        """Configure handlers for different MCP methods"""
+    def _ensure_notion_api(self) -> Workspace:
+        """
+        Builds the Notion API components of the current workspace on first
+        use, keeping their construction (and the cache/write-behind imports)
+        off the startup path
+        """
+        return self.workspaces.ensure_built(self.workspace)
+    
+    def _build_workspace(self, workspace: Workspace):
+        """
+        Creates the components of one workspace: its own connection pool,
+        rate budget, cache and write-behind queue
         
-        @self.server.list_tools()
-        async def handle_list_tools() -> List[Tool]:
-            """
-            Handler for tools/list method
-            Returns the list of available tools
-            """
-            return [
-                Tool(
-                    name="createNotionProject",
-                    description="Creates a complete Notion project with pages, databases, and structure",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "projectName": {
-                                "type": "string",
-                                "description": "Name of the project to create"
-                            },
-                            "projectDescription": {
-                                "type": "string",
-                                "description": "Detailed description of the project"
-                            },
-                            "projectType": {
-                                "type": "string",
-                                "enum": ["development", "marketing", "research", "design", "business", "other"],
-                                "description": "Type of project to adapt the structure"
-                            },
-                            "teamMembers": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "List of team member names"
-                            },
-                            "initialContext": {
-                                "type": "string",
-                                "description": "Initial context from conversation"
-                            }
+        Without a token the client talks to an in-memory emulator instead of
+        api.notion.com, so simulation mode runs the same code as real mode.
+        """
+        from notion_mcp.cache import BlockCache
+        from notion_mcp.writebehind import WriteBehindQueue
+        
+        instrumentation = self.metrics if self.metrics.enabled else None
+        if workspace.token:
+            token, transport, rate = workspace.token, None, None
+        else:
+            from notion_mcp.emulator import NotionEmulator
+            workspace.emulator = NotionEmulator()
+            # Projects go under the emulated workspace page, whatever NOTION_PARENT_PAGE_ID says
+            workspace.parent_page_id = workspace.emulator.root_page_id
+            token, transport = "simulation", workspace.emulator.transport()
+            # The emulator models Notion's own limit (NOTION_SIM_RATE_LIMIT); the client only throttles if asked to
+            rate = None if os.getenv("NOTION_RATE_LIMIT") else SIMULATION_RATE_LIMIT
+        # Single pooled client shared by every tool handler, rate limited as one integration
+        workspace.rate_limiter = RateLimitScheduler(rate=rate, burst=int(rate) if rate else None,
+                                                    metrics=instrumentation)
+        workspace.notion = NotionClient(token, scheduler=workspace.rate_limiter, metrics=instrumentation,
+                                        transport=transport)
+        # Page metadata and block children already read or written by this process
+        workspace.cache = BlockCache()
+        # Opt-in: acknowledge task updates at once and write them to Notion in the background
+        if os.getenv("NOTION_WRITE_BEHIND", "").lower() in ("1", "true", "yes"):
+            workspace.write_behind = WriteBehindQueue(
+                self._flush_buffered_tasks,
+                on_flushed=self._complete_journaled if self.journal else None
+            )
+    
+    def _complete_journaled(self, entries: List[JournalEntry]):
+        """Write-behind flush confirmed by Notion: its journaled calls are done"""
+        for entry in entries:
+            self.journal.complete(entry)
+    
+    @property
+    def workspace(self) -> Workspace:
+        """Workspace of the tool call being run (the NOTION_TOKEN one outside tool calls)"""
+        return self.workspaces.current()
+    
+    # Components of the current workspace, used by the tool handlers
+    
+    @property
+    def notion(self) -> Optional[NotionClient]:
+        return self.workspace.notion
+    
+    @property
+    def rate_limiter(self) -> Optional[RateLimitScheduler]:
+        return self.workspace.rate_limiter
+    
+    @property
+    def cache(self):
+        return self.workspace.cache
+    
+    @property
+    def write_behind(self):
+        return self.workspace.write_behind
+    
+    @property
+    def emulator(self):
+        """In-memory Notion workspace answering the client when the workspace has no token"""
+        return self.workspace.emulator
+    
+    @property
+    def notion_parent_page_id(self) -> Optional[str]:
+        return self.workspace.parent_page_id
+    
+    @property
+    def index(self):
+        """Local index of projects, databases and tasks (lookups by name, assignee, status...), opened on first use"""
+        return self.workspace.index
+    
+    @property
+    def mode(self) -> str:
+        """"simulation" when the emulator answers Notion requests, "real" otherwise"""
+        return "simulation" if self.emulator is not None else "real"
+    
+    async def aclose(self):
+        """Flushes buffered writes and releases the Notion client connections"""
+        if self._replay is not None:
+            await asyncio.gather(self._replay, return_exceptions=True)
+        await self.calls.aclose()
+        await self.workspaces.aclose()
+        if self.journal is not None:
+            await self.journal.aclose()
+    
+    async def _roll_back(self, writes: WriteLog) -> Dict[str, Any]:
+        """
+        Archives the objects an abandoned tool call created (pages, databases,
+        blocks) and forgets them locally; only the topmost ones need a request
+        """
+        roots = writes.created_roots()
+        results = await asyncio.gather(*(self._delete_block(object_id) for object_id in roots),
+                                       return_exceptions=True)
+        self.index.forget([object_id for object_id, _ in writes.created])
+        for _, parent_id in writes.created:
+            if parent_id:
+                self.cache.invalidate(parent_id)
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        return {"archived": len(roots) - failed, "failed": failed}
+    
+    def _progress_reporter(self, total: Optional[float] = None) -> ProgressReporter:
+        """Progress notifications for the current tool call, when its client sent a progressToken"""
+        try:
+            context = self.server.request_context
+        except LookupError:
+            return ProgressReporter(None, total)
+        token = context.meta.progressToken if context.meta else None
+        if token is None:
+            return ProgressReporter(None, total)
+        
+        async def send(progress: float, total: Optional[float], message: Optional[str]):
+            await context.session.send_progress_notification(
+                token, progress, total, message, related_request_id=context.request_id
+            )
+        return ProgressReporter(send, total)
+    
+    def _register_metrics(self):
+        """Series read from the components' own counters when metrics are rendered"""
+        self.metrics.add_gauge(
+            "notion_mcp_workspaces_open", "Notion workspaces with live components",
+            lambda: [({}, len(self.workspaces.built()))]
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_workspaces_evicted_total", "Notion workspaces closed after idling or to make room",
+            lambda: [({}, self.workspaces.evicted)],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_workspace_requests_total", "Notion requests granted by each workspace's rate limiter",
+            lambda: [({"workspace": w.name}, w.rate_limiter.stats()["granted"]) for w in self.workspaces.built()],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_rate_limit_queue_depth", "Requests waiting for a rate-limit token",
+            lambda: [({"workspace": w.name, "lane": p.name.lower()}, n)
+                     for w in self.workspaces.built() for p, n in w.rate_limiter.queue_depth().items()]
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_cache_lookups_total", "Block cache lookups by result",
+            lambda: [({"workspace": w.name, "result": result}, w.cache.stats()[key])
+                     for w in self.workspaces.built()
+                     for result, key in (("hit", "hits"), ("revalidated", "revalidations"), ("miss", "misses"))],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_cache_hit_ratio", "Block cache lookups served without a full reload",
+            lambda: [({"workspace": w.name}, w.cache.stats()["hitRatio"]) for w in self.workspaces.built()]
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_cache_bytes", "Approximate size of the block cache",
+            lambda: [({"workspace": w.name}, w.cache.stats()["bytes"]) for w in self.workspaces.built()]
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_write_behind_pending_tasks", "Task changes buffered by the write-behind queue",
+            lambda: [({"workspace": w.name}, w.write_behind.stats()["pendingTasks"])
+                     for w in self.workspaces.built() if w.write_behind is not None]
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_write_behind_retries_total", "Write-behind batches scheduled again after a failed flush",
+            lambda: [({"workspace": w.name}, w.write_behind.stats()["retriedBatches"])
+                     for w in self.workspaces.built() if w.write_behind is not None],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_write_behind_failed_changes_total", "Buffered task changes given up on",
+            lambda: [({"workspace": w.name}, w.write_behind.stats()["failedMutations"])
+                     for w in self.workspaces.built() if w.write_behind is not None],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_dedupe_calls_total", "Write tool calls by deduplication outcome",
+            lambda: [({"outcome": outcome}, self.deduplicator.stats()[key])
+                     for outcome, key in (("executed", "executions"), ("shared", "sharedInFlight"),
+                                          ("replayed", "replayedFromCache"))],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_journal_pending", "Journaled write calls not yet confirmed by Notion",
+            lambda: [({}, self.journal.stats()["pending"])] if self.journal else []
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_abandoned_calls_total", "Tool calls stopped before completion, by reason",
+            lambda: [({"reason": "timeout"}, self.calls.timed_out), ({"reason": "cancelled"}, self.calls.cancelled)],
+            kind="counter"
+        )
+        self.metrics.add_gauge(
+            "notion_mcp_rolled_back_calls_total", "Stopped tool calls whose writes were rolled back",
+            lambda: [({}, self.calls.rolled_back)],
+            kind="counter"
+        )
+    
+    def _tool_definitions(self) -> List[tuple]:
+        """
+        Tools exposed by the server with their handlers
+        Built once at startup (see ToolCatalogue)
+        """
+        return [
+            (Tool(
+                name="createNotionProject",
+                description="Creates a complete Notion project with pages, databases, and structure",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "projectName": {
+                            "type": "string",
+                            "minLength": 1,
+                            "description": "Name of the project to create"
                         },
-                        "required": ["projectName", "projectDescription"]
-                    }
-                ),
-                Tool(
-                    name="updateNotionTasks",
-                    description="Updates Notion task databases with new tasks and task updates",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "projectId": {
-                                "type": "string",
-                                "description": "Notion project/page ID"
-                            },
-                            "newTasks": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "task": {"type": "string"},
-                                        "assignedTo": {"type": "string"},
-                                        "priority": {"type": "string"},
-                                        "dueDate": {"type": "string"},
-                                        "context": {"type": "string"}
-                                    }
-                                },
-                                "description": "New tasks to add"
-                            },
-                            "updatedTasks": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "taskId": {"type": "string"},
-                                        "newStatus": {"type": "string"},
-                                        "updates": {"type": "object"}
-                                    }
+                        "projectDescription": {
+                            "type": "string",
+                            "description": "Detailed description of the project"
+                        },
+                        "projectType": {
+                            "type": "string",
+                            "enum": ["development", "marketing", "research", "design", "business", "other"],
+                            "default": "business",
+                            "description": "Type of project to adapt the structure"
+                        },
+                        "teamMembers": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "default": [],
+                            "description": "List of team member names"
+                        },
+                        "initialContext": {
+                            "type": "string",
+                            "default": "",
+                            "description": "Initial context from conversation"
+                        },
+                        "idempotencyKey": IDEMPOTENCY_KEY_SCHEMA,
+                        **WORKSPACE_SCHEMAS
+                    },
+                    "required": ["projectName", "projectDescription"]
+                }
+            ), self.create_notion_project),
+            (Tool(
+                name="updateNotionTasks",
+                description="Updates Notion task databases with new tasks and task updates",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "projectId": {
+                            "type": "string",
+                            "minLength": 1,
+                            "description": "Notion project/page ID"
+                        },
+                        "newTasks": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "task": {"type": "string", "minLength": 1},
+                                    "assignedTo": {"type": "string"},
+                                    "priority": {"type": "string"},
+                                    "dueDate": {"type": "string"},
+                                    "context": {"type": "string"}
                                 },
-                                "description": "Existing tasks to update"
+                                "required": ["task"]
                             },
-                            "conversationContext": {
-                                "type": "string",
-                                "description": "Context from the conversation"
-                            }
+                            "default": [],
+                            "description": "New tasks to add"
                         },
-                        "required": ["projectId"]
-                    }
-                ),
-                Tool(
-                    name="enrichNotionContent",
-                    description="Enriches Notion content with additional information and structure",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "projectId": {
-                                "type": "string",
-                                "description": "Notion project/page ID to enrich"
-                            },
-                            "enrichmentType": {
-                                "type": "string",
-                                "enum": ["meeting_notes", "decision_tracking", "resource_links", "timeline_update", "team_assignments"],
-                                "description": "Type of enrichment to perform"
-                            },
-                            "content": {
+                        "updatedTasks": {
+                            "type": "array",
+                            "items": {
                                 "type": "object",
-                                "description": "Content to add or update"
+                                "properties": {
+                                    "taskId": {"type": "string", "minLength": 1},
+                                    "newStatus": {
+                                        "type": "string",
+                                        "description": "New status (use 'deleted' to remove the task)"
+                                    },
+                                    "updates": {"type": "object"}
+                                },
+                                "required": ["taskId"]
                             },
-                            "conversationTrigger": {
-                                "type": "string",
-                                "description": "What triggered this enrichment"
-                            }
+                            "default": [],
+                            "description": "Existing tasks to update"
+                        },
+                        "conversationContext": {
+                            "type": "string",
+                            "default": "",
+                            "description": "Context from the conversation"
+                        },
+                        "idempotencyKey": IDEMPOTENCY_KEY_SCHEMA,
+                        **WORKSPACE_SCHEMAS
+                    },
+                    "required": ["projectId"]
+                }
+            ), self.update_notion_tasks),
+            (Tool(
+                name="enrichNotionContent",
+                description="Enriches Notion content with additional information and structure",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "projectId": {
+                            "type": "string",
+                            "minLength": 1,
+                            "description": "Notion project/page ID to enrich"
                         },
-                        "required": ["projectId", "enrichmentType", "content"]
+                        "enrichmentType": {
+                            "type": "string",
+                            "enum": ["meeting_notes", "decision_tracking", "resource_links", "timeline_update", "team_assignments"],
+                            "description": "Type of enrichment to perform"
+                        },
+                        "content": {
+                            "type": "object",
+                            "description": "Content to add or update"
+                        },
+                        "conversationTrigger": {
+                            "type": "string",
+                            "default": "",
+                            "description": "What triggered this enrichment"
+                        },
+                        "strategy": {
+                            "type": "string",
+                            "enum": ["append", "sync"],
+                            "default": "append",
+                            "description": "append adds a new section; sync rewrites this enrichment type's section "
+                                           "in place, sending only the blocks that changed"
+                        },
+                        "idempotencyKey": IDEMPOTENCY_KEY_SCHEMA,
+                        **WORKSPACE_SCHEMAS
+                    },
+                    "required": ["projectId", "enrichmentType", "content"]
+                }
+            ), self.enrich_notion_content),
+            (Tool(
+                name="findNotionTasks",
+                description="Finds known tasks by project, title, assignee, priority or status (local index, no Notion call)",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "projectId": {
+                            "type": "string",
+                            "description": "Notion project/page ID"
+                        },
+                        "task": {
+                            "type": "string",
+                            "description": "Exact task title (case-insensitive)"
+                        },
+                        "assignedTo": {
+                            "type": "string",
+                            "description": "Assignee name"
+                        },
+                        "priority": {
+                            "type": "string",
+                            "description": "Task priority"
+                        },
+                        "status": {
+                            "type": "string",
+                            "description": "Task status"
+                        },
+                        **WORKSPACE_SCHEMAS
                     }
-                )
-            ]
+                }
+            ), self.find_notion_tasks),
+        ]
+    
+    def setup_handlers(self):
+        """Configure handlers for different MCP methods"""
+        
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[Tool]:
+            """
+            Handler for tools/list method
+            Returns the catalogue built at startup
+            """
+            return list(self.catalogue.tools)
         
-        @self.server.call_tool()
+        # Arguments are checked by the catalogue's compiled validators instead
+        @self.server.call_tool(validate_input=False)
         async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """
             Handler for tools/call method
-            Executes the requested tool with provided arguments
+            Validates the arguments, then executes the requested tool
+            """
+            registered = self.catalogue.get(name)
+            if registered is None:
+                raise McpError(ErrorData(code=METHOD_NOT_FOUND, message=f"Tool '{name}' not found"))
+            
+            current_priority.set(TOOL_PRIORITIES.get(name, Priority.NORMAL))
+            with self.metrics.track_call(name):
+                try:
+                    # Malformed calls are rejected here, before any Notion request
+                    arguments = registered.validate(arguments or {})
+                except ArgumentError as e:
+                    raise McpError(ErrorData(code=INVALID_PARAMS, message=f"Invalid arguments for {name}: {e}")) from e
+                try:
+                    workspace = self.workspaces.resolve(arguments.pop("workspace", None),
+                                                        arguments.pop("notionToken", None))
+                except WorkspaceError as e:
+                    raise McpError(ErrorData(code=INVALID_PARAMS, message=str(e))) from e
+                if workspace is not self.workspaces.default:
+                    # By name only: the token never reaches the dedupe table or the journal
+                    arguments["workspace"] = workspace.name
+                try:
+                    with self.workspaces.use(workspace):
+                        if name in DEDUPLICATED_TOOLS:
+                            # Repeated identical calls share one execution / reuse its result
+                            key = f"{workspace.name}/{self.deduplicator.key(name, arguments)}"
+                            arguments = {k: v for k, v in arguments.items() if k != IDEMPOTENCY_KEY}
+                            return await self.deduplicator.run(key, lambda: self.run_journaled(name, arguments))
+                        return await self.run_tool(name, arguments)
+                except McpError:
+                    # Re-raise MCP errors
+                    raise
+                except ToolCallTimeout as e:
+                    raise McpError(ErrorData(code=INTERNAL_ERROR, message=str(e), data=e.rollback)) from e
+                except Exception as e:
+                    # Convert other errors to MCP errors
+                    raise McpError(ErrorData(
+                        code=INTERNAL_ERROR,
+                        message=f"Internal error executing tool: {str(e)}"
+                    ))
+        
+        @self.server.list_resources()
+        async def handle_list_resources() -> List[Resource]:
+            """
+            Handler for resources/list method
+            Exposes the metrics snapshot when metrics are enabled
+            """
+            if not self.metrics.enabled:
+                return []
+            return [Resource(
+                uri=METRICS_RESOURCE_URI,
+                name="notion-mcp-metrics",
+                description="Per-tool latency, errors, Notion requests/retries, rate-limiter waits and cache ratios (Prometheus text)",
+                mimeType=PROMETHEUS_CONTENT_TYPE
+            )]
+        
+        @self.server.read_resource()
+        async def handle_read_resource(uri) -> List[ReadResourceContents]:
             """
+            Handler for resources/read method
+            """
+            if str(uri) != METRICS_RESOURCE_URI or not self.metrics.enabled:
+                raise ValueError(f"Unknown resource: {uri}")
+            return [ReadResourceContents(content=self.metrics.render_prometheus(),
+                                         mime_type=PROMETHEUS_CONTENT_TYPE)]
+    
+    async def run_tool(self, name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        """
+        Dispatches a tool call to its implementation
+        """
+        registered = self.catalogue.get(name)
+        if registered is None:
+            raise McpError(ErrorData(code=METHOD_NOT_FOUND, message=f"Tool '{name}' not found"))
+        self._ensure_notion_api()
+        return await self.calls.run(name, lambda: registered.handler(arguments))
+    
+    async def run_journaled(self, name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        """
+        Runs a write tool, journaled first when the journal is enabled
+        The call starts only once its intent is on disk. It still returns
+        after Notion's answer, except for updateNotionTasks in write-behind
+        mode, which is acknowledged as soon as it is journaled and buffered
+        """
+        if self.journal is None:
+            return await self.run_tool(name, arguments)
+        return await self._run_entry(await self.journal.record(name, arguments), arguments)
+    
+    async def _run_entry(self, entry: JournalEntry, arguments: Dict[str, Any]) -> List[TextContent]:
+        """
+        Runs a journaled call and marks it done, unless its completion was handed over
+        A cancelled call (e.g. the process shutting down) stays pending and is replayed
+        """
+        token = current_entry.set(entry)
+        try:
+            result = await self.run_tool(entry.tool, arguments)
+        except Exception:
+            # The caller learns that the call failed (and its partial writes are rolled back)
+            self.journal.complete(entry, "failed")
+            raise
+        finally:
+            current_entry.reset(token)
+        if not entry.deferred:
+            self.journal.complete(entry)
+        return result
+    
+    def start_replay(self):
+        """Replays, in the background, the journaled calls a previous process left unfinished"""
+        if self.journal is not None and self.journal.pending():
+            self._replay = asyncio.get_running_loop().create_task(self.replay_journal())
+    
+    async def replay_journal(self):
+        """
+        Re-runs each pending journal entry, oldest first, skipping what
+        already reached Notion: a project page created before the crash is
+        archived and rebuilt, tasks whose title is already on the page are
+        not added twice, and an enrichment whose section is already there is
+        not appended again
+        """
+        entries = self.journal.pending()
+        print(f"↩️ Replaying {len(entries)} journaled call(s)", file=sys.stderr)
+        for entry in entries:
             try:
-                if name == "createNotionProject":
-                    return await self.create_notion_project(arguments)
-                elif name == "updateNotionTasks":
-                    return await self.update_notion_tasks(arguments)
-                elif name == "enrichNotionContent":
-                    return await self.enrich_notion_content(arguments)
-                else:
-                    raise JSONRPCError(
-                        METHOD_NOT_FOUND,
-                        f"Tool '{name}' not found"
-                    )
-            except JSONRPCError:
-                # Re-raise MCP errors
-                raise
+                # Calls made with a raw token cannot be replayed: the journal only has the workspace name
+                workspace = self.workspaces.resolve(entry.arguments.get("workspace"))
+                with self.workspaces.use(workspace):
+                    self._ensure_notion_api()
+                    arguments = await self._replay_arguments(entry)
+                    if arguments is None:
+                        self.journal.complete(entry, "already applied")
+                        continue
+                    await self._run_entry(entry, arguments)
+            except WorkspaceError as e:
+                print(f"❌ Replay of {entry.tool} #{entry.seq} skipped: {e}", file=sys.stderr)
+                self.journal.complete(entry, "failed")
             except Exception as e:
-                # Convert other errors to MCP errors
-                raise JSONRPCError(
-                    INTERNAL_ERROR,
-                    f"Internal error executing tool: {str(e)}"
-                )
+                print(f"❌ Replay of {entry.tool} #{entry.seq} failed: {e}", file=sys.stderr)
+        await self.journal.compact()
+    
+    async def _replay_arguments(self, entry: JournalEntry) -> Optional[Dict[str, Any]]:
+        """Arguments that finish an interrupted call without repeating what it did, or None"""
+        arguments = dict(entry.arguments)
+        if entry.tool == "createNotionProject":
+            if entry.effects.get("pageId"):
+                try:
+                    await self._delete_block(entry.effects["pageId"])
+                except NotionAPIError as e:
+                    if e.status_code not in (400, 404):
+                        raise
+            return arguments
+        
+        page_id = normalize_notion_id(arguments["projectId"])
+        if entry.tool == "updateNotionTasks":
+            titles = {task["task"].strip() for task in arguments["newTasks"]}
+            if titles:
+                await self._scan_page_tasks(page_id, titles)
+            arguments["newTasks"] = [
+                task for task in arguments["newTasks"]
+                if not self.index.find_tasks(project_id=page_id, title=task["task"].strip(), limit=1)
+            ]
+            if not arguments["newTasks"] and not arguments.get("updatedTasks"):
+                return None
+            return arguments
+        
+        if entry.tool == "enrichNotionContent" and arguments.get("strategy", "append") == "append":
+            from notion_mcp.sync import block_signature, section_bounds
+            heading, blocks = self._enrichment_blocks(arguments["enrichmentType"], arguments["content"])
+            _, children = await self._read_page_tree(page_id)
+            bounds = section_bounds(children, "heading_2", block_plain_text(heading), ENRICHMENT_ENTRY_TYPES)
+            if bounds is not None and [block_signature(b) for b in children[bounds[0] + 1:bounds[1]]] \
+                    == [block_signature(b) for b in blocks]:
+                return None
+        return arguments
     
     async def create_notion_project(self, arguments: Dict[str, Any]) -> List[TextContent]:
         """
@@ -189,26 +697,14 @@ class NotionMCPServer:
         """
         project_name = arguments["projectName"]
         project_description = arguments["projectDescription"]
-        project_type = arguments.get("projectType", "business")
-        team_members = arguments.get("teamMembers", [])
-        initial_context = arguments.get("initialContext", "")
+        project_type = arguments["projectType"]
+        team_members = arguments["teamMembers"]
+        initial_context = arguments["initialContext"]
         
         try:
-            if not self.notion_token:
-                # Fallback mode without real Notion API
-                result = {
-                    "success": True,
-                    "mode": "simulation",
-                    "projectName": project_name,
-                    "pageId": f"simulated_page_{datetime.now().timestamp()}",
-                    "databasesCreated": 3,
-                    "message": "Project structure simulated (no Notion API token configured)"
-                }
-            else:
-                # Real Notion API integration
-                result = await self._create_real_notion_project(
-                    project_name, project_description, project_type, team_members, initial_context
-                )
+            result = await self._create_real_notion_project(
+                project_name, project_description, project_type, team_members, initial_context
+            )
             
             return [TextContent(
                 type="text",
@@ -216,32 +712,47 @@ class NotionMCPServer:
                      f"📄 Page ID: {result.get('pageId', 'N/A')}\n"
                      f"📊 Databases created: {result.get('databasesCreated', 0)}\n"
                      f"🎯 Mode: {result.get('mode', 'real')}"
+                     + (f"\n⏱️ Critical path: {result['plan']['criticalPathSeconds']}s "
+                        f"({' → '.join(result['plan']['criticalPath'])}), "
+                        f"{result['plan']['steps']} steps in {result['plan']['wallSeconds']}s"
+                        f"\n⚡ Page ready after {result['pageReadySeconds']}s"
+                        if result.get("plan") else "")
             )]
             
         except Exception as e:
-            raise JSONRPCError(
-                INTERNAL_ERROR,
-                f"Error creating Notion project: {str(e)}"
-            )
+            raise McpError(ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error creating Notion project: {str(e)}"
+            ))
     
     async def update_notion_tasks(self, arguments: Dict[str, Any]) -> List[TextContent]:
         """
         Updates Notion tasks based on conversation
         """
         project_id = arguments["projectId"]
-        new_tasks = arguments.get("newTasks", [])
-        updated_tasks = arguments.get("updatedTasks", [])
-        conversation_context = arguments.get("conversationContext", "")
+        new_tasks = arguments["newTasks"]
+        updated_tasks = arguments["updatedTasks"]
+        conversation_context = arguments["conversationContext"]
         
         try:
-            if not self.notion_token:
-                # Simulation mode
+            if self.write_behind is not None:
+                # Write-behind: merged with pending mutations, flushed in the background
+                page_id = normalize_notion_id(project_id)
+                # Unknown tasks fail the call now, not the flush after it was acknowledged
+                updated_tasks = await self._resolve_task_updates(
+                    page_id, updated_tasks, lambda ref: self.write_behind.pending_task(page_id, ref)
+                )
+                entry = current_entry.get()
+                ack = self.write_behind.enqueue(page_id, new_tasks, updated_tasks, conversation_context, entry)
+                if entry is not None:
+                    # Journaled: done once the flush carrying these mutations succeeds
+                    entry.deferred = True
                 result = {
                     "success": True,
-                    "mode": "simulation",
+                    "mode": f"{self.mode} (write-behind)",
                     "tasksAdded": len(new_tasks),
                     "tasksUpdated": len(updated_tasks),
-                    "message": "Tasks updated in simulation mode"
+                    **ack
                 }
             else:
                 # Real Notion API
@@ -249,19 +760,23 @@ class NotionMCPServer:
                     project_id, new_tasks, updated_tasks, conversation_context
                 )
             
-            return [TextContent(
-                type="text",
-                text=f"✅ Notion tasks updated!\n"
-                     f"➕ Tasks added: {result.get('tasksAdded', 0)}\n"
-                     f"🔄 Tasks updated: {result.get('tasksUpdated', 0)}\n"
-                     f"🎯 Mode: {result.get('mode', 'real')}"
-            )]
+            text = (f"✅ Notion tasks updated!\n"
+                    f"➕ Tasks added: {result.get('tasksAdded', 0)}\n"
+                    f"🔄 Tasks updated: {result.get('tasksUpdated', 0)}\n"
+                    f"🎯 Mode: {result.get('mode', 'real')}")
+            if result.get("queued"):
+                text += f"\n⏳ Pending task changes for this project: {result['pendingTasks']}"
+            if result.get("failedMutations"):
+                text += "\n⚠️ Earlier task changes Notion rejected:" + "".join(
+                    f"\n- {failure['task']}: {failure['error']}" for failure in result["failedMutations"]
+                )
+            return [TextContent(type="text", text=text)]
             
         except Exception as e:
-            raise JSONRPCError(
-                INTERNAL_ERROR,
-                f"Error updating Notion tasks: {str(e)}"
-            )
+            raise McpError(ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error updating Notion tasks: {str(e)}"
+            ))
     
     async def enrich_notion_content(self, arguments: Dict[str, Any]) -> List[TextContent]:
         """
@@ -270,22 +785,13 @@ class NotionMCPServer:
         project_id = arguments["projectId"]
         enrichment_type = arguments["enrichmentType"]
         content = arguments["content"]
-        conversation_trigger = arguments.get("conversationTrigger", "")
+        conversation_trigger = arguments["conversationTrigger"]
+        strategy = arguments["strategy"]
         
         try:
-            if not self.notion_token:
-                # Simulation mode
-                result = {
-                    "success": True,
-                    "mode": "simulation",
-                    "enrichmentType": enrichment_type,
-                    "message": f"Content enrichment '{enrichment_type}' simulated"
-                }
-            else:
-                # Real Notion API
-                result = await self._enrich_real_notion_content(
-                    project_id, enrichment_type, content, conversation_trigger
-                )
+            result = await self._enrich_real_notion_content(
+                project_id, enrichment_type, content, conversation_trigger, strategy
+            )
             
             return [TextContent(
                 type="text",
@@ -293,13 +799,40 @@ class NotionMCPServer:
                      f"🎨 Type: {enrichment_type.replace('_', ' ').title()}\n"
                      f"🎯 Mode: {result.get('mode', 'real')}\n"
                      f"🔗 Trigger: {conversation_trigger}"
+                     + (f"\n🔁 Sync: {result['blocksKept']} kept, {result['blocksUpdated']} updated, "
+                        f"{result['blocksInserted']} inserted, {result['blocksDeleted']} deleted"
+                        if strategy == "sync" else "")
             )]
             
         except Exception as e:
-            raise JSONRPCError(
-                INTERNAL_ERROR,
-                f"Error enriching Notion content: {str(e)}"
-            )
+            raise McpError(ErrorData(
+                code=INTERNAL_ERROR,
+                message=f"Error enriching Notion content: {str(e)}"
+            ))
+    
+    async def find_notion_tasks(self, arguments: Dict[str, Any]) -> List[TextContent]:
+        """
+        Looks tasks up in the local index
+        """
+        project_id = arguments.get("projectId")
+        tasks = self.index.find_tasks(
+            project_id=normalize_notion_id(project_id) if project_id else None,
+            title=arguments.get("task"),
+            assignee=arguments.get("assignedTo"),
+            priority=arguments.get("priority"),
+            status=arguments.get("status"),
+        )
+        
+        lines = [f"🔎 Tasks found: {len(tasks)}"]
+        for task in tasks:
+            details = " • ".join(filter(None, [
+                task["assignee"] and f"👤 {task['assignee']}",
+                task["priority"] and f"⚡ {task['priority']}",
+                task["status"] and f"📌 {task['status']}",
+                task["due_date"] and f"📅 {task['due_date']}",
+            ]))
+            lines.append(f"- {task['title']} ({task['id']}) {details}".rstrip())
+        return [TextContent(type="text", text="\n".join(lines))]
     
     async def _create_real_notion_project(self, project_name: str, project_description: str, 
                                         project_type: str, team_members: List[str], 
@@ -307,74 +840,445 @@ class NotionMCPServer:
         """
         Creates a real Notion project using the Notion API
         """
-        # TODO: Implement real Notion API calls
-        # For now, return a realistic simulation
+        if not self.notion_parent_page_id:
+            if self.workspace is self.workspaces.default:
+                raise ValueError("NOTION_PARENT_PAGE_ID is not configured")
+            raise ValueError(f"No parentPageId configured for workspace '{self.workspace.name}'")
+        
+        children = self.templates.render("project", project_type, {
+            "description": project_description,
+            "team": team_members,
+            "context": initial_context,
+        })
+        
+        # Page first, then the databases in parallel, then their rows
+        from notion_mcp.planner import ExecutionPlan
+        
+        plan = ExecutionPlan()
+        
+        async def create_page(_):
+            page = await self.notion.post("/pages", {
+                "parent": {"page_id": normalize_notion_id(self.notion_parent_page_id)},
+                "properties": {"title": {"title": [{"type": "text", "text": {"content": f"🚀 {project_name}"}}]}},
+                "children": children[:MAX_CHILDREN_PER_APPEND],
+            })
+            self.index.upsert_project(page["id"], project_name, page.get("url"))
+            return page
+        plan.add("page", create_page)
+        
+        if len(children) > MAX_CHILDREN_PER_APPEND:
+            async def append_overflow(inputs):
+                return await self._append_blocks(inputs["page"]["id"], children[MAX_CHILDREN_PER_APPEND:])
+            plan.add("page_overflow", append_overflow, deps=("page",))
+        
+        def create_database(title: str, properties: Dict[str, Any]):
+            async def run(inputs):
+                page_id = inputs["page"]["id"]
+                database = await self.notion.post("/databases", {
+                    "parent": {"type": "page_id", "page_id": page_id},
+                    "title": [{"type": "text", "text": {"content": title}}],
+                    "properties": properties,
+                })
+                self.index.upsert_database(database["id"], page_id, title)
+                return database
+            return run
+        
+        def create_row(database_step: str, properties: Dict[str, Any]):
+            async def run(inputs):
+                return await self.notion.post("/pages", {
+                    "parent": {"database_id": inputs[database_step]["id"]},
+                    "properties": properties,
+                })
+            return run
+        
+        # Progress message of each step once it has finished
+        milestones = {"page_overflow": "📝 Page content complete"}
+        for key, title, properties in self._project_database_schemas():
+            plan.add(f"database:{key}", create_database(title, properties), deps=("page",))
+            milestones[f"database:{key}"] = f"📊 Database ready: {title}"
+        for number, task in enumerate(INITIAL_PROJECT_TASKS):
+            plan.add(f"task_row:{number}", create_row("database:tasks", {
+                "Name": {"title": [{"text": {"content": task["task"]}}]},
+                "Priority": {"select": {"name": task["priority"]}},
+                "Status": {"select": {"name": "todo"}},
+            }), deps=("database:tasks",))
+            milestones[f"task_row:{number}"] = f"✅ Task added: {task['task']}"
+        for number, member in enumerate(team_members):
+            plan.add(f"team_row:{number}", create_row("database:team", {
+                "Name": {"title": [{"text": {"content": member}}]},
+            }), deps=("database:team",))
+            milestones[f"team_row:{number}"] = f"👤 Team member added: {member}"
+        
+        # The page is usable as soon as it exists: report it first, then each database and row
+        progress = self._progress_reporter(len(plan))
+        journal_entry = current_entry.get()
+        started = time.perf_counter()
+        page_ready: Dict[str, float] = {}
+        
+        async def on_step(name: str, result: Any):
+            if name == "page":
+                page_ready["seconds"] = time.perf_counter() - started
+                if journal_entry is not None:
+                    # A replay after a crash archives this page instead of leaving a duplicate
+                    await self.journal.note(journal_entry, pageId=result["id"])
+                await progress.advance(f"📄 Page ready: {result.get('url') or result['id']} (ID {result['id']})")
+            else:
+                await progress.advance(milestones[name])
+        
+        executed = await plan.execute(on_step)
+        page = executed.results["page"]
+        page_id = page["id"]
         
         return {
             "success": True,
-            "mode": "real",
+            "mode": self.mode,
             "projectName": project_name,
-            "pageId": f"real_page_{datetime.now().timestamp()}",
-            "databasesCreated": 3,
-            "notionUrl": f"https://notion.so/{project_name.lower().replace(' ', '-')}"
+            "pageId": page_id,
+            "databasesCreated": sum(1 for name in executed.results if name.startswith("database:")),
+            "notionUrl": page.get("url", f"https://notion.so/{page_id.replace('-', '')}"),
+            "pageReadySeconds": round(page_ready["seconds"], 3),
+            "plan": executed.summary()
         }
     
+    @staticmethod
+    def _project_page_template(project_type: str) -> List[BlockSpec]:
+        """
+        Blocks of a new project page; only the description, team and
+        initial context change from one project of a type to the next
+        """
+        return [
+            BlockSpec("paragraph", "📝 Description: {description}"),
+            BlockSpec("paragraph", f"🎯 Type: {project_type}"),
+            BlockSpec("heading_3", "👥 Team", when="team"),
+            BlockSpec("bulleted_list_item", "{item}", each="team"),
+            BlockSpec("heading_3", "📋 Tasks"),
+            *(BlockSpec("to_do", task_label(task)) for task in INITIAL_PROJECT_TASKS),
+            BlockSpec("callout", "💡 Initial context: {context}", when="context"),
+            BlockSpec("heading_3", "🗓️ Timeline"),
+            *(BlockSpec("bulleted_list_item", phase) for phase in PROJECT_PHASES),
+            BlockSpec("heading_3", "🗒️ Meeting notes"),
+        ]
+    
+    @staticmethod
+    def _enrichment_template(enrichment_type: str) -> List[BlockSpec]:
+        """Heading and entries of an enrichment section"""
+        return [
+            BlockSpec("heading_2", f"✨ {enrichment_type.replace('_', ' ').title()}"),
+            BlockSpec("bulleted_list_item", "{key}: {value}", each="entries"),
+        ]
+    
+    @staticmethod
+    def _project_database_schemas() -> List[tuple]:
+        """
+        Key, title and property schema of the databases created with each project
+        """
+        return [
+            ("tasks", "📋 Tasks", {
+                "Name": {"title": {}},
+                "Assignee": {"rich_text": {}},
+                "Priority": {"select": {"options": [{"name": "high"}, {"name": "medium"}, {"name": "low"}]}},
+                "Status": {"select": {"options": [{"name": "todo"}, {"name": "in_progress"}, {"name": "done"}]}},
+                "Due": {"date": {}},
+            }),
+            ("team", "👥 Team", {
+                "Name": {"title": {}},
+                "Role": {"rich_text": {}},
+            }),
+            ("resources", "📚 Resources", {
+                "Name": {"title": {}},
+                "Link": {"url": {}},
+            }),
+        ]
+    
     async def _update_real_notion_tasks(self, project_id: str, new_tasks: List[Dict], 
                                       updated_tasks: List[Dict], context: str) -> Dict[str, Any]:
         """
         Updates real Notion tasks using the Notion API
         """
-        # TODO: Implement real Notion API calls
+        page_id = normalize_notion_id(project_id)
+        # Unknown tasks fail the call before anything is written (tasks added by the call are written first)
+        added = {ref.strip().casefold() for task in new_tasks
+                 for ref in (task.get("taskId"), task.get("task") or task.get("title")) if ref}
+        updated_tasks = await self._resolve_task_updates(
+            page_id, updated_tasks, lambda ref: ref.strip().casefold() in added
+        )
+        failures = await self._write_task_mutations(page_id, new_tasks, updated_tasks)
+        if failures:
+            from notion_mcp.writebehind import mutation_label
+            applied = len(new_tasks) + len(updated_tasks) - len(failures)
+            raise ValueError(f"{applied} task change(s) applied, {len(failures)} failed: " + "; ".join(
+                f"'{mutation_label(mutation)}': {error}" for mutation, error in failures
+            ))
         
         return {
             "success": True,
-            "mode": "real",
+            "mode": self.mode,
             "tasksAdded": len(new_tasks),
             "tasksUpdated": len(updated_tasks)
         }
     
+    async def _flush_buffered_tasks(self, project_id: str, new_tasks: List[Dict],
+                                    updated_tasks: List[Dict], context: str) -> List[tuple]:
+        """Write-behind flush: writes one merged batch, returns the mutations that failed"""
+        return await self._write_task_mutations(project_id, new_tasks, updated_tasks)
+    
+    async def _write_task_mutations(self, page_id: str, new_tasks: List[Dict],
+                                    updated_tasks: List[Dict]) -> List[tuple]:
+        """
+        Appends the new tasks, then applies the updates
+        Returns (mutation, error) for each mutation that failed; the others are written
+        """
+        # All new tasks go out in as few appends as possible
+        try:
+            created = await self._append_blocks(page_id, [
+                to_do_block(task_label(task), checked=is_done_status(task.get("status")))
+                for task in new_tasks
+            ])
+        except Exception as e:
+            # Updates may name the tasks of the append, so they wait for it
+            return [(mutation, e) for mutation in [*new_tasks, *updated_tasks]]
+        for block, task in zip(created, new_tasks):
+            self.index.index_task_block(page_id, block, task.get("status"))
+        
+        # Updates touch independent blocks, so they are sent concurrently
+        async def apply(update: Dict[str, Any]):
+            (task_id,) = await self._resolve_task_ids(page_id, [update["taskId"]])
+            await self._update_task(page_id, task_id, update)
+        
+        results = await asyncio.gather(*(apply(update) for update in updated_tasks), return_exceptions=True)
+        return [(update, result) for update, result in zip(updated_tasks, results)
+                if isinstance(result, Exception)]
+    
+    async def _append_blocks(self, block_id: str, blocks: List[Dict[str, Any]],
+                             after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Appends blocks under block_id in batches of up to 100 children
+        (right after the child `after` when given, at the end otherwise)
+        Batches are sent in order so the page keeps the block order
+        Returns the created blocks
+        """
+        created: List[Dict[str, Any]] = []
+        for batch in chunk_children(blocks):
+            body: Dict[str, Any] = {"children": batch}
+            if after is not None:
+                body["after"] = after
+            response = await self.notion.patch(f"/blocks/{block_id}/children", body)
+            results = response.get("results", [])
+            self.cache.append_children(block_id, results, after)
+            created.extend(results)
+            if after is not None and results:
+                after = results[-1]["id"]
+        return created
+    
+    async def _update_task(self, page_id: str, task_id: str, update: Dict[str, Any]):
+        """Applies one task update (or deletion) and keeps the local index in sync"""
+        if update.get("newStatus") == TASK_DELETED_STATUS:
+            await self._delete_block(task_id)
+            self.index.delete_task(task_id)
+        else:
+            block = await self._update_block(task_id, self._task_update_payload(update))
+            self.index.index_task_block(page_id, block, update.get("newStatus"))
+    
+    async def _update_block(self, block_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """PATCHes one block and applies the result to the cache"""
+        block = await self.notion.patch(f"/blocks/{block_id}", payload)
+        self.cache.update_block(block)
+        return block
+    
+    async def _delete_block(self, block_id: str) -> Dict[str, Any]:
+        """Deletes (archives) one block and drops it from the cache"""
+        block = await self.notion.delete(f"/blocks/{block_id}")
+        self.cache.remove_block(block_id, block)
+        return block
+    
+    async def _read_page_tree(self, page_id: str) -> tuple:
+        """
+        Returns (page, children) of a page, served from the block cache
+        whenever it can prove the cached copy is current
+        """
+        async def load_children() -> List[Dict[str, Any]]:
+            children = [block async for block in iter_block_children(self.notion, page_id)]
+            self.index.index_page_children(page_id, children)
+            return children
+        
+        return await self.cache.read(
+            page_id, lambda: self.notion.get(f"/pages/{page_id}"), load_children
+        )
+    
+    async def _resolve_task_ids(self, page_id: str, task_refs: List[str]) -> List[str]:
+        """
+        Maps task references to block IDs
+        References that are not Notion IDs are looked up by title in the
+        local index; titles it does not know yet are searched for in the
+        page itself, which is read only as far as needed to find them
+        """
+        def lookup(ref: str) -> Optional[str]:
+            if _is_notion_id(ref):
+                return normalize_notion_id(ref)
+            matches = self.index.find_tasks(project_id=page_id, title=ref.strip(), limit=1)
+            return matches[0]["id"] if matches else None
+        
+        resolved = [lookup(ref) for ref in task_refs]
+        missing = {ref.strip() for ref, task_id in zip(task_refs, resolved) if task_id is None}
+        if missing:
+            await self._scan_page_tasks(page_id, missing)
+            resolved = [task_id or lookup(ref) for ref, task_id in zip(task_refs, resolved)]
+        for ref, task_id in zip(task_refs, resolved):
+            if task_id is None:
+                raise ValueError(f"Task '{ref}' not found in project {page_id}")
+        return resolved
+    
+    async def _resolve_task_updates(self, page_id: str, updates: List[Dict],
+                                    pending: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+        """
+        Updates with their task references resolved to block IDs
+        Raises if a task is not found, unless pending(ref) says it is a new
+        task not written yet (its reference is then kept as is)
+        """
+        refs = [update["taskId"] for update in updates if pending is None or not pending(update["taskId"])]
+        resolved = dict(zip(refs, await self._resolve_task_ids(page_id, refs)))
+        return [{**update, "taskId": resolved.get(update["taskId"], update["taskId"])} for update in updates]
+    
+    async def _scan_page_tasks(self, page_id: str, titles: set):
+        """
+        Streams a page's blocks into the local index until every title is seen
+        A freshly cached page was indexed when it was read, so it is not read again
+        """
+        entry = self.cache.lookup(page_id)
+        if entry is not None and entry.is_fresh():
+            return
+        remaining = {title.casefold() for title in titles}
+        blocks = iter_block_children(self.notion, page_id)
+        try:
+            async for block in blocks:
+                if block.get("type") != "to_do":
+                    continue
+                self.index.index_task_block(page_id, block)
+                remaining.discard(parse_task_label(block_plain_text(block))["task"].casefold())
+                if not remaining:
+                    break
+        finally:
+            await blocks.aclose()
+    
+    @staticmethod
+    def _task_update_payload(update: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the PATCH /blocks/{taskId} body for a task update
+        """
+        to_do: Dict[str, Any] = {}
+        updates = update.get("updates") or {}
+        if update.get("newStatus"):
+            to_do["checked"] = is_done_status(update["newStatus"])
+        if updates.get("task") or updates.get("title"):
+            to_do["rich_text"] = to_do_block(task_label(updates))["to_do"]["rich_text"]
+        return {"to_do": to_do}
+    
     async def _enrich_real_notion_content(self, project_id: str, enrichment_type: str, 
-                                        content: Dict, trigger: str) -> Dict[str, Any]:
+                                        content: Dict, trigger: str, strategy: str = "append") -> Dict[str, Any]:
         """
         Enriches real Notion content using the Notion API
+        With the sync strategy, the section of this enrichment type is diffed
+        against the desired blocks and only the differences are written
         """
-        # TODO: Implement real Notion API calls
+        page_id = normalize_notion_id(project_id)
+        
+        heading, blocks = self._enrichment_blocks(enrichment_type, content)
+        if strategy == "sync":
+            return {"success": True, "mode": self.mode, "enrichmentType": enrichment_type,
+                    **await self._sync_section(page_id, heading, blocks)}
+        await self._append_blocks(page_id, [heading, *blocks])
         
         return {
             "success": True,
-            "mode": "real",
+            "mode": self.mode,
             "enrichmentType": enrichment_type
         }
+    
+    def _enrichment_blocks(self, enrichment_type: str, content: Dict) -> tuple:
+        """(heading, entries) of an enrichment section"""
+        blocks = self.templates.render("enrichment", enrichment_type, {
+            "entries": [{"key": key, "value": value} for key, value in content.items()],
+        })
+        return blocks[0], blocks[1:]
+    
+    async def _sync_section(self, page_id: str, heading: Dict[str, Any],
+                            blocks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Makes the section under `heading` hold exactly `blocks`
+        Requests scale with the number of changed blocks: one PATCH per
+        updated block, one DELETE per removed block and one append per run
+        of new blocks, all sent concurrently
+        """
+        from notion_mcp.sync import SyncPlan, diff_blocks, section_bounds
+        
+        _, children = await self._read_page_tree(page_id)
+        bounds = section_bounds(children, "heading_2", block_plain_text(heading), ENRICHMENT_ENTRY_TYPES)
+        if bounds is None:
+            # First sync of this section: a plain append
+            await self._append_blocks(page_id, [heading, *blocks])
+            return {**SyncPlan().summary(), "blocksInserted": len(blocks)}
+        
+        start, end = bounds
+        plan = diff_blocks(children[start + 1:end], blocks, anchor_id=children[start]["id"])
+        await asyncio.gather(
+            *(self._update_block(block_id, payload) for block_id, payload in plan.updates),
+            *(self._delete_block(block_id) for block_id in plan.deletes),
+            *(self._append_blocks(page_id, batch, after=after) for after, batch in plan.inserts),
+        )
+        for block_id in plan.deletes:
+            self.index.delete_task(block_id)
+        return plan.summary()
+
+
+def _is_notion_id(value: str) -> bool:
+    """True for a 32-hex-digit Notion ID, with or without dashes"""
+    clean_id = value.replace("-", "")
+    return len(clean_id) == 32 and all(c in "0123456789abcdefABCDEF" for c in clean_id)
 
 
 async def main():
     """Main entry point for the MCP server"""
+    args = parse_transport_args()
+    
+    # Create server instance (one per process, shared by every session)
+    notion_server = NotionMCPServer(max_inflight_calls=args.max_inflight,
+                                    max_inflight_per_tool=args.max_inflight_per_tool,
+                                    tool_timeout=args.tool_timeout)
+    startup.mark("server")
+    
+    def on_ready():
+        startup.mark("transport")
+        notion_server.start_replay()
+        if startup.enabled:
+            startup.print_report()
+    
     try:
-        # Create server instance
-        notion_server = NotionMCPServer()
-        
         # Configuration options
         options = InitializationOptions(
             server_name="notion-mcp-server",
             server_version="1.0.0",
             capabilities={
-                "tools": {}
+                "tools": {},
+                "resources": {}
             }
         )
         
-        # Start server with stdio
-        async with stdio_server() as (read_stream, write_stream):
-            await notion_server.server.run(
-                read_stream,
-                write_stream,
-                options
-            )
+        # Start server on the selected transport
+        if args.transport == "http":
+            await serve_http(notion_server.server, options, args, notion_server.metrics, on_ready)
+        elif args.transport == "sse":
+            await serve_sse(notion_server.server, options, args, notion_server.metrics, on_ready)
+        else:
+            await serve_stdio(notion_server.server, options, on_ready)
             
     except KeyboardInterrupt:
         print("MCP server stopped by user", file=sys.stderr)
     except Exception as e:
         print(f"Fatal MCP server error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        # Close pooled Notion connections before the loop goes away
+        await notion_server.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,4 @@
+"""
+Support package for the Notion MCP server (mcp-notion-server.py)
+Holds the Notion API plumbing shared by the tool handlers
+"""
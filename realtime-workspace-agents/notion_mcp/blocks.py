@@ -0,0 +1,145 @@
+"""
+Notion block builders
+Small helpers producing the block JSON sent to the Notion API
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Notion accepts at most 100 children per append request
+MAX_CHILDREN_PER_APPEND = 100
+
+# Maximum length of one rich_text segment (UTF-16 code units, as Notion counts them)
+MAX_RICH_TEXT_LENGTH = 2000
+
+# Notion accepts at most 100 segments per rich_text array
+MAX_RICH_TEXT_SEGMENTS = 100
+
+# Task statuses with a special meaning for to_do blocks
+TASK_DONE_STATUSES = ("done", "completed", "complete")
+TASK_DELETED_STATUS = "deleted"
+
+
+def rich_text(content: str, bold: bool = False, color: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Builds a rich_text array holding the text in as few segments as Notion allows
+    (one, unless the text is longer than 2000 characters)
+    Text beyond 100 full segments does not fit in a block: it is cut and ends with "…"
+    """
+    if len(content) <= MAX_RICH_TEXT_LENGTH // 2:
+        # Cannot exceed the limit even if every character takes two UTF-16 code units
+        parts = [content]
+    else:
+        # Every character takes at least one code unit: anything past this cannot fit
+        parts = split_text(content[:MAX_RICH_TEXT_SEGMENTS * MAX_RICH_TEXT_LENGTH + 1])
+        if len(parts) > MAX_RICH_TEXT_SEGMENTS:
+            parts = parts[:MAX_RICH_TEXT_SEGMENTS]
+            parts[-1] = parts[-1][:-1] + "…"
+    segments = []
+    for part in parts:
+        segment: Dict[str, Any] = {"type": "text", "text": {"content": part}}
+        if bold or color:
+            segment["annotations"] = {"bold": bold, "color": color or "default"}
+        segments.append(segment)
+    return segments
+
+
+def split_text(content: str, limit: int = MAX_RICH_TEXT_LENGTH) -> List[str]:
+    """
+    Splits text into pieces of at most `limit` UTF-16 code units, never
+    inside a character (emoji and other astral characters count twice)
+    """
+    pieces = []
+    start = 0
+    while start < len(content) or not pieces:
+        piece = content[start:start + limit]
+        excess = len(piece.encode("utf-16-le")) // 2 - limit
+        while excess > 0:
+            # Each astral character removed from the end frees one or two units
+            piece = piece[:len(piece) - (excess + 1) // 2]
+            excess = len(piece.encode("utf-16-le")) // 2 - limit
+        pieces.append(piece)
+        start += len(piece)
+    return pieces
+
+
+def text_block(block_type: str, content: str, **annotations) -> Dict[str, Any]:
+    """Builds a text block (paragraph, heading_1/2/3, bulleted_list_item, ...)"""
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": rich_text(content, **annotations)},
+    }
+
+
+def to_do_block(content: str, checked: bool = False) -> Dict[str, Any]:
+    """Builds a to_do block"""
+    return {
+        "object": "block",
+        "type": "to_do",
+        "to_do": {"rich_text": rich_text(content), "checked": checked},
+    }
+
+
+def callout_block(content: str, emoji: str = "💡") -> Dict[str, Any]:
+    """Builds a callout block"""
+    return {
+        "object": "block",
+        "type": "callout",
+        "callout": {"rich_text": rich_text(content), "icon": {"emoji": emoji}},
+    }
+
+
+def divider_block() -> Dict[str, Any]:
+    """Builds a divider block"""
+    return {"object": "block", "type": "divider", "divider": {}}
+
+
+def task_label(task: Dict[str, Any]) -> str:
+    """
+    Formats a task as a single to_do line: title — 👤 assignee • ⚡ priority • 📅 due
+    """
+    title = task.get("task") or task.get("title") or "New task"
+    details = []
+    if task.get("assignedTo"):
+        details.append(f"👤 {task['assignedTo']}")
+    if task.get("priority"):
+        details.append(f"⚡ {task['priority']}")
+    if task.get("dueDate"):
+        details.append(f"📅 {task['dueDate']}")
+    return f"{title} — {' • '.join(details)}" if details else title
+
+
+def parse_task_label(label: str) -> Dict[str, str]:
+    """
+    Inverse of task_label(): splits a to_do line back into task fields
+    """
+    title, _, details = label.partition(" — ")
+    fields = {"task": title.strip()}
+    for detail in details.split(" • ") if details else []:
+        for prefix, field in (("👤 ", "assignedTo"), ("⚡ ", "priority"), ("📅 ", "dueDate")):
+            if detail.startswith(prefix):
+                fields[field] = detail[len(prefix):].strip()
+    return fields
+
+
+def block_plain_text(block: Dict[str, Any]) -> str:
+    """Concatenated text of a block's rich_text"""
+    return "".join(
+        part.get("plain_text") or part.get("text", {}).get("content", "")
+        for part in block.get(block.get("type", ""), {}).get("rich_text", [])
+    )
+
+
+def is_done_status(status: Optional[str]) -> bool:
+    """True when a task status means the to_do is checked"""
+    return bool(status) and status.lower() in TASK_DONE_STATUSES
+
+
+def chunk_children(blocks: List[Dict[str, Any]],
+                   size: int = MAX_CHILDREN_PER_APPEND) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Splits a block list into append-sized batches, preserving order
+    """
+    for start in range(0, len(blocks), size):
+        yield blocks[start:start + size]
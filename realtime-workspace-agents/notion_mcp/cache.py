@@ -0,0 +1,238 @@
+"""
+Block-tree cache
+Page metadata and block children kept in process, keyed by block ID
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value)) if value is not None else 0
+
+
+class CacheEntry:
+    """Cached state of one page or block"""
+
+    __slots__ = ("block_id", "page", "children", "last_edited_time", "captured_at", "fresh_until", "size",
+                 "page_size", "child_sizes")
+
+    def __init__(self, block_id: str):
+        self.block_id = block_id
+        self.page: Optional[Dict[str, Any]] = None
+        self.children: Optional[List[Dict[str, Any]]] = None
+        self.last_edited_time: Optional[str] = None
+        # Wall-clock time the children were last known to match Notion (read or written)
+        self.captured_at = 0.0
+        self.fresh_until = 0.0
+        # JSON size of the page and of each child, so writes only measure what they change
+        self.size = 0
+        self.page_size = 0
+        self.child_sizes: Dict[str, int] = {}
+
+    def edited(self, block: Dict[str, Any]):
+        """Moves last_edited_time to that of a block this process just wrote"""
+        edited = block.get("last_edited_time")
+        if edited and (self.last_edited_time is None or edited > self.last_edited_time):
+            self.last_edited_time = edited
+
+    def is_fresh(self) -> bool:
+        """True while the entry can be served without asking Notion"""
+        return self.children is not None and time.monotonic() < self.fresh_until
+
+
+class BlockCache:
+    """
+    LRU cache of Notion pages and block children
+
+    Entries are served without any API call while fresh (right after they
+    were read or written by this process), and otherwise revalidated by
+    comparing the page's last_edited_time with the one the children were
+    captured at. Our own writes are applied to the cached children in place
+    and move that timestamp to the one Notion gave them. The total size of
+    the cached JSON is bounded by max_bytes; least recently used entries are
+    evicted first.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        """Initialize an empty cache (clock: wall-clock time, compared with Notion's timestamps)"""
+        self.clock = clock
+        self.max_bytes = max_bytes or int(os.getenv("NOTION_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.ttl = ttl if ttl is not None else float(os.getenv("NOTION_CACHE_TTL", "30"))
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._parents: Dict[str, str] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def read(self, block_id: str,
+                   load_page: Callable[[], Awaitable[Dict[str, Any]]],
+                   load_children: Callable[[], Awaitable[List[Dict[str, Any]]]]
+                   ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Returns (page, children) for a block, calling Notion only when needed:
+        nothing while the entry is fresh, the page metadata alone when its
+        last_edited_time proves the children unchanged, both otherwise
+        """
+        entry = self.lookup(block_id)
+        if entry is not None and entry.is_fresh():
+            self.hits += 1
+            return entry.page, entry.children
+
+        page = await load_page()
+        if entry is not None and self.is_current(entry, page.get("last_edited_time")):
+            self.revalidations += 1
+            entry = self.store(block_id, page=page)
+            return entry.page, entry.children
+
+        self.misses += 1
+        entry = self.store(block_id, page=page, children=await load_children())
+        return entry.page, entry.children
+
+    def lookup(self, block_id: str) -> Optional[CacheEntry]:
+        """Returns the entry (marking it recently used) or None"""
+        entry = self._entries.get(block_id)
+        if entry is not None:
+            self._entries.move_to_end(block_id)
+        return entry
+
+    def is_current(self, entry: CacheEntry, last_edited_time: Optional[str]) -> bool:
+        """
+        True when the cached children match the given last_edited_time
+
+        Notion reports last_edited_time at minute precision: another edit
+        made in the same minute as the capture carries the same timestamp.
+        The children are only trusted when they were captured after that
+        minute was over.
+        """
+        if entry.children is None or not last_edited_time or entry.last_edited_time != last_edited_time:
+            return False
+        try:
+            edited = datetime.fromisoformat(last_edited_time.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        if edited.tzinfo is None:
+            edited = edited.replace(tzinfo=timezone.utc)
+        return entry.captured_at >= edited.timestamp() + 60
+
+    def store(self, block_id: str, page: Optional[Dict[str, Any]] = None,
+              children: Optional[List[Dict[str, Any]]] = None) -> CacheEntry:
+        """Stores freshly read page metadata and/or children"""
+        entry = self._entries.get(block_id) or CacheEntry(block_id)
+        size = entry.size
+        if page is not None:
+            entry.page = page
+            entry.last_edited_time = page.get("last_edited_time", entry.last_edited_time)
+            page_size = _json_size(page)
+            size += page_size - entry.page_size
+            entry.page_size = page_size
+        if children is not None:
+            entry.children = list(children)
+            entry.child_sizes = {child["id"]: _json_size(child) for child in entry.children}
+            size = entry.page_size + sum(entry.child_sizes.values())
+            for child in entry.children:
+                self._parents[child["id"]] = block_id
+        self._captured(entry)
+        self._commit(entry, size)
+        return entry
+
+    def append_children(self, block_id: str, blocks: List[Dict[str, Any]], after: Optional[str] = None):
+        """Applies an append (or an insertion after the child `after`) made by this process"""
+        entry = self._entries.get(block_id)
+        if entry is None or entry.children is None:
+            return
+        if after is None:
+            entry.children.extend(blocks)
+        else:
+            position = next((index for index, child in enumerate(entry.children) if child["id"] == after), None)
+            if position is None:
+                self.invalidate(block_id)
+                return
+            entry.children[position + 1:position + 1] = blocks
+        size = entry.size
+        for block in blocks:
+            self._parents[block["id"]] = block_id
+            entry.child_sizes[block["id"]] = block_size = _json_size(block)
+            size += block_size
+            entry.edited(block)
+        self._captured(entry)
+        self._commit(entry, size)
+
+    def update_block(self, block: Dict[str, Any]):
+        """Applies a block update made by this process"""
+        parent = self._entries.get(self._parents.get(block.get("id", ""), ""))
+        if parent is None or parent.children is None:
+            return
+        for index, child in enumerate(parent.children):
+            if child["id"] == block["id"]:
+                parent.children[index] = block
+                break
+        block_size = _json_size(block)
+        size = parent.size + block_size - parent.child_sizes.get(block["id"], 0)
+        parent.child_sizes[block["id"]] = block_size
+        parent.edited(block)
+        self._captured(parent)
+        self._commit(parent, size)
+
+    def remove_block(self, block_id: str, block: Optional[Dict[str, Any]] = None):
+        """Applies a block deletion made by this process (block: the deleted block Notion returned)"""
+        self.invalidate(block_id)
+        parent = self._entries.get(self._parents.pop(block_id, ""))
+        if parent is None or parent.children is None:
+            return
+        parent.children = [child for child in parent.children if child["id"] != block_id]
+        if block is not None:
+            parent.edited(block)
+        self._captured(parent)
+        self._commit(parent, parent.size - parent.child_sizes.pop(block_id, 0))
+
+    def _captured(self, entry: CacheEntry):
+        """The entry's children were just read or written"""
+        entry.captured_at = self.clock()
+        entry.fresh_until = time.monotonic() + self.ttl
+
+    def invalidate(self, block_id: str):
+        """Drops a cached entry"""
+        entry = self._entries.pop(block_id, None)
+        if entry is not None:
+            self._forget(entry)
+
+    def _forget(self, entry: CacheEntry):
+        """Releases the accounting of an entry leaving the cache"""
+        self._bytes -= entry.size
+        for child in entry.children or []:
+            if self._parents.get(child["id"]) == entry.block_id:
+                del self._parents[child["id"]]
+
+    def _commit(self, entry: CacheEntry, size: int):
+        """(Re)inserts an entry with its new size and enforces the memory cap"""
+        self._bytes += size - entry.size
+        entry.size = size
+        self._entries[entry.block_id] = entry
+        self._entries.move_to_end(entry.block_id)
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        lookups = self.hits + self.revalidations + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round((self.hits + self.revalidations) / lookups, 4) if lookups else 0.0,
+        }
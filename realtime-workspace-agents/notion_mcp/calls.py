@@ -0,0 +1,168 @@
+"""
+Tool call execution
+Each tool call runs as a tracked task with a deadline, inside bounded
+in-flight slots, and records the Notion objects it writes so that a call
+cancelled or timed out halfway can be rolled back
+"""
+
+import asyncio
+import contextvars
+import os
+import re
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+_CHILDREN_PATH = re.compile(r"^/blocks/([^/]+)/children$")
+_BLOCK_PATH = re.compile(r"^/blocks/([^/]+)$")
+
+
+class WriteLog:
+    """Notion objects created or changed in place by one tool call"""
+
+    def __init__(self):
+        # (object ID, parent ID), in creation order
+        self.created: List[Tuple[str, Optional[str]]] = []
+        self.modified: List[str] = []
+        # Set once the call is over: later writes (e.g. write-behind flushes) are not the call's
+        self.closed = False
+
+    def record(self, method: str, path: str, body: Optional[Dict[str, Any]], response: Dict[str, Any]):
+        """Classifies one successful Notion request"""
+        if method == "POST" and path in ("/pages", "/databases"):
+            parent = (body or {}).get("parent", {})
+            self.created.append((response.get("id"), parent.get("page_id") or parent.get("database_id")))
+        elif method == "PATCH" and (match := _CHILDREN_PATH.match(path)):
+            self.created.extend((block.get("id"), match.group(1)) for block in response.get("results", []))
+        elif method in ("PATCH", "DELETE") and (match := _BLOCK_PATH.match(path)):
+            self.modified.append(match.group(1))
+
+    def created_roots(self) -> List[str]:
+        """Created objects whose parent was not created by the same call (archiving those removes the rest)"""
+        created = {_compact(object_id) for object_id, _ in self.created}
+        return [object_id for object_id, parent in self.created
+                if object_id and (parent is None or _compact(parent) not in created)]
+
+
+# Write log of the tool call running in the current task (inherited by its sub-tasks)
+current_writes: contextvars.ContextVar[Optional[WriteLog]] = contextvars.ContextVar(
+    "notion_writes", default=None
+)
+
+
+def record_write(method: str, path: str, body: Optional[Dict[str, Any]], response: Dict[str, Any]):
+    """Called by the Notion client after every successful request"""
+    log = current_writes.get()
+    if log is not None and not log.closed and method != "GET":
+        log.record(method, path, body, response)
+
+
+def _compact(object_id: str) -> str:
+    return object_id.replace("-", "")
+
+
+class ToolCallTimeout(asyncio.TimeoutError):
+    """A tool call ran past its deadline (its partial writes have been rolled back)"""
+
+    def __init__(self, tool: str, timeout: float, rollback: Dict[str, Any]):
+        super().__init__(f"{tool} exceeded its {timeout:g}s deadline; "
+                         f"rolled back {rollback.get('archived', 0)} created object(s), "
+                         f"{rollback.get('modifiedInPlace', 0)} in-place change(s) kept")
+        self.tool = tool
+        self.timeout = timeout
+        self.rollback = rollback
+
+
+class TrackedCall:
+    """One tool call in flight"""
+
+    __slots__ = ("tool", "started", "writes")
+
+    def __init__(self, tool: str, writes: WriteLog):
+        self.tool = tool
+        self.started = time.monotonic()
+        self.writes = writes
+
+
+class ToolCallRunner:
+    """
+    Runs tool calls concurrently within bounded in-flight slots
+
+    At most max_inflight calls execute at once, and no single tool takes
+    more than max_per_tool of those slots, so a burst of slow project builds
+    leaves room for quick task updates. Each call gets `timeout` seconds,
+    queueing included (0 disables the deadline).
+
+    A call that times out or is cancelled (MCP notifications/cancelled, or
+    its session going away) stops at its next await, which drops its pending
+    Notion requests. The objects it had already created are then archived by
+    `rollback`; in-place edits cannot be undone and are reported instead.
+    """
+
+    def __init__(self, rollback: Callable[[WriteLog], Awaitable[Dict[str, Any]]],
+                 max_inflight: Optional[int] = None, max_per_tool: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """Initialize the slots (no call is running yet)"""
+        self.max_inflight = max_inflight or int(os.getenv("MCP_MAX_INFLIGHT_CALLS", "16"))
+        self.max_per_tool = max_per_tool or int(os.getenv("MCP_MAX_INFLIGHT_PER_TOOL", "0")) \
+            or max(1, self.max_inflight // 2)
+        self.timeout = timeout if timeout is not None else float(os.getenv("MCP_TOOL_TIMEOUT", "120"))
+        self.rollback = rollback
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._tool_slots: Dict[str, asyncio.Semaphore] = {}
+        self._active: Set[TrackedCall] = set()
+        self._cleanups: Set[asyncio.Task] = set()
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rolled_back = 0
+
+    async def run(self, tool: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Runs call() as one tracked tool call"""
+        tracked = TrackedCall(tool, WriteLog())
+        token = current_writes.set(tracked.writes)
+        self._active.add(tracked)
+        try:
+            return await asyncio.wait_for(self._in_slot(tool, call), self.timeout or None)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            tracked.writes.closed = True
+            # Our own deadline: the caller is still waiting, so it gets the rollback outcome
+            raise ToolCallTimeout(tool, self.timeout, await asyncio.shield(self._roll_back(tracked)))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            tracked.writes.closed = True
+            # The caller is gone and every await here would be cancelled again: clean up in the background
+            cleanup = asyncio.get_running_loop().create_task(self._roll_back(tracked))
+            self._cleanups.add(cleanup)
+            cleanup.add_done_callback(self._cleanups.discard)
+            raise
+        finally:
+            tracked.writes.closed = True
+            self._active.discard(tracked)
+            current_writes.reset(token)
+
+    async def _in_slot(self, tool: str, call: Callable[[], Awaitable[T]]) -> T:
+        tool_slots = self._tool_slots.setdefault(tool, asyncio.Semaphore(self.max_per_tool))
+        async with tool_slots, self._slots:
+            return await call()
+
+    async def _roll_back(self, tracked: TrackedCall) -> Dict[str, Any]:
+        """Archives what the call created and reports what it changed in place"""
+        outcome: Dict[str, Any] = {"modifiedInPlace": len(set(tracked.writes.modified))}
+        if tracked.writes.created or tracked.writes.modified:
+            try:
+                outcome.update(await self.rollback(tracked.writes))
+                self.rolled_back += 1
+            except Exception as e:
+                outcome["error"] = str(e)
+            print(f"↩️ {tracked.tool} stopped after {time.monotonic() - tracked.started:.1f}s, "
+                  f"rollback: {outcome}", file=sys.stderr)
+        return outcome
+
+    async def aclose(self):
+        """Waits for rollbacks still running"""
+        if self._cleanups:
+            await asyncio.gather(*self._cleanups, return_exceptions=True)
@@ -0,0 +1,159 @@
+"""
+Tool catalogue and argument validation
+Tool definitions are built once; each input schema is compiled into a validator
+that rejects malformed calls before any Notion I/O and fills in defaults
+"""
+
+import copy
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+# Checks a value at a path and returns it with defaults applied
+Check = Callable[[Any, str], Any]
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_JSON_TYPES: Dict[str, Tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+}
+
+
+class ArgumentError(ValueError):
+    """Tool arguments that do not match the tool's input schema"""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path or 'arguments'}: {message}")
+        self.path = path
+        self.message = message
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], Any]:
+    """
+    Compiles the JSON Schema subset used by the tool definitions (type,
+    properties, required, default, enum, items, minLength) into a function
+    returning a validated copy of its argument
+
+    Optional properties sent as null are treated as absent, since some
+    clients send null for every argument they do not fill in.
+    """
+    check = _compile(schema)
+    return lambda value: check(value, "")
+
+
+def _compile(schema: Dict[str, Any]) -> Check:
+    steps: List[Check] = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        python_types = _JSON_TYPES[expected]
+        reject_bool = expected in ("integer", "number")
+
+        def check_type(value: Any, path: str) -> Any:
+            if not isinstance(value, python_types) or (reject_bool and isinstance(value, bool)):
+                raise ArgumentError(path, f"expected {expected}, got {_json_type(value)}")
+            return value
+        steps.append(check_type)
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        listing = ", ".join(map(str, schema["enum"]))
+
+        def check_enum(value: Any, path: str) -> Any:
+            if value not in allowed:
+                raise ArgumentError(path, f"'{value}' is not one of: {listing}")
+            return value
+        steps.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_length(value: Any, path: str) -> Any:
+            if len(value) < min_length:
+                raise ArgumentError(path, f"must be at least {min_length} character(s)")
+            return value
+        steps.append(check_length)
+
+    if expected == "object" and "properties" in schema:
+        steps.append(_compile_object(schema))
+    if expected == "array" and "items" in schema:
+        item_check = _compile(schema["items"])
+
+        def check_items(value: List[Any], path: str) -> List[Any]:
+            return [item_check(item, f"{path}[{index}]") for index, item in enumerate(value)]
+        steps.append(check_items)
+
+    if len(steps) == 1:
+        return steps[0]
+
+    def check_all(value: Any, path: str) -> Any:
+        for step in steps:
+            value = step(value, path)
+        return value
+    return check_all
+
+
+def _compile_object(schema: Dict[str, Any]) -> Check:
+    properties = {name: _compile(sub) for name, sub in schema["properties"].items()}
+    required = tuple(schema.get("required", ()))
+    defaults = {name: sub["default"] for name, sub in schema["properties"].items() if "default" in sub}
+
+    def check_object(value: Dict[str, Any], path: str) -> Dict[str, Any]:
+        result = {}
+        for name, item in value.items():
+            check = properties.get(name)
+            if check is None:
+                result[name] = item
+            elif item is not None or name in required:
+                result[name] = check(item, f"{path}.{name}" if path else name)
+        for name in required:
+            if name not in result:
+                raise ArgumentError(path, f"missing required property '{name}'")
+        for name, default in defaults.items():
+            if name not in result:
+                # Defaults may be lists or dicts: never share them between calls
+                result[name] = copy.copy(default)
+        return result
+    return check_object
+
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    for name, python_types in _JSON_TYPES.items():
+        if isinstance(value, python_types) and not (name in ("integer", "number") and isinstance(value, bool)):
+            return name
+    return type(value).__name__
+
+
+class RegisteredTool:
+    """A tool definition with its handler and compiled validator"""
+
+    __slots__ = ("tool", "handler", "validate")
+
+    def __init__(self, tool: Any, handler: ToolHandler):
+        self.tool = tool
+        self.handler = handler
+        self.validate = compile_schema(tool.inputSchema)
+
+
+class ToolCatalogue:
+    """
+    Registry of the server's tools, frozen once every tool is registered
+
+    tools/list is answered from the prebuilt tuple and tools/call looks the
+    handler and validator up in a read-only table.
+    """
+
+    def __init__(self, entries: List[Tuple[Any, ToolHandler]]):
+        """Compiles every tool and freezes the table"""
+        registered = {tool.name: RegisteredTool(tool, handler) for tool, handler in entries}
+        self.table: Mapping[str, RegisteredTool] = MappingProxyType(registered)
+        self.tools: Tuple[Any, ...] = tuple(entry.tool for entry in registered.values())
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        return self.table.get(name)
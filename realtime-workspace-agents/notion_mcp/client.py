@@ -0,0 +1,177 @@
+"""
+Async Notion API client
+One pooled HTTP client shared by every tool handler of the MCP server
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+from notion_mcp.calls import record_write
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+
+class NotionAPIError(Exception):
+    """Error returned by the Notion API"""
+
+    def __init__(self, status_code: int, message: str, body: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"Notion API error: {status_code} - {message}")
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+
+
+def normalize_notion_id(notion_id: str) -> str:
+    """
+    Formats a Notion ID as 8-4-4-4-12 (same rule as route.ts)
+    """
+    clean_id = notion_id.replace("-", "")
+    if len(clean_id) == 32:
+        return f"{clean_id[:8]}-{clean_id[8:12]}-{clean_id[12:16]}-{clean_id[16:20]}-{clean_id[20:]}"
+    return notion_id
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    """
+    Whether sending the request twice has the same effect as sending it once
+    Creations (POST /pages, POST /databases) and appends (PATCH
+    /blocks/{id}/children) are not; queries, searches, updates and deletes are
+    """
+    path = path.split("?", 1)[0].rstrip("/")
+    if method == "POST":
+        return path.endswith("/query") or path == "/search"
+    if method == "PATCH":
+        return not path.endswith("/children")
+    return True
+
+
+class NotionClient:
+    """
+    Async client for the Notion API
+
+    The underlying httpx.AsyncClient is created on first use and kept for the
+    lifetime of the server, so connections stay alive and TLS sessions are
+    reused across tool calls. When a scheduler is given, every request is
+    sent through it (rate limiting, priorities and retries); when metrics
+    are given, every attempt is measured. A transport (e.g. the in-memory
+    emulator's) replaces the network. Call aclose() on shutdown.
+    """
+
+    def __init__(self, token: str, base_url: str = NOTION_API_URL,
+                 notion_version: str = NOTION_VERSION,
+                 timeout: Optional[float] = None,
+                 max_connections: Optional[int] = None,
+                 scheduler: Optional[Any] = None,
+                 metrics: Optional[Any] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Initialize the client configuration (no connection is opened here)"""
+        self.token = token
+        self.base_url = os.getenv("NOTION_API_URL", base_url)
+        self.notion_version = notion_version
+        self.timeout = timeout if timeout is not None else float(os.getenv("NOTION_TIMEOUT", "30"))
+        self.max_connections = max_connections or int(os.getenv("NOTION_MAX_CONNECTIONS", "10"))
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared httpx client, created lazily"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.token}",
+                    "Notion-Version": self.notion_version,
+                    "Content-Type": "application/json",
+                },
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None,
+                      params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None, priority: Optional[Any] = None,
+                      idempotent: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Sends one request to the Notion API and returns the decoded JSON body
+        Raises NotionAPIError on non-2xx responses
+        idempotent (guessed from the method and path when not given) tells
+        the scheduler whether the request may be sent again after a failure
+        """
+        if self.scheduler is None:
+            result = await self._send(method, path, json, params, timeout)
+        else:
+            result = await self.scheduler.submit(
+                lambda: self._send(method, path, json, params, timeout), priority,
+                idempotent=is_idempotent(method, path) if idempotent is None else idempotent
+            )
+        # Writes are logged for the running tool call, so it can be rolled back if it is abandoned
+        record_write(method, path, json, result)
+        return result
+
+    async def _send(self, method: str, path: str, json: Optional[Dict[str, Any]],
+                    params: Optional[Dict[str, Any]], timeout: Optional[float]) -> Dict[str, Any]:
+        """One attempt, measured when metrics are enabled"""
+        if self.metrics is None:
+            return await self._exchange(method, path, json, params, timeout)
+        with self.metrics.track_request(method, path):
+            return await self._exchange(method, path, json, params, timeout)
+
+    async def _exchange(self, method: str, path: str, json: Optional[Dict[str, Any]],
+                        params: Optional[Dict[str, Any]], timeout: Optional[float]) -> Dict[str, Any]:
+        """Performs the HTTP exchange itself"""
+        kwargs: Dict[str, Any] = {}
+        if json is not None:
+            kwargs["json"] = json
+        if params:
+            kwargs["params"] = params
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        response = await self.client.request(method, path, **kwargs)
+
+        if response.is_error:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            raise NotionAPIError(
+                response.status_code,
+                body.get("message", response.reason_phrase),
+                body,
+                dict(response.headers),
+            )
+
+        return response.json() if response.content else {}
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        return await self.request("GET", path, params=params, **kwargs)
+
+    async def post(self, path: str, json: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return await self.request("POST", path, json=json, **kwargs)
+
+    async def patch(self, path: str, json: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return await self.request("PATCH", path, json=json, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> Dict[str, Any]:
+        return await self.request("DELETE", path, **kwargs)
+
+    async def aclose(self):
+        """Closes the pooled connections (and stops the scheduler)"""
+        if self.scheduler is not None:
+            await self.scheduler.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
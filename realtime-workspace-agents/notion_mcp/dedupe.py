@@ -0,0 +1,120 @@
+"""
+Duplicate tool-call suppression
+Identical calls share one execution while in flight and reuse its result for a while after
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+IDEMPOTENCY_KEY = "idempotencyKey"
+
+
+def normalize_arguments(value: Any) -> Any:
+    """
+    Canonical form of tool arguments: whitespace collapsed in strings,
+    empty values dropped (they mean the same as a missing argument)
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        normalized = {key: normalize_arguments(item) for key, item in value.items()}
+        return {key: item for key, item in normalized.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [normalize_arguments(item) for item in value]
+    return value
+
+
+class CallDeduplicator:
+    """
+    Idempotency layer in front of the tool handlers
+
+    A call is identified by its client-supplied idempotencyKey or, failing
+    that, by a hash of (tool name, normalized arguments). Concurrent
+    duplicates await the same execution; successful results are kept for
+    `ttl` seconds and returned to repeats without running the tool again.
+    Failures are never cached. An execution is cancelled once every caller
+    awaiting it has been cancelled.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1000):
+        """Initialize empty in-flight and result tables"""
+        self.ttl = ttl if ttl is not None else float(os.getenv("NOTION_DEDUPE_TTL", "60"))
+        self.max_entries = max_entries
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.executions = 0
+        self.shared = 0
+        self.replayed = 0
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> str:
+        """Identity of a call"""
+        if arguments.get(IDEMPOTENCY_KEY):
+            return f"{name}:key:{arguments[IDEMPOTENCY_KEY]}"
+        payload = {k: v for k, v in arguments.items() if k != IDEMPOTENCY_KEY}
+        canonical = json.dumps([name, normalize_arguments(payload)], sort_keys=True,
+                               ensure_ascii=False, separators=(",", ":"))
+        return f"{name}:sha256:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Runs call() unless an identical call is running or recently succeeded"""
+        cached = self._results.get(key)
+        if cached is not None:
+            expires, result = cached
+            if time.monotonic() < expires:
+                self.replayed += 1
+                return result
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            return await self._await(task)
+
+        self.executions += 1
+        task = asyncio.ensure_future(call())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._settle(key, done))
+        return await self._await(task)
+
+    async def _await(self, task: asyncio.Task) -> Any:
+        """Waits for a shared execution; the last caller to give up cancels it"""
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _settle(self, key: str, task: asyncio.Task):
+        """Moves a finished execution from the in-flight table to the result cache"""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "sharedInFlight": self.shared,
+            "replayedFromCache": self.replayed,
+            "inFlight": len(self._inflight),
+            "cachedResults": len(self._results),
+        }
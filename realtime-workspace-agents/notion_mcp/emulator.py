@@ -0,0 +1,429 @@
+"""
+In-memory Notion emulator
+Pages, block trees, databases and rows behind the Notion REST routes the server uses,
+with cursor pagination, the 100-children limit and optional latency / rate-limit modelling
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+MAX_CHILDREN = 100
+MAX_TEXT_LENGTH = 2000
+MAX_TEXT_SEGMENTS = 100
+MAX_PAGE_SIZE = 100
+
+# (status, JSON body, extra headers)
+EmulatorResponse = Tuple[int, Dict[str, Any], Dict[str, str]]
+
+
+class NotionEmulator:
+    """
+    Deterministic in-process model of the Notion API
+
+    Serves POST /pages, GET /pages/{id}, POST /databases,
+    POST /databases/{id}/query, GET|PATCH /blocks/{id}/children (with
+    "after" positioning) and GET|PATCH|DELETE /blocks/{id}. IDs come from a seeded generator, so two
+    runs with the same seed and calls produce the same objects.
+
+    latency/jitter delay every response; rate_limit (requests/second) makes
+    the emulator answer 429 with Retry-After once its own bucket is empty,
+    like Notion; error_rate injects 429s at random. All default to 0/off
+    (NOTION_SIM_LATENCY, NOTION_SIM_JITTER, NOTION_SIM_RATE_LIMIT,
+    NOTION_SIM_ERROR_RATE, NOTION_SIM_SEED).
+    """
+
+    def __init__(self, latency: Optional[float] = None, jitter: Optional[float] = None,
+                 rate_limit: Optional[float] = None, error_rate: Optional[float] = None,
+                 retry_after: float = 1.0, seed: Optional[int] = None):
+        """Initialize an empty workspace holding one root page"""
+        self.latency = latency if latency is not None else float(os.getenv("NOTION_SIM_LATENCY", "0"))
+        self.jitter = jitter if jitter is not None else float(os.getenv("NOTION_SIM_JITTER", "0"))
+        self.rate_limit = rate_limit if rate_limit is not None else float(os.getenv("NOTION_SIM_RATE_LIMIT", "0"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("NOTION_SIM_ERROR_RATE", "0"))
+        self.retry_after = retry_after
+        self.random = random.Random(seed if seed is not None else int(os.getenv("NOTION_SIM_SEED", "0")))
+
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {}
+        # child_database blocks, listed among their page's children
+        self._database_blocks: Dict[str, Dict[str, Any]] = {}
+        self.requests: Dict[str, int] = {}
+        self.throttled = 0
+        self._tokens = self.rate_limit
+        self._last_refill = time.monotonic()
+
+        routes = [
+            ("POST", "/pages", self._create_page),
+            ("GET", "/pages/{id}", self._get_page),
+            ("POST", "/databases", self._create_database),
+            ("POST", "/databases/{id}/query", self._query_database),
+            ("GET", "/blocks/{id}/children", self._list_children),
+            ("PATCH", "/blocks/{id}/children", self._append_children),
+            ("GET", "/blocks/{id}", self._get_block),
+            ("PATCH", "/blocks/{id}", self._update_block),
+            ("DELETE", "/blocks/{id}", self._delete_block),
+        ]
+        self._routes: List[Tuple[str, "re.Pattern[str]", str, Callable[..., EmulatorResponse]]] = [
+            (method, re.compile("^" + route.replace("{id}", "([^/]+)") + "$"), f"{method} {route}", handler)
+            for method, route, handler in routes
+        ]
+
+        # Workspace page projects are created under (stands in for NOTION_PARENT_PAGE_ID)
+        self.root_page_id = self._new_id()
+        self.objects[self.root_page_id] = {
+            "object": "page",
+            "id": self.root_page_id,
+            "parent": {"type": "workspace", "workspace": True},
+            "properties": {"title": {"title": [_rich_text("Workspace")]}},
+            "url": _page_url(self.root_page_id),
+            "created_time": _notion_time(),
+            "last_edited_time": _notion_time(),
+            "archived": False,
+        }
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """httpx transport answering from the emulator (used by NotionClient in simulation mode)"""
+        return httpx.MockTransport(self._handle_httpx)
+
+    async def _handle_httpx(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else {}
+        path = request.url.path
+        prefix = path.find("/v1/")
+        path = path[prefix + 3:] if prefix >= 0 else path
+        status, payload, headers = await self.handle(request.method, path, body, dict(request.url.params))
+        return httpx.Response(status, json=payload, headers=headers)
+
+    async def handle(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                     params: Optional[Dict[str, Any]] = None) -> EmulatorResponse:
+        """
+        Answers one API request (path relative to /v1)
+        Applies the latency model, then the rate-limit model, then the route
+        """
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        for route_method, pattern, label, handler in self._routes:
+            match = pattern.match(path) if route_method == method else None
+            if match is None:
+                continue
+            self.requests[label] = self.requests.get(label, 0) + 1
+            if self._throttle():
+                self.throttled += 1
+                return _error(429, "rate_limited", "You have been rate limited.",
+                              {"Retry-After": f"{self.retry_after:g}"})
+            return handler(*match.groups(), body=body or {}, params=params or {})
+        return _error(400, "invalid_request_url", f"Invalid request URL: {method} {path}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "total": sum(self.requests.values()),
+            "throttled": self.throttled,
+            "objects": len(self.objects),
+        }
+
+    def reset_stats(self):
+        self.requests.clear()
+        self.throttled = 0
+
+    def _throttle(self) -> bool:
+        if self.error_rate and self.random.random() < self.error_rate:
+            return True
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+        self._last_refill = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def _new_id(self) -> str:
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def _lookup(self, object_id: str, kind: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        found = self.objects.get(_dashed(object_id))
+        if found is None or (kind and found["object"] != kind):
+            return None
+        return found
+
+    def _touch(self, object_id: Optional[str]):
+        if object_id in self.objects:
+            self.objects[object_id]["last_edited_time"] = _notion_time()
+
+    def _add_children(self, parent_id: str, blocks: List[Dict[str, Any]],
+                      after: Optional[str] = None) -> List[Dict[str, Any]]:
+        siblings = self.children.setdefault(parent_id, [])
+        position = siblings.index(after) + 1 if after else len(siblings)
+        created = []
+        for block in blocks:
+            block_type = block.get("type")
+            if block_type is None:
+                block_type = next(key for key in block if key not in ("object", "children"))
+            content = dict(block.get(block_type, {}))
+            nested = content.pop("children", None) or block.get("children")
+            if "rich_text" in content:
+                content["rich_text"] = [_with_plain_text(part) for part in content["rich_text"]]
+            block_id = self._new_id()
+            stored = {
+                "object": "block",
+                "id": block_id,
+                "parent": {"type": "block_id", "block_id": parent_id},
+                "type": block_type,
+                "created_time": _notion_time(),
+                "last_edited_time": _notion_time(),
+                "has_children": False,
+                "archived": False,
+                block_type: content,
+            }
+            self.objects[block_id] = stored
+            siblings.insert(position, block_id)
+            position += 1
+            if nested:
+                self._add_children(block_id, nested)
+                stored["has_children"] = True
+            created.append(stored)
+        parent = self.objects.get(parent_id)
+        if parent is not None and parent["object"] == "block" and blocks:
+            parent["has_children"] = True
+        self._touch(parent_id)
+        return created
+
+    def _create_page(self, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        children = body.get("children", [])
+        invalid = _check_children(children)
+        if invalid is not None:
+            return invalid
+        parent = dict(body.get("parent", {}))
+        database = self._lookup(parent["database_id"], "database") if parent.get("database_id") else None
+        container = self._lookup(parent["page_id"], "page") if parent.get("page_id") else None
+        if database is None and container is None:
+            return _error(404, "object_not_found", "Could not find parent page or database.")
+
+        page_id = self._new_id()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "parent": {"type": "database_id", "database_id": database["id"]} if database
+                      else {"type": "page_id", "page_id": container["id"]},
+            "properties": body.get("properties", {}),
+            "url": _page_url(page_id),
+            "created_time": _notion_time(),
+            "last_edited_time": _notion_time(),
+            "archived": False,
+        }
+        self.objects[page_id] = page
+        self.children.setdefault((database or container)["id"], []).append(page_id)
+        self._add_children(page_id, children)
+        return 200, page, {}
+
+    def _get_page(self, page_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        page = self._lookup(page_id, "page")
+        if page is None:
+            return _not_found(page_id)
+        return 200, page, {}
+
+    def _create_database(self, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        parent = body.get("parent", {})
+        container = self._lookup(parent.get("page_id", ""), "page")
+        if container is None:
+            return _error(404, "object_not_found", "Could not find parent page.")
+        database_id = self._new_id()
+        database = {
+            "object": "database",
+            "id": database_id,
+            "parent": {"type": "page_id", "page_id": container["id"]},
+            "title": [_with_plain_text(part) for part in body.get("title", [])],
+            "properties": body.get("properties", {}),
+            "url": _page_url(database_id),
+            "created_time": _notion_time(),
+            "last_edited_time": _notion_time(),
+            "archived": False,
+        }
+        self.objects[database_id] = database
+        # A database also shows up as a child_database block of its page
+        block = {
+            "object": "block", "id": database_id, "type": "child_database",
+            "parent": {"type": "page_id", "page_id": container["id"]},
+            "child_database": {"title": "".join(p.get("plain_text", "") for p in database["title"])},
+        }
+        self.children.setdefault(container["id"], []).append(database_id)
+        self._database_blocks[database_id] = block
+        self._touch(container["id"])
+        return 200, database, {}
+
+    def _query_database(self, database_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        database = self._lookup(database_id, "database")
+        if database is None:
+            return _not_found(database_id)
+        rows = [self.objects[row_id] for row_id in self.children.get(database["id"], [])
+                if not self.objects[row_id].get("archived")]
+        return _paginate(rows, body.get("start_cursor"), body.get("page_size"))
+
+    def _visible_children(self, parent_id: str) -> List[Dict[str, Any]]:
+        visible = []
+        for child_id in self.children.get(parent_id, []):
+            child = self._database_blocks.get(child_id) or self.objects[child_id]
+            if child["object"] == "page":
+                child = {"object": "block", "id": child_id, "type": "child_page",
+                         "parent": {"type": "page_id", "page_id": parent_id},
+                         "child_page": {"title": _page_title(child)}, "archived": child.get("archived", False)}
+            if not child.get("archived"):
+                visible.append(child)
+        return visible
+
+    def _list_children(self, block_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        parent = self._lookup(block_id)
+        if parent is None or parent["object"] == "database":
+            return _not_found(block_id)
+        return _paginate(self._visible_children(parent["id"]), params.get("start_cursor"), params.get("page_size"))
+
+    def _append_children(self, block_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        parent = self._lookup(block_id)
+        if parent is None or parent["object"] == "database":
+            return _not_found(block_id)
+        children = body.get("children", [])
+        invalid = _check_children(children)
+        if invalid is not None:
+            return invalid
+        after = body.get("after")
+        if after and _dashed(after) not in self.children.get(parent["id"], []):
+            return _error(400, "validation_error", f"body.after should be a child of {block_id}.")
+        created = self._add_children(parent["id"], children, _dashed(after) if after else None)
+        return 200, {"object": "list", "results": created, "next_cursor": None, "has_more": False}, {}
+
+    def _get_block(self, block_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        block = self._lookup(block_id, "block")
+        if block is None:
+            return _not_found(block_id)
+        return 200, block, {}
+
+    def _update_block(self, block_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        block = self._lookup(block_id, "block")
+        if block is None or block.get("archived"):
+            return _not_found(block_id)
+        if "archived" in body:
+            block["archived"] = bool(body["archived"])
+        content = body.get(block["type"])
+        if content is not None:
+            merged = dict(block[block["type"]])
+            merged.update(content)
+            if "rich_text" in merged:
+                merged["rich_text"] = [_with_plain_text(part) for part in merged["rich_text"]]
+            block[block["type"]] = merged
+        block["last_edited_time"] = _notion_time()
+        self._touch(block["parent"].get("block_id"))
+        return 200, block, {}
+
+    def _delete_block(self, block_id: str, body: Dict[str, Any], params: Dict[str, Any]) -> EmulatorResponse:
+        # Like Notion, DELETE /blocks/{id} also archives pages and databases
+        block = self._lookup(block_id)
+        if block is None or block.get("archived"):
+            return _not_found(block_id)
+        block["archived"] = True
+        block["last_edited_time"] = _notion_time()
+        if block["id"] in self._database_blocks:
+            self._database_blocks[block["id"]]["archived"] = True
+        parent = block["parent"]
+        self._touch(parent.get("block_id") or parent.get("page_id"))
+        return 200, block, {}
+
+
+def _paginate(items: List[Dict[str, Any]], cursor: Optional[str], page_size: Any) -> EmulatorResponse:
+    """Notion-style cursor pagination (at most 100 results per page; the cursor is the next item's ID)"""
+    size = max(1, min(int(page_size or MAX_PAGE_SIZE), MAX_PAGE_SIZE))
+    start = 0
+    if cursor:
+        positions = {item["id"]: index for index, item in enumerate(items)}
+        if cursor not in positions:
+            return _error(400, "validation_error", "start_cursor is invalid.")
+        start = positions[cursor]
+    page = items[start:start + size]
+    has_more = start + size < len(items)
+    return 200, {
+        "object": "list",
+        "results": page,
+        "next_cursor": items[start + size]["id"] if has_more else None,
+        "has_more": has_more,
+        "type": "block",
+    }, {}
+
+
+def _rich_text(content: str) -> Dict[str, Any]:
+    return {"type": "text", "text": {"content": content}, "plain_text": content}
+
+
+def _with_plain_text(part: Dict[str, Any]) -> Dict[str, Any]:
+    part = dict(part)
+    part.setdefault("type", "text")
+    part.setdefault("plain_text", part.get("text", {}).get("content", ""))
+    return part
+
+
+def _page_title(page: Dict[str, Any]) -> str:
+    for prop in page.get("properties", {}).values():
+        if isinstance(prop, dict) and "title" in prop:
+            return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in prop["title"])
+    return ""
+
+
+def _page_url(object_id: str) -> str:
+    return f"https://www.notion.so/{object_id.replace('-', '')}"
+
+
+def _dashed(object_id: str) -> str:
+    clean = object_id.replace("-", "")
+    if len(clean) != 32:
+        return object_id
+    return f"{clean[:8]}-{clean[8:12]}-{clean[12:16]}-{clean[16:20]}-{clean[20:]}"
+
+
+def _notion_time() -> str:
+    """Notion reports edit times rounded to the minute"""
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _error(status: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> EmulatorResponse:
+    return status, {"object": "error", "status": status, "code": code, "message": message}, headers or {}
+
+
+def _not_found(object_id: str) -> EmulatorResponse:
+    return _error(404, "object_not_found", f"Could not find block with ID: {object_id}.")
+
+
+def _check_children(children: List[Dict[str, Any]]) -> Optional[EmulatorResponse]:
+    """
+    Notion's validation of appended blocks: at most 100, with at most 100
+    rich_text segments of 2000 characters each
+    """
+    if len(children) > MAX_CHILDREN:
+        return _error(400, "validation_error",
+                      f"body.children.length should be ≤ `{MAX_CHILDREN}`, instead was `{len(children)}`.")
+    for index, block in enumerate(children):
+        block_type = block.get("type", "")
+        parts = block.get(block_type, {}).get("rich_text", [])
+        if len(parts) > MAX_TEXT_SEGMENTS:
+            return _error(400, "validation_error",
+                          f"body.children[{index}].{block_type}.rich_text.length should be ≤ "
+                          f"`{MAX_TEXT_SEGMENTS}`, instead was `{len(parts)}`.")
+        for part_index, part in enumerate(parts):
+            # Notion counts UTF-16 code units, like JavaScript's String.length
+            length = len(part.get("text", {}).get("content", "").encode("utf-16-le")) // 2
+            if length > MAX_TEXT_LENGTH:
+                return _error(400, "validation_error",
+                              f"body.children[{index}].{block_type}.rich_text[{part_index}].text.content.length "
+                              f"should be ≤ `{MAX_TEXT_LENGTH}`, instead was `{length}`.")
+    return None
@@ -0,0 +1,171 @@
+"""
+Local index of Notion projects, databases and tasks
+Embedded SQLite store answering task lookups without paging through Notion
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from notion_mcp.blocks import block_plain_text, is_done_status, parse_task_label
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    title TEXT COLLATE NOCASE,
+    url TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS databases (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    title TEXT COLLATE NOCASE,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    title TEXT COLLATE NOCASE,
+    assignee TEXT COLLATE NOCASE,
+    priority TEXT COLLATE NOCASE,
+    status TEXT COLLATE NOCASE,
+    due_date TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_databases_project ON databases (project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks (project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks (project_id, title);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks (assignee, project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, project_id);
+"""
+
+TASK_FILTERS = {
+    "project_id": "project_id = ?",
+    "title": "title = ?",
+    "assignee": "assignee = ?",
+    "priority": "priority = ?",
+    "status": "status = ?",
+}
+
+
+class LocalIndex:
+    """
+    SQLite index of everything the server creates or reads
+
+    Rows are keyed by Notion ID with secondary indexes on project, title,
+    assignee, priority and status. Queries are local and synchronous; they
+    take microseconds, so they run directly on the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Opens (or creates) the index database"""
+        self.path = path or os.getenv("NOTION_INDEX_PATH", ":memory:")
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def upsert_project(self, project_id: str, title: str, url: Optional[str] = None):
+        self._db.execute(
+            "INSERT INTO projects (id, title, url, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, "
+            "url = COALESCE(excluded.url, projects.url), updated_at = excluded.updated_at",
+            (project_id, title, url, _now()),
+        )
+
+    def upsert_database(self, database_id: str, project_id: str, title: str):
+        self._db.execute(
+            "INSERT INTO databases (id, project_id, title, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET project_id = excluded.project_id, "
+            "title = excluded.title, updated_at = excluded.updated_at",
+            (database_id, project_id, title, _now()),
+        )
+
+    def upsert_task(self, task_id: str, project_id: str, title: str,
+                    assignee: Optional[str] = None, priority: Optional[str] = None,
+                    status: Optional[str] = None, due_date: Optional[str] = None):
+        self._db.execute(
+            "INSERT INTO tasks (id, project_id, title, assignee, priority, status, due_date, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET project_id = excluded.project_id, title = excluded.title, "
+            "assignee = excluded.assignee, priority = excluded.priority, status = excluded.status, "
+            "due_date = excluded.due_date, updated_at = excluded.updated_at",
+            (task_id, project_id, title, assignee, priority, status, due_date, _now()),
+        )
+
+    def index_task_block(self, project_id: str, block: Dict[str, Any], status: Optional[str] = None):
+        """
+        Indexes a to_do block written with task_label()
+        An explicit status (e.g. the newStatus of an update) wins over the checkbox
+        """
+        if block.get("type") != "to_do":
+            return
+        fields = parse_task_label(block_plain_text(block))
+        checked = block["to_do"].get("checked", False)
+        if status is None:
+            previous = self.get_task(block["id"])
+            keep = previous and previous["status"] and is_done_status(previous["status"]) == checked
+            status = previous["status"] if keep else ("done" if checked else "todo")
+        self.upsert_task(block["id"], project_id, fields["task"], fields.get("assignedTo"),
+                         fields.get("priority"), status, fields.get("dueDate"))
+
+    def index_page_children(self, project_id: str, blocks: List[Dict[str, Any]]):
+        """Indexes every task block of a page (one transaction)"""
+        self._db.execute("BEGIN")
+        try:
+            for block in blocks:
+                self.index_task_block(project_id, block)
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def delete_task(self, task_id: str):
+        self._db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def forget(self, object_ids: List[str]):
+        """Drops projects, databases and tasks that no longer exist in Notion, with their tasks"""
+        self._db.execute("BEGIN")
+        try:
+            for object_id in object_ids:
+                for table in ("projects", "databases", "tasks"):
+                    self._db.execute(f"DELETE FROM {table} WHERE id = ?", (object_id,))
+                self._db.execute("DELETE FROM tasks WHERE project_id = ?", (object_id,))
+                self._db.execute("DELETE FROM databases WHERE project_id = ?", (object_id,))
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_tasks(self, limit: int = 100, **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Tasks matching every given filter (project_id, title, assignee, priority, status)
+        Text comparisons are case-insensitive
+        """
+        clauses, values = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in TASK_FILTERS:
+                raise ValueError(f"Unknown task filter '{name}'")
+            clauses.append(TASK_FILTERS[name])
+            values.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.execute(f"SELECT * FROM tasks{where} ORDER BY updated_at LIMIT ?", (*values, limit))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self._db.close()
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
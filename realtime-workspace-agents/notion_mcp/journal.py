@@ -0,0 +1,203 @@
+"""
+Mutation journal
+Append-only local log of the write tool calls, made durable before they run
+and marked done once Notion has confirmed them, so a crash loses nothing
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+
+class JournalEntry:
+    """One journaled tool call"""
+
+    __slots__ = ("seq", "tool", "arguments", "effects", "deferred")
+
+    def __init__(self, seq: int, tool: str, arguments: Dict[str, Any], effects: Optional[Dict[str, Any]] = None):
+        self.seq = seq
+        self.tool = tool
+        self.arguments = arguments
+        # Notion objects already created for this call (e.g. the project page), used by replays
+        self.effects: Dict[str, Any] = effects or {}
+        # Completion handed over to someone else (e.g. the write-behind flush)
+        self.deferred = False
+
+
+# Journal entry of the tool call running in the current task
+current_entry: contextvars.ContextVar[Optional[JournalEntry]] = contextvars.ContextVar(
+    "notion_journal_entry", default=None
+)
+
+
+class MutationJournal:
+    """
+    JSON-lines journal with group commit
+
+    record() appends an intent and returns once it is fsynced. Records that
+    arrive while a commit is in progress are written and fsynced together by
+    the next one, so concurrent calls share the cost of an fsync.
+    complete() and note() are appended with the next commit. Entries still
+    pending when the file is opened are the calls a previous process did not
+    finish; they are replayed on startup. Once the file grows past
+    compact_bytes it is rewritten with the pending entries only.
+    """
+
+    def __init__(self, path: str, commit_delay: Optional[float] = None, compact_bytes: Optional[int] = None):
+        """Loads the journal (creating it if needed); nothing is written yet"""
+        self.path = path
+        self.commit_delay = commit_delay if commit_delay is not None else \
+            float(os.getenv("NOTION_JOURNAL_COMMIT_DELAY", "0"))
+        self.compact_bytes = compact_bytes or int(os.getenv("NOTION_JOURNAL_COMPACT_BYTES", str(1024 * 1024)))
+        self._entries: Dict[int, JournalEntry] = {}
+        self._next_seq = 1
+        self._load()
+        self._file = open(self.path, "ab")
+        self._bytes = self._file.tell()
+        self._buffer: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._committer: Optional[asyncio.Task] = None
+        # Appends and compactions never touch the file at the same time
+        self._io = asyncio.Lock()
+        self.commits = 0
+        self.records = 0
+        self.compactions = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn last line of a crashed write: its call never started
+                    continue
+                seq = record["seq"]
+                self._next_seq = max(self._next_seq, seq + 1)
+                if record["type"] == "intent":
+                    # A compaction may rewrite an intent that is also appended after it
+                    self._entries.setdefault(seq, JournalEntry(seq, record["tool"], record["arguments"]))
+                elif record["type"] == "effect" and seq in self._entries:
+                    self._entries[seq].effects.update(record["data"])
+                elif record["type"] == "done":
+                    self._entries.pop(seq, None)
+
+    def pending(self) -> List[JournalEntry]:
+        """Entries not marked done, oldest first"""
+        return [self._entries[seq] for seq in sorted(self._entries)]
+
+    async def record(self, tool: str, arguments: Dict[str, Any]) -> JournalEntry:
+        """Journals a tool call and waits until the intent is on disk"""
+        entry = JournalEntry(self._next_seq, tool, arguments)
+        self._next_seq += 1
+        self._entries[entry.seq] = entry
+        await self._append({"seq": entry.seq, "type": "intent", "tool": tool,
+                            "arguments": arguments, "at": time.time()}, durable=True)
+        return entry
+
+    async def note(self, entry: JournalEntry, **effects: Any):
+        """Durably records Notion objects created on behalf of an entry"""
+        entry.effects.update(effects)
+        await self._append({"seq": entry.seq, "type": "effect", "data": effects}, durable=True)
+
+    def complete(self, entry: JournalEntry, outcome: str = "ok"):
+        """Marks an entry done (Notion confirmed it, or its caller was told it failed)"""
+        if self._entries.pop(entry.seq, None) is not None:
+            self._enqueue({"seq": entry.seq, "type": "done", "outcome": outcome})
+
+    async def _append(self, record: Dict[str, Any], durable: bool):
+        waiter = self._enqueue(record, durable)
+        if waiter is not None:
+            await waiter
+
+    def _enqueue(self, record: Dict[str, Any], durable: bool = False) -> Optional[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n")
+        self.records += 1
+        waiter = loop.create_future() if durable else None
+        if waiter is not None:
+            self._waiters.append(waiter)
+        if self._committer is None or self._committer.done():
+            self._committer = loop.create_task(self._commit_loop())
+        return waiter
+
+    async def _commit_loop(self):
+        """Writes and fsyncs everything buffered, one batch per fsync"""
+        while self._buffer:
+            if self.commit_delay:
+                await asyncio.sleep(self.commit_delay)
+            lines, waiters = self._buffer, self._waiters
+            self._buffer, self._waiters = [], []
+            try:
+                async with self._io:
+                    await asyncio.to_thread(self._write, lines)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+            self.commits += 1
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            if not self._buffer and self._bytes > self.compact_bytes:
+                await self.compact()
+
+    def _write(self, lines: List[bytes]):
+        data = b"".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._bytes += len(data)
+
+    async def compact(self):
+        """Rewrites the journal with the pending entries only (atomic rename)"""
+        async with self._io:
+            # Snapshot under the lock: everything already on disk is reflected in memory, and
+            # records still buffered are appended to the new file (re-reading them is harmless)
+            lines = []
+            for entry in self.pending():
+                lines.append({"seq": entry.seq, "type": "intent", "tool": entry.tool, "arguments": entry.arguments})
+                if entry.effects:
+                    lines.append({"seq": entry.seq, "type": "effect", "data": entry.effects})
+            data = b"".join(json.dumps(line, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+                            for line in lines)
+            await asyncio.to_thread(self._rewrite, data)
+        self.compactions += 1
+
+    def _rewrite(self, data: bytes):
+        temporary = f"{self.path}.compact"
+        with open(temporary, "wb") as compacted:
+            compacted.write(data)
+            compacted.flush()
+            os.fsync(compacted.fileno())
+        os.replace(temporary, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file.close()
+        self._file = open(self.path, "ab")
+        self._bytes = len(data)
+
+    async def aclose(self):
+        """Commits what is buffered and closes the file"""
+        if self._committer is not None:
+            await self._committer
+        if self._buffer:
+            await self._commit_loop()
+        self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._entries),
+            "records": self.records,
+            "commits": self.commits,
+            "compactions": self.compactions,
+            "bytes": self._bytes,
+        }
@@ -0,0 +1,359 @@
+"""
+Tool-call metrics and tracing
+Per-tool latency histograms, error kinds, Notion requests/retries per call,
+rate-limiter waits and in-flight gauges, rendered in the Prometheus text format
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from notion_mcp.client import NotionAPIError
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Path segments naming a Notion endpoint; any other segment is an object ID
+_COLLECTIONS = frozenset({"pages", "blocks", "databases", "users", "comments"})
+_ENDPOINT_SEGMENTS = _COLLECTIONS | {"children", "query", "properties", "search", "me"}
+
+Labels = Tuple[Tuple[str, str], ...]
+# A gauge callback yields (labels, value) pairs read at scrape time
+GaugeReader = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+class CallStats:
+    """Outbound work attributed to one tool call"""
+
+    __slots__ = ("requests", "retries", "wait_seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+
+# Stats of the tool call running in the current task (inherited by gathered sub-tasks)
+current_call: contextvars.ContextVar[Optional[CallStats]] = contextvars.ContextVar(
+    "notion_call_stats", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _NullScope:
+    """Stand-in scope used when metrics are disabled"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _CallScope:
+    """Measures one tool call (latency, outcome, outbound work)"""
+
+    __slots__ = ("metrics", "tool", "stats", "token", "started", "span")
+
+    def __init__(self, metrics: "ServerMetrics", tool: str):
+        self.metrics = metrics
+        self.tool = tool
+
+    def __enter__(self) -> CallStats:
+        self.stats = CallStats()
+        self.token = current_call.set(self.stats)
+        self.metrics._inflight[self.tool] = self.metrics._inflight.get(self.tool, 0) + 1
+        self.span = self.metrics._start_span(f"mcp.tool {self.tool}", {"mcp.tool": self.tool})
+        self.started = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter() - self.started
+        metrics = self.metrics
+        current_call.reset(self.token)
+        metrics._inflight[self.tool] -= 1
+
+        labels = (("tool", self.tool),)
+        outcome = "success" if exc is None else "error"
+        metrics._inc("notion_mcp_tool_calls_total", labels + (("outcome", outcome),))
+        if exc is not None:
+            metrics._inc("notion_mcp_tool_errors_total", labels + (("kind", error_kind(exc)),))
+        metrics._observe("notion_mcp_tool_duration_seconds", labels, elapsed, LATENCY_BUCKETS)
+        metrics._observe("notion_mcp_notion_requests_per_call", labels, self.stats.requests, COUNT_BUCKETS)
+        metrics._observe("notion_mcp_rate_limit_wait_per_call_seconds", labels,
+                         self.stats.wait_seconds, LATENCY_BUCKETS)
+        if self.stats.retries:
+            metrics._inc("notion_mcp_notion_retries_total", labels, self.stats.retries)
+        if self.span is not None:
+            span, activation = self.span
+            span.set_attribute("notion.requests", self.stats.requests)
+            span.set_attribute("notion.retries", self.stats.retries)
+            activation.__exit__(exc_type, exc, traceback)
+        return False
+
+
+def route_template(path: str) -> str:
+    """
+    Route label of a request path: the segment after a collection (/pages,
+    /blocks, ...) and every segment that is not an endpoint name become {id},
+    so callers' IDs, whatever their shape, never reach a label
+    """
+    template = []
+    previous = ""
+    for segment in path.split("?", 1)[0].strip("/").split("/"):
+        if previous in _COLLECTIONS or segment not in _ENDPOINT_SEGMENTS:
+            segment = "{id}"
+        template.append(segment)
+        previous = segment
+    return "/" + "/".join(template)
+
+
+class _RequestScope:
+    """Measures one outbound Notion request"""
+
+    __slots__ = ("metrics", "method", "route", "started", "span", "status")
+
+    def __init__(self, metrics: "ServerMetrics", method: str, path: str):
+        self.metrics = metrics
+        self.method = method
+        self.route = route_template(path)
+        self.status = "2xx"
+
+    def __enter__(self) -> "_RequestScope":
+        self.span = self.metrics._start_span(f"notion {self.method} {self.route}", {
+            "http.method": self.method,
+            "http.route": self.route,
+        })
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter() - self.started
+        if isinstance(exc, NotionAPIError):
+            self.status = str(exc.status_code)
+        elif exc is not None:
+            self.status = error_kind(exc)
+        labels = (("method", self.method), ("route", self.route))
+        self.metrics._inc("notion_mcp_notion_requests_total", labels + (("status", self.status),))
+        self.metrics._observe("notion_mcp_notion_request_duration_seconds", labels, elapsed, LATENCY_BUCKETS)
+        stats = current_call.get()
+        if stats is not None:
+            stats.requests += 1
+        if self.span is not None:
+            span, activation = self.span
+            span.set_attribute("http.status_code", self.status)
+            activation.__exit__(exc_type, exc, traceback)
+        return False
+
+
+class ServerMetrics:
+    """
+    In-process metrics registry of the MCP server
+
+    Enabled by default (NOTION_METRICS=0 turns it off: scopes become a shared
+    no-op object and the Notion client is built without instrumentation).
+    NOTION_OTEL=1 additionally emits OpenTelemetry spans around every tool
+    call and outbound request, if opentelemetry-api is installed.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, tracing: Optional[bool] = None):
+        """Initialize empty series"""
+        self.enabled = enabled if enabled is not None else _env_flag("NOTION_METRICS", True)
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._inflight: Dict[str, int] = {}
+        self._gauges: List[Tuple[str, str, str, GaugeReader]] = []
+        self._tracer = None
+        if self.enabled and (tracing if tracing is not None else _env_flag("NOTION_OTEL", False)):
+            self._tracer = _load_tracer()
+
+    def track_call(self, tool: str):
+        """Context manager around a tool call"""
+        return _CallScope(self, tool) if self.enabled else _NULL_SCOPE
+
+    def track_request(self, method: str, path: str):
+        """Context manager around one outbound Notion request"""
+        return _RequestScope(self, method, path) if self.enabled else _NULL_SCOPE
+
+    def record_wait(self, seconds: float):
+        """Time a request spent queued in the rate limiter"""
+        if not self.enabled:
+            return
+        self._observe("notion_mcp_rate_limit_wait_seconds", (), seconds, LATENCY_BUCKETS)
+        stats = current_call.get()
+        if stats is not None:
+            stats.wait_seconds += seconds
+
+    def record_retry(self, reason: str):
+        """A request about to be retried (reason: HTTP status or transport error kind)"""
+        if not self.enabled:
+            return
+        self._inc("notion_mcp_notion_request_retries_total", (("reason", reason),))
+        stats = current_call.get()
+        if stats is not None:
+            stats.retries += 1
+
+    def add_gauge(self, name: str, help_text: str, read: GaugeReader, kind: str = "gauge"):
+        """
+        Registers series read from another component when the snapshot is
+        rendered (kind="counter" for totals that component already keeps)
+        """
+        self._gauges.append((name, kind, help_text, read))
+
+    def render_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        for name, series in sorted(self._counters.items()):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        lines.append(f"# HELP notion_mcp_tool_inflight {_HELP['notion_mcp_tool_inflight']}")
+        lines.append("# TYPE notion_mcp_tool_inflight gauge")
+        for tool, value in sorted(self._inflight.items()):
+            lines.append(f"notion_mcp_tool_inflight{_format_labels((('tool', tool),))} {value}")
+
+        for name, kind, help_text, read in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in read():
+                lines.append(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}")
+
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _inc(self, name: str, labels: Labels, amount: float = 1):
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + amount
+
+    def _observe(self, name: str, labels: Labels, value: float, buckets: Tuple[float, ...]):
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(buckets)
+        histogram.observe(value)
+
+    def _start_span(self, name: str, attributes: Dict[str, Any]):
+        """
+        Starts a span and makes it current (so request spans nest under the
+        tool call span); returns (span, activation) or None without a tracer
+        """
+        if self._tracer is None:
+            return None
+        from opentelemetry import trace
+
+        span = self._tracer.start_span(name, attributes=attributes)
+        activation = trace.use_span(span, end_on_exit=True)
+        activation.__enter__()
+        return span, activation
+
+
+def error_kind(error: BaseException) -> str:
+    """
+    Short classification of a failure, looking through wrapping exceptions
+    (tool handlers re-raise Notion and transport errors as MCP errors)
+    """
+    chain = []
+    seen: Optional[BaseException] = error
+    while seen is not None and seen not in chain:
+        chain.append(seen)
+        seen = seen.__cause__ or seen.__context__
+    for cause in chain:
+        if isinstance(cause, NotionAPIError):
+            return f"notion_{cause.status_code}"
+        if isinstance(cause, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(cause, httpx.TransportError):
+            return "transport"
+        if isinstance(cause, asyncio.TimeoutError):
+            return "timeout"
+    root = chain[-1]
+    if isinstance(root, (KeyError, ValueError)):
+        return "invalid_arguments"
+    if isinstance(root, asyncio.CancelledError):
+        return "cancelled"
+    return type(root).__name__
+
+
+_HELP = {
+    "notion_mcp_tool_calls_total": "Tool calls by outcome",
+    "notion_mcp_tool_errors_total": "Failed tool calls by error kind",
+    "notion_mcp_tool_inflight": "Tool calls currently executing",
+    "notion_mcp_tool_duration_seconds": "Tool call latency",
+    "notion_mcp_notion_requests_total": "Outbound Notion requests by route and status",
+    "notion_mcp_notion_request_duration_seconds": "Outbound Notion request latency (one attempt)",
+    "notion_mcp_notion_requests_per_call": "Notion requests sent by one tool call",
+    "notion_mcp_notion_retries_total": "Notion request retries attributed to tool calls",
+    "notion_mcp_notion_request_retries_total": "Notion request retries by reason",
+    "notion_mcp_rate_limit_wait_seconds": "Time a request waited for a rate-limit token",
+    "notion_mcp_rate_limit_wait_per_call_seconds": "Rate-limiter wait accumulated by one tool call",
+}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _load_tracer():
+    """OpenTelemetry tracer, or None when opentelemetry-api is not installed"""
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("⚠️ NOTION_OTEL is set but opentelemetry-api is not installed; tracing disabled",
+              file=sys.stderr)
+        return None
+    return trace.get_tracer("notion_mcp")
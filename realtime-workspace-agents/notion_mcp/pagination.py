@@ -0,0 +1,85 @@
+"""
+Cursor pagination
+Async iterators over paginated Notion endpoints (block children) that hold
+at most two pages in memory and fetch the next page while the current one is
+being processed
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+MAX_PAGE_SIZE = 100
+
+# Block types whose children belong to another page or database, never descended into
+OPAQUE_BLOCK_TYPES = frozenset({"child_page", "child_database"})
+
+FetchPage = Callable[[Optional[str]], Awaitable[Dict[str, Any]]]
+
+
+async def paginate(fetch: FetchPage, prefetch: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields the responses of a paginated endpoint, following next_cursor
+
+    fetch(cursor) returns one response (cursor is None for the first page).
+    With prefetch, the request for the next page is in flight while the
+    caller handles the current one. Stopping early (break, or aclose() on
+    the iterator) cancels that request.
+    """
+    pending: Optional[Awaitable[Dict[str, Any]]] = fetch(None)
+    try:
+        while pending is not None:
+            response = await pending
+            pending = None
+            if response.get("has_more") and response.get("next_cursor"):
+                following = fetch(response["next_cursor"])
+                # The task copies the caller's context: priority and metrics scope carry over
+                pending = asyncio.ensure_future(following) if prefetch else following
+            yield response
+    finally:
+        _discard(pending)
+
+
+def _discard(pending: Optional[Awaitable[Any]]):
+    """Cancels a prefetch nobody will read (or closes the unstarted coroutine)"""
+    if pending is None:
+        return
+    if isinstance(pending, asyncio.Future):
+        if not pending.cancel() and not pending.cancelled():
+            # Already finished: retrieve the exception so it is not reported as unhandled
+            pending.exception()
+    else:
+        pending.close()
+
+
+async def iter_block_children(client: Any, block_id: str, recursive: bool = False,
+                              page_size: int = MAX_PAGE_SIZE, prefetch: bool = True
+                              ) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields the children of a block in document order
+
+    With recursive, each block with children is followed by its own
+    descendants (depth first); child pages and databases are not entered.
+    Memory is bounded by two pages per level of nesting.
+    """
+    async def fetch(cursor: Optional[str]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"page_size": page_size}
+        if cursor:
+            params["start_cursor"] = cursor
+        return await client.get(f"/blocks/{block_id}/children", params=params)
+
+    pages = paginate(fetch, prefetch)
+    try:
+        async for response in pages:
+            for block in response.get("results", []):
+                yield block
+                if recursive and block.get("has_children") and block.get("type") not in OPAQUE_BLOCK_TYPES:
+                    nested = iter_block_children(client, block["id"], True, page_size, prefetch)
+                    try:
+                        async for child in nested:
+                            yield child
+                    finally:
+                        await nested.aclose()
+    finally:
+        await pages.aclose()
+
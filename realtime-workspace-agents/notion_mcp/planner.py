@@ -0,0 +1,145 @@
+"""
+Dependency-aware execution plans
+Runs a small graph of async steps with bounded concurrency and reports the critical path
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# A step receives the results of the steps it depends on, keyed by step name
+StepFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+# Called with each step's name and result as soon as it finishes
+StepCallback = Callable[[str, Any], Awaitable[None]]
+
+
+class PlanStep:
+    """One node of an execution plan"""
+
+    __slots__ = ("name", "run", "deps", "started", "finished")
+
+    def __init__(self, name: str, run: StepFunction, deps: Tuple[str, ...]):
+        self.name = name
+        self.run = run
+        self.deps = deps
+        self.started = 0.0
+        self.finished = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class PlanResult:
+    """Results and timings of an executed plan"""
+
+    def __init__(self, results: Dict[str, Any], wall_seconds: float,
+                 critical_path: List[str], critical_path_seconds: float, depth: int):
+        self.results = results
+        self.wall_seconds = wall_seconds
+        self.critical_path = critical_path
+        self.critical_path_seconds = critical_path_seconds
+        self.depth = depth
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "steps": len(self.results),
+            "depth": self.depth,
+            "wallSeconds": round(self.wall_seconds, 3),
+            "criticalPathSeconds": round(self.critical_path_seconds, 3),
+            "criticalPath": self.critical_path,
+        }
+
+
+class ExecutionPlan:
+    """
+    Small DAG of async steps
+
+    A step starts as soon as all its dependencies have finished, so the
+    total latency follows the depth of the graph rather than the number of
+    steps. At most max_concurrency steps run at once. Steps must be added
+    after their dependencies, which keeps the graph acyclic.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        """Initialize an empty plan"""
+        self.max_concurrency = max_concurrency or int(os.getenv("NOTION_PLAN_CONCURRENCY", "4"))
+        self._steps: Dict[str, PlanStep] = {}
+
+    def add(self, name: str, run: StepFunction, deps: Tuple[str, ...] = ()) -> PlanStep:
+        """Adds a step depending on already added steps"""
+        if name in self._steps:
+            raise ValueError(f"Duplicate plan step '{name}'")
+        missing = [dep for dep in deps if dep not in self._steps]
+        if missing:
+            raise ValueError(f"Plan step '{name}' depends on unknown steps: {', '.join(missing)}")
+        step = PlanStep(name, run, tuple(deps))
+        self._steps[name] = step
+        return step
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    async def execute(self, on_step: Optional[StepCallback] = None) -> PlanResult:
+        """
+        Runs every step; the first failure cancels the steps still pending
+        on_step is awaited after each successful step (progress reporting)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+        origin = time.perf_counter()
+
+        async def run_step(step: PlanStep) -> Any:
+            inputs = {dep: await tasks[dep] for dep in step.deps}
+            async with semaphore:
+                step.started = time.perf_counter()
+                try:
+                    result = await step.run(inputs)
+                finally:
+                    step.finished = time.perf_counter()
+            if on_step is not None:
+                await on_step(step.name, result)
+            return result
+
+        for step in self._steps.values():
+            tasks[step.name] = asyncio.ensure_future(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        path, path_seconds, depth = self._critical_path()
+        return PlanResult(
+            {name: task.result() for name, task in tasks.items()},
+            time.perf_counter() - origin,
+            path,
+            path_seconds,
+            depth,
+        )
+
+    def _critical_path(self) -> Tuple[List[str], float, int]:
+        """Longest chain of measured step durations (steps are in topological order)"""
+        cost: Dict[str, float] = {}
+        levels: Dict[str, int] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for step in self._steps.values():
+            slowest = max(step.deps, key=lambda dep: cost[dep], default=None)
+            cost[step.name] = step.duration + (cost[slowest] if slowest else 0.0)
+            levels[step.name] = 1 + max((levels[dep] for dep in step.deps), default=0)
+            previous[step.name] = slowest
+
+        if not cost:
+            return [], 0.0, 0
+        node: Optional[str] = max(cost, key=cost.get)
+        total = cost[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return list(reversed(path)), total, max(levels.values())
@@ -0,0 +1,41 @@
+"""
+Tool call progress
+MCP progress notifications for long-running tool calls
+"""
+
+import sys
+from typing import Awaitable, Callable, Optional
+
+
+# (progress, total, message) -> notification sent to the client
+SendProgress = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+
+class ProgressReporter:
+    """
+    Counts completed units of work and reports each one to the client
+
+    Without a send function (the client did not ask for progress) advance()
+    only counts. A failed notification (e.g. the client went away) disables
+    reporting instead of failing the tool call.
+    """
+
+    def __init__(self, send: Optional[SendProgress], total: Optional[float] = None):
+        self.send = send
+        self.total = total
+        self.progress = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.send is not None
+
+    async def advance(self, message: Optional[str] = None, units: float = 1):
+        """Marks `units` more work as done"""
+        self.progress += units
+        if self.send is None:
+            return
+        try:
+            await self.send(self.progress, self.total, message)
+        except Exception as e:
+            print(f"⚠️ Progress notifications disabled: {e}", file=sys.stderr)
+            self.send = None
@@ -0,0 +1,229 @@
+"""
+Notion rate-limit scheduler
+Token bucket with priority lanes, Retry-After handling and jittered retries
+"""
+
+import asyncio
+import contextvars
+import os
+import random
+import sys
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+
+from notion_mcp.client import NotionAPIError
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+
+# Failures after which a request is known not to have been processed: the
+# only ones a non-idempotent request (e.g. a page creation) is retried for
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class Priority(IntEnum):
+    """Scheduler lanes, lowest value is served first"""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+# Priority of the tool call running in the current task (inherited by gathered sub-tasks)
+current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "notion_priority", default=Priority.NORMAL
+)
+
+
+class RateLimitScheduler:
+    """
+    Gate every outbound Notion request goes through
+
+    Tokens refill at `rate` per second up to `burst`. Waiting requests are
+    granted tokens lane by lane, so interactive calls overtake queued
+    background work. A 429 pauses the whole bucket for its Retry-After delay;
+    429/5xx/transport errors are retried with full-jitter exponential backoff.
+    A non-idempotent request is only retried when it never reached Notion
+    (429, connection errors), since any other failure may follow a write.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_retries: Optional[int] = None, base_backoff: float = 0.5,
+                 max_backoff: float = 30.0, slow_wait_log: float = 1.0,
+                 metrics: Optional[Any] = None):
+        """Initialize the bucket (full) and the empty lanes"""
+        self.rate = rate or float(os.getenv("NOTION_RATE_LIMIT", "3"))
+        self.burst = burst or int(os.getenv("NOTION_RATE_BURST", "3"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("NOTION_MAX_RETRIES", "5"))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.slow_wait_log = slow_wait_log
+        self.metrics = metrics
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lanes: Dict[Priority, Deque[asyncio.Future]] = {p: deque() for p in Priority}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # Counters reported by stats()
+        self._granted = 0
+        self._retries = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, send: Callable[[], Awaitable[T]], priority: Optional[Priority] = None,
+                     idempotent: bool = True) -> T:
+        """
+        Runs send() once a token is granted, retrying transient failures
+        (only those that leave Notion untouched when send() is not idempotent)
+        """
+        priority = current_priority.get() if priority is None else priority
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            try:
+                return await send()
+            except (NotionAPIError, httpx.TransportError) as e:
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._retries += 1
+                if self.metrics is not None:
+                    self.metrics.record_retry(
+                        str(e.status_code) if isinstance(e, NotionAPIError) else type(e).__name__
+                    )
+                await asyncio.sleep(delay)
+
+    async def acquire(self, priority: Priority = Priority.NORMAL):
+        """Waits in the given lane until a token is available"""
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        enqueued = time.monotonic()
+        future = loop.create_future()
+        self._lanes[priority].append(future)
+        self._wakeup.set()
+        await future
+
+        waited = time.monotonic() - enqueued
+        self._granted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        if self.metrics is not None:
+            self.metrics.record_wait(waited)
+        if waited >= self.slow_wait_log:
+            depth = ", ".join(f"{p.name.lower()}={n}" for p, n in self.queue_depth().items())
+            print(f"⏳ Notion rate limiter: waited {waited:.2f}s ({depth})", file=sys.stderr)
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool = True) -> Optional[float]:
+        """
+        Delay before retrying, or None when the error is not transient
+        (or might have followed a write that must not be sent twice)
+        """
+        backoff = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        if isinstance(error, httpx.TransportError):
+            return backoff if idempotent or isinstance(error, UNSENT_ERRORS) else None
+        if error.status_code not in RETRYABLE_STATUS or (not idempotent and error.status_code != 429):
+            return None
+        if error.status_code == 429:
+            self._throttled += 1
+            retry_after = _parse_retry_after(error.headers)
+            if retry_after is not None:
+                # Everyone waits, not just this request: the budget is per integration
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                self._tokens = 0.0
+                return retry_after + random.uniform(0, self.base_backoff)
+        return backoff
+
+    async def _dispatch(self):
+        """Grants tokens to waiting futures, highest priority lane first"""
+        while True:
+            future = self._next_waiter()
+            if future is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill(now)
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            self._tokens -= 1
+            self._lanes_pop(future)
+            future.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Head of the highest priority non-empty lane, skipping cancelled waiters"""
+        for lane in self._lanes.values():
+            while lane and lane[0].done():
+                lane.popleft()
+            if lane:
+                return lane[0]
+        return None
+
+    def _lanes_pop(self, future: asyncio.Future):
+        for lane in self._lanes.values():
+            if lane and lane[0] is future:
+                lane.popleft()
+                return
+
+    def _refill(self, now: float):
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def queue_depth(self) -> Dict[Priority, int]:
+        """Number of waiting requests per lane"""
+        return {p: sum(1 for f in lane if not f.done()) for p, lane in self._lanes.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot used to tune rate, burst and lane assignment"""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queueDepth": {p.name.lower(): n for p, n in self.queue_depth().items()},
+            "granted": self._granted,
+            "retries": self._retries,
+            "throttled": self._throttled,
+            "avgWaitSeconds": round(self._wait_total / self._granted, 4) if self._granted else 0.0,
+            "maxWaitSeconds": round(self._wait_max, 4),
+        }
+
+    async def aclose(self):
+        """Stops the dispatcher task"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+
+def _parse_retry_after(headers: Dict[str, str]) -> Optional[float]:
+    """Reads Retry-After (seconds) from response headers"""
+    for key, value in headers.items():
+        if key.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
@@ -0,0 +1,97 @@
+"""
+Startup timing
+Phase marks and an optional per-package import-time breakdown, printed with --startup-report
+"""
+
+import builtins
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since the process was created (Linux only), so interpreter boot is counted"""
+    try:
+        with open("/proc/self/stat") as stat:
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            system_uptime = float(uptime.read().split()[0])
+        return system_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    Wall-clock marks from process start to "ready to serve"
+
+    When enabled, top-level imports are also timed per root package
+    (inclusive of everything they pull in), which is the breakdown that
+    matters for cold starts. Disabled, mark() only appends a timestamp.
+    """
+
+    def __init__(self, enabled: bool):
+        """Starts the clock (call before the heavy imports)"""
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.boot = _process_age() if enabled else None
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: Dict[str, float] = {}
+        self._original_import = None
+        if enabled:
+            self._install_import_hook()
+
+    def mark(self, phase: str):
+        self.marks.append((phase, time.perf_counter()))
+
+    def _install_import_hook(self):
+        original = builtins.__import__
+        depth = [0]
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or depth[0] or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            depth[0] += 1
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                depth[0] -= 1
+                root = name.partition(".")[0]
+                imports[root] = imports.get(root, 0.0) + time.perf_counter() - started
+
+        self._original_import = original
+        builtins.__import__ = timed_import
+
+    def report(self) -> Dict[str, Any]:
+        """Phase durations and slowest imports, in milliseconds"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        phases, previous = {}, self.origin
+        for phase, at in self.marks:
+            phases[phase] = round((at - previous) * 1000, 1)
+            previous = at
+        report: Dict[str, Any] = {
+            "phasesMs": phases,
+            "scriptToReadyMs": round((previous - self.origin) * 1000, 1),
+            "importsMs": {name: round(seconds * 1000, 1) for name, seconds in
+                          sorted(self.imports.items(), key=lambda item: -item[1]) if seconds >= 0.0005},
+        }
+        if self.boot is not None:
+            report["interpreterBootMs"] = round(self.boot * 1000, 1)
+            report["processToReadyMs"] = round((self.boot + previous - self.origin) * 1000, 1)
+        return report
+
+    def print_report(self):
+        """Writes the report to stderr (stdout carries the MCP stream)"""
+        print(f"⏱️ Startup report: {json.dumps(self.report())}", file=sys.stderr)
+
+
+# Created on import, as early as possible in the server module
+startup = StartupTimer(
+    "--startup-report" in sys.argv or os.getenv("MCP_STARTUP_REPORT", "").lower() in ("1", "true", "yes")
+)
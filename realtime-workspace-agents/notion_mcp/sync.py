@@ -0,0 +1,148 @@
+"""
+Incremental block sync
+Computes the smallest set of block operations (keep, update in place,
+insert after, delete) turning a page's current blocks into the desired ones
+"""
+
+import difflib
+from typing import Any, Dict, List, Optional, Tuple
+
+from notion_mcp.blocks import block_plain_text
+
+
+# Block types whose text (and checkbox) can be changed with PATCH /blocks/{id}
+UPDATABLE_BLOCK_TYPES = frozenset({
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item",
+    "numbered_list_item", "to_do", "toggle", "quote", "callout",
+})
+
+# Blocks a sync never deletes or rewrites: tasks are owned by updateNotionTasks
+PROTECTED_BLOCK_TYPES = frozenset({"to_do"})
+
+
+def block_signature(block: Dict[str, Any]) -> Tuple[Any, ...]:
+    """What the diff compares: type, visible text and, for to_dos, the checkbox"""
+    block_type = block.get("type", "")
+    signature: Tuple[Any, ...] = (block_type, block_plain_text(block))
+    if block_type == "to_do":
+        signature += (bool(block["to_do"].get("checked")),)
+    return signature
+
+
+class SyncPlan:
+    """
+    Operations that bring a run of blocks to the desired state
+
+    inserts holds (after_block_id, blocks) batches: consecutive new blocks
+    share one append. Every operation targets a block that survives the
+    sync, so they can all be sent concurrently.
+    """
+
+    def __init__(self):
+        self.kept = 0
+        self.updates: List[Tuple[str, Dict[str, Any]]] = []
+        self.inserts: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self.deletes: List[str] = []
+
+    @property
+    def inserted(self) -> int:
+        return sum(len(blocks) for _, blocks in self.inserts)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "blocksKept": self.kept,
+            "blocksUpdated": len(self.updates),
+            "blocksInserted": self.inserted,
+            "blocksDeleted": len(self.deletes),
+        }
+
+
+def diff_blocks(current: List[Dict[str, Any]], desired: List[Dict[str, Any]], anchor_id: str) -> SyncPlan:
+    """
+    Plans the sync of `current` (blocks read from Notion, in order) to
+    `desired` (blocks to write); anchor_id is the block right before the run,
+    after which new blocks go when no current block precedes them
+
+    Matching blocks are kept; a changed block of the same updatable type is
+    updated in place; anything else is deleted and re-inserted. Protected
+    blocks (to_dos) are left out of the diff and never touched.
+    """
+    current = [block for block in current if block.get("type") not in PROTECTED_BLOCK_TYPES]
+    plan = SyncPlan()
+    matcher = difflib.SequenceMatcher(
+        None, [block_signature(b) for b in current], [block_signature(b) for b in desired], autojunk=False
+    )
+    anchor = anchor_id
+    pending: List[Dict[str, Any]] = []
+
+    def survive(block_id: str):
+        nonlocal anchor
+        if pending:
+            plan.inserts.append((anchor, list(pending)))
+            pending.clear()
+        anchor = block_id
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for block in current[i1:i2]:
+                plan.kept += 1
+                survive(block["id"])
+            continue
+        old, new = current[i1:i2], desired[j1:j2]
+        for index in range(max(len(old), len(new))):
+            before = old[index] if index < len(old) else None
+            after = new[index] if index < len(new) else None
+            payload = _update_payload(before, after)
+            if payload is not None:
+                plan.updates.append((before["id"], payload))
+                survive(before["id"])
+                continue
+            if before is not None:
+                plan.deletes.append(before["id"])
+            if after is not None:
+                pending.append(after)
+
+    # New blocks at the end of the run go after the last surviving block
+    survive(anchor)
+    return plan
+
+
+def _update_payload(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """PATCH body turning `before` into `after` in place, or None when it has to be replaced"""
+    if before is None or after is None:
+        return None
+    block_type = before.get("type")
+    if block_type != after.get("type") or block_type not in UPDATABLE_BLOCK_TYPES or before.get("has_children"):
+        return None
+    content = {"rich_text": after[block_type].get("rich_text", [])}
+    if block_type == "to_do":
+        content["checked"] = bool(after["to_do"].get("checked"))
+    return {block_type: content}
+
+
+def section_bounds(blocks: List[Dict[str, Any]], heading_type: str, heading_text: str,
+                   member_types: Optional[frozenset] = None) -> Optional[Tuple[int, int]]:
+    """
+    (heading index, end index) of the last section introduced by the given
+    heading; the section runs until the next heading of the same or a
+    higher level, or the end of the page
+
+    With member_types, it also stops at the first block of another type:
+    blocks appended to the page later (e.g. new tasks) are not part of it.
+    """
+    start = None
+    for index, block in enumerate(blocks):
+        if block.get("type") == heading_type and block_plain_text(block) == heading_text:
+            start = index
+    if start is None:
+        return None
+    level = int(heading_type[-1])
+    end = start + 1
+    while end < len(blocks):
+        block_type = blocks[end].get("type", "")
+        if block_type.startswith("heading_") and int(block_type[-1]) <= level:
+            break
+        if member_types is not None and block_type not in member_types:
+            break
+        end += 1
+    return start, end
@@ -0,0 +1,151 @@
+"""
+Block templates
+Page and section layouts compiled once into block skeletons: constant blocks
+are built at compile time and shared, variable ones only get their text
+filled in per call
+"""
+
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from notion_mcp.blocks import callout_block, divider_block, rich_text, text_block, to_do_block
+
+
+class BlockSpec:
+    """
+    One block of a template
+
+    text may hold {field} placeholders. With each, the block is repeated for
+    every item of that (list) field; an item is a mapping whose keys are the
+    placeholders, or a plain value available as {item}. With when, the block
+    is only emitted if that field is set. options go to the block builder
+    (checked for to_do, emoji for callout, bold / color for text blocks).
+    """
+
+    __slots__ = ("block_type", "text", "each", "when", "options")
+
+    def __init__(self, block_type: str, text: str = "", each: Optional[str] = None,
+                 when: Optional[str] = None, **options: Any):
+        self.block_type = block_type
+        self.text = text
+        self.each = each
+        self.when = when
+        self.options = options
+
+
+# (literal, field) pairs: the text is the concatenation of each literal and field value
+TextParts = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _parse(text: str) -> TextParts:
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(text):
+        if format_spec or conversion:
+            raise ValueError(f"Template field {{{field}}} cannot have a format spec or conversion")
+        parts.append((literal, field or None))
+    return tuple(parts)
+
+
+def _builder(spec: BlockSpec) -> Callable[[str], Dict[str, Any]]:
+    """Block constructor of a spec, given its final text"""
+    block_type, options = spec.block_type, spec.options
+    if block_type == "to_do":
+        checked = bool(options.get("checked"))
+        return lambda content: to_do_block(content, checked=checked)
+    if block_type == "callout":
+        emoji = options.get("emoji", "💡")
+        return lambda content: callout_block(content, emoji)
+    if block_type == "divider":
+        return lambda content: divider_block()
+    if options:
+        return lambda content: text_block(block_type, content, **options)
+    # Same JSON as text_block(), without the keyword plumbing (the common case)
+    return lambda content: {"object": "block", "type": block_type, block_type: {"rich_text": rich_text(content)}}
+
+
+class _CompiledBlock:
+    __slots__ = ("block", "parts", "build", "each", "when")
+
+    def __init__(self, spec: BlockSpec):
+        self.parts = _parse(spec.text)
+        self.build = _builder(spec)
+        self.each = spec.each
+        self.when = spec.when
+        # No placeholder: built once, the same dict is returned by every render
+        self.block = self.build(spec.text) if spec.each is None and not self.fields() else None
+
+    def fields(self) -> List[str]:
+        return [field for _, field in self.parts if field is not None]
+
+    def text(self, values: Mapping[str, Any]) -> str:
+        parts = self.parts
+        if len(parts) == 1:
+            literal, field = parts[0]
+            return literal + str(values[field]) if field is not None else literal
+        return "".join(literal + str(values[field]) if field is not None else literal
+                       for literal, field in parts)
+
+
+class BlockTemplate:
+    """
+    A compiled list of BlockSpecs
+
+    render() sizes the output first, then fills it in one pass. Blocks
+    without placeholders are shared between renders: callers must not
+    modify the returned blocks.
+    """
+
+    def __init__(self, specs: Sequence[BlockSpec]):
+        self._blocks = [_CompiledBlock(spec) for spec in specs]
+        self.fields = frozenset(
+            field for block in self._blocks
+            for field in [*block.fields(), block.each, block.when] if field is not None
+        ) - {"item"}
+
+    def _emitted(self, block: _CompiledBlock, values: Mapping[str, Any]) -> int:
+        if block.when is not None and not values.get(block.when):
+            return 0
+        return len(values.get(block.each) or ()) if block.each is not None else 1
+
+    def size(self, values: Mapping[str, Any]) -> int:
+        """Number of blocks render(values) returns"""
+        return sum(self._emitted(block, values) for block in self._blocks)
+
+    def render(self, values: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Blocks of the template with the given field values"""
+        blocks: List[Any] = [None] * self.size(values)
+        position = 0
+        for block in self._blocks:
+            if block.when is not None and not values.get(block.when):
+                continue
+            if block.each is not None:
+                for item in values.get(block.each) or ():
+                    blocks[position] = block.build(block.text(item if isinstance(item, Mapping) else {"item": item}))
+                    position += 1
+            else:
+                blocks[position] = block.block if block.block is not None else block.build(block.text(values))
+                position += 1
+        return blocks
+
+
+class TemplateLibrary:
+    """
+    Compiled templates by kind and variant (e.g. "project" / "development")
+
+    sources maps each kind to a function returning the specs of a variant;
+    every (kind, variant) is compiled on first use and kept for the life
+    of the process.
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[str], Sequence[BlockSpec]]]):
+        self.sources = sources
+        self._compiled: Dict[Tuple[str, str], BlockTemplate] = {}
+
+    def get(self, kind: str, variant: str) -> BlockTemplate:
+        template = self._compiled.get((kind, variant))
+        if template is None:
+            template = self._compiled[(kind, variant)] = BlockTemplate(self.sources[kind](variant))
+        return template
+
+    def render(self, kind: str, variant: str, values: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        return self.get(kind, variant).render(values)
@@ -0,0 +1,154 @@
+"""
+Transports for the Notion MCP server
+stdio (one client per process) or a long-lived HTTP process shared by many clients
+"""
+
+import argparse
+import contextlib
+import inspect
+import os
+import sys
+from typing import Any, Callable, Optional
+
+
+TRANSPORTS = ("stdio", "http", "sse")
+
+
+def parse_transport_args(argv: Optional[list] = None) -> argparse.Namespace:
+    """
+    Command line options, each defaulting to its MCP_* environment variable
+    """
+    parser = argparse.ArgumentParser(description="Notion MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_TRANSPORT", "stdio"),
+                        help="stdio (default), http (streamable HTTP on /mcp) or sse (/sse + /messages/)")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8808")))
+    parser.add_argument("--max-sessions", type=int, default=int(os.getenv("MCP_MAX_SESSIONS", "32")),
+                        help="Concurrent client sessions accepted by the HTTP transports")
+    parser.add_argument("--max-inflight", type=int, default=int(os.getenv("MCP_MAX_INFLIGHT_CALLS", "16")),
+                        help="Tool calls executed at once across all sessions")
+    parser.add_argument("--max-inflight-per-tool", type=int,
+                        default=int(os.getenv("MCP_MAX_INFLIGHT_PER_TOOL", "0")) or None,
+                        help="Share of those slots one tool may take (default: half)")
+    parser.add_argument("--tool-timeout", type=float, default=float(os.getenv("MCP_TOOL_TIMEOUT", "120")),
+                        help="Deadline of each tool call in seconds, 0 for none; partial writes are rolled back")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print startup phase and import timings to stderr (or MCP_STARTUP_REPORT=1)")
+    return parser.parse_args(argv)
+
+
+async def serve_stdio(server: Any, options: Any, on_ready: Optional[Callable[[], None]] = None):
+    """Serves a single client over stdin/stdout"""
+    from mcp.server.stdio import stdio_server
+
+    async with stdio_server() as (read_stream, write_stream):
+        if on_ready is not None:
+            on_ready()
+        await server.run(read_stream, write_stream, options)
+
+
+async def serve_http(server: Any, options: Any, args: argparse.Namespace, metrics: Optional[Any] = None,
+                     on_ready: Optional[Callable[[], None]] = None):
+    """
+    Serves many clients over streamable HTTP (POST/GET/DELETE on /mcp)
+    Every session talks to the same Server, so caches and the Notion
+    rate budget are shared. GET /metrics serves the Prometheus snapshot.
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Mount
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+    if "max_sessions" in inspect.signature(StreamableHTTPSessionManager).parameters:
+        # The manager answers 503 itself while max_sessions sessions are open
+        manager = StreamableHTTPSessionManager(app=server, max_sessions=args.max_sessions)
+        sessions = None
+    else:
+        # Older SDKs have no limit: count the sessions in the manager's table, which must exist
+        manager = StreamableHTTPSessionManager(app=server)
+        sessions = getattr(manager, "_server_instances", None)
+        if not isinstance(sessions, dict):
+            raise RuntimeError("This version of the mcp package cannot limit HTTP sessions (--max-sessions): "
+                               "upgrade it")
+
+    async def handle_mcp(scope, receive, send):
+        headers = dict(scope.get("headers") or [])
+        opening = scope.get("method") == "POST" and b"mcp-session-id" not in headers
+        if opening and sessions is not None and len(sessions) >= args.max_sessions:
+            response = JSONResponse({"error": "Too many MCP sessions"}, status_code=503,
+                                    headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        await manager.handle_request(scope, receive, send)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        async with manager.run():
+            if on_ready is not None:
+                on_ready()
+            yield
+
+    app = Starlette(routes=[Mount("/mcp", app=handle_mcp), *_metrics_routes(metrics)], lifespan=lifespan)
+    await _run_uvicorn(app, args)
+
+
+async def serve_sse(server: Any, options: Any, args: argparse.Namespace, metrics: Optional[Any] = None,
+                    on_ready: Optional[Callable[[], None]] = None):
+    """
+    Serves many clients over the SSE transport (GET /sse, POST /messages/)
+    GET /metrics serves the Prometheus snapshot
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Mount, Route
+    from mcp.server.sse import SseServerTransport
+
+    transport = SseServerTransport("/messages/")
+    active = {"sessions": 0}
+
+    async def handle_sse(request):
+        if active["sessions"] >= args.max_sessions:
+            return JSONResponse({"error": "Too many MCP sessions"}, status_code=503,
+                                headers={"Retry-After": "1"})
+        active["sessions"] += 1
+        try:
+            async with transport.connect_sse(request.scope, request.receive, request._send) as streams:
+                await server.run(streams[0], streams[1], options)
+        finally:
+            active["sessions"] -= 1
+        return Response()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        if on_ready is not None:
+            on_ready()
+        yield
+
+    app = Starlette(routes=[
+        Route("/sse", endpoint=handle_sse, methods=["GET"]),
+        Mount("/messages/", app=transport.handle_post_message),
+        *_metrics_routes(metrics),
+    ], lifespan=lifespan)
+    await _run_uvicorn(app, args)
+
+
+def _metrics_routes(metrics: Optional[Any]) -> list:
+    """GET /metrics for Prometheus scrapers, when metrics are enabled"""
+    if metrics is None or not metrics.enabled:
+        return []
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    async def handle_metrics(request):
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    return [Route("/metrics", endpoint=handle_metrics, methods=["GET"])]
+
+
+async def _run_uvicorn(app: Any, args: argparse.Namespace):
+    import uvicorn
+
+    print(f"🔗 Notion MCP server listening on http://{args.host}:{args.port} ({args.transport})",
+          file=sys.stderr)
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level="warning")
+    await uvicorn.Server(config).serve()
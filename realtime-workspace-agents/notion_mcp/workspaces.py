@@ -0,0 +1,222 @@
+"""
+Notion workspaces
+One isolated set of Notion components (client and connection pool, rate
+budget, block cache, write-behind queue, local index) per integration
+token, selected by each tool call and closed once idle
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+DEFAULT_WORKSPACE = "default"
+
+
+class WorkspaceError(ValueError):
+    """A tool call selected a workspace this server does not know"""
+
+
+class Workspace:
+    """
+    Notion components of one workspace
+
+    The server's factory fills in notion, rate_limiter, cache, write_behind
+    (and emulator in simulation mode) on first use; the local index is
+    opened on first lookup.
+    """
+
+    def __init__(self, name: str, token: Optional[str], parent_page_id: Optional[str] = None,
+                 index_path: Optional[str] = None):
+        self.name = name
+        self.token = token
+        self.parent_page_id = parent_page_id
+        self.index_path = index_path
+        self.notion = None
+        self.rate_limiter = None
+        self.cache = None
+        self.write_behind = None
+        self.emulator = None
+        self._index = None
+        # Tool calls currently running against this workspace
+        self.active = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def built(self) -> bool:
+        return self.notion is not None
+
+    @property
+    def index(self):
+        """Local index of this workspace's projects, databases and tasks"""
+        if self._index is None:
+            from notion_mcp.index import LocalIndex
+            self._index = LocalIndex(self.index_path)
+        return self._index
+
+    @property
+    def idle(self) -> bool:
+        """No call running and no buffered write left to send"""
+        return self.active == 0 and (self.write_behind is None or not self.write_behind.busy)
+
+    async def aclose(self):
+        """Flushes buffered writes, then closes the connections, the rate limiter and the index"""
+        token = current_workspace.set(self)
+        try:
+            if self.write_behind is not None:
+                await self.write_behind.flush_all()
+        finally:
+            current_workspace.reset(token)
+        if self.notion is not None:
+            await self.notion.aclose()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aclose()
+        if self._index is not None:
+            self._index.close()
+
+
+# Workspace of the tool call running in the current task (inherited by its sub-tasks and flushes)
+current_workspace: contextvars.ContextVar[Optional[Workspace]] = contextvars.ContextVar(
+    "notion_workspace", default=None
+)
+
+
+def load_workspace_config(value: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Named workspaces from NOTION_WORKSPACES: a JSON object (or the path of a
+    JSON file) mapping each name to {"token" or "tokenEnv", "parentPageId",
+    "indexPath"}; a workspace without a token runs in simulation mode
+    """
+    value = value if value is not None else os.getenv("NOTION_WORKSPACES", "")
+    if not value.strip():
+        return {}
+    if not value.lstrip().startswith("{"):
+        with open(value, encoding="utf-8") as config:
+            value = config.read()
+    workspaces = json.loads(value)
+    for name, settings in workspaces.items():
+        if name == DEFAULT_WORKSPACE:
+            raise ValueError(f"'{DEFAULT_WORKSPACE}' is the NOTION_TOKEN workspace and cannot be redefined")
+        if settings.get("tokenEnv"):
+            settings["token"] = os.getenv(settings["tokenEnv"])
+    return workspaces
+
+
+def _index_path(name: str) -> Optional[str]:
+    """Per-workspace file next to NOTION_INDEX_PATH (in memory when the index is)"""
+    base = os.getenv("NOTION_INDEX_PATH")
+    if not base or base == ":memory:":
+        return ":memory:"
+    root, extension = os.path.splitext(base)
+    return f"{root}.{name}{extension}"
+
+
+class WorkspacePool:
+    """
+    Workspaces by name, built on first use
+
+    The default workspace uses NOTION_TOKEN / NOTION_PARENT_PAGE_ID and is
+    never evicted. Other workspaces are selected by name (configured in
+    NOTION_WORKSPACES) or by integration token; token-selected workspaces
+    are named after a hash of the token, which is never logged. A workspace
+    idle for idle_ttl seconds is closed (its buffered writes are flushed
+    first), and beyond max_workspaces the least recently used idle ones are.
+    """
+
+    def __init__(self, build: Callable[[Workspace], None], idle_ttl: Optional[float] = None,
+                 max_workspaces: Optional[int] = None, config: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Initialize the pool (nothing is built yet); build(workspace) creates its components"""
+        self.build = build
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("NOTION_WORKSPACE_IDLE_TTL", "600"))
+        self.max_workspaces = max_workspaces or int(os.getenv("NOTION_MAX_WORKSPACES", "64"))
+        self.configured = config if config is not None else load_workspace_config()
+        self.default = Workspace(DEFAULT_WORKSPACE, os.getenv("NOTION_TOKEN"), os.getenv("NOTION_PARENT_PAGE_ID"))
+        # Workspaces other than the default one, least recently used first
+        self._open: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        self.evicted = 0
+
+    def resolve(self, name: Optional[str] = None, token: Optional[str] = None) -> Workspace:
+        """Workspace selected by a tool call (the default one when nothing is selected)"""
+        self.sweep()
+        if token and token == self.default.token:
+            return self.default
+        if token:
+            # A configured workspace's own token selects it; any other token gets a workspace of its own
+            name = next((n for n, s in self.configured.items() if s.get("token") == token), None) \
+                or "token-" + hashlib.sha256(token.encode()).hexdigest()[:12]
+            settings = self.configured.get(name, {})
+        elif name and name != DEFAULT_WORKSPACE:
+            if name not in self.configured:
+                raise WorkspaceError(f"Unknown workspace '{name}'")
+            settings = self.configured[name]
+            token = settings.get("token")
+        else:
+            return self.default
+        workspace = self._open.get(name)
+        if workspace is None:
+            workspace = Workspace(name, token, settings.get("parentPageId"),
+                                  settings.get("indexPath") or _index_path(name))
+            self._open[name] = workspace
+        self._open.move_to_end(name)
+        return workspace
+
+    def current(self) -> Workspace:
+        """Workspace of the running tool call"""
+        return current_workspace.get() or self.default
+
+    def ensure_built(self, workspace: Workspace) -> Workspace:
+        if not workspace.built:
+            self.build(workspace)
+        return workspace
+
+    @contextlib.contextmanager
+    def use(self, workspace: Workspace) -> Iterator[Workspace]:
+        """Runs the enclosed code (and the tasks it starts) against the given workspace"""
+        workspace.active += 1
+        token = current_workspace.set(workspace)
+        try:
+            yield workspace
+        finally:
+            current_workspace.reset(token)
+            workspace.active -= 1
+            workspace.last_used = time.monotonic()
+
+    def sweep(self):
+        """Closes the workspaces idle for too long, and the oldest idle ones beyond max_workspaces"""
+        now = time.monotonic()
+        for workspace in list(self._open.values()):
+            if workspace.idle and now - workspace.last_used > self.idle_ttl:
+                self._evict(workspace)
+        for workspace in list(self._open.values()):
+            if len(self._open) < self.max_workspaces:
+                break
+            if workspace.idle:
+                self._evict(workspace)
+
+    def _evict(self, workspace: Workspace):
+        del self._open[workspace.name]
+        self.evicted += 1
+        if not workspace.built:
+            return
+        print(f"💤 Closing idle Notion workspace '{workspace.name}'", file=sys.stderr)
+        closing = asyncio.get_running_loop().create_task(workspace.aclose())
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    def built(self) -> List[Workspace]:
+        """Workspaces whose components exist, default first"""
+        return [w for w in [self.default, *self._open.values()] if w.built]
+
+    async def aclose(self):
+        """Closes every workspace (buffered writes are flushed first)"""
+        workspaces = self.built()
+        self._open.clear()
+        await asyncio.gather(*(workspace.aclose() for workspace in workspaces), *self._closing,
+                             return_exceptions=True)
@@ -0,0 +1,312 @@
+"""
+Write-behind queue for updateNotionTasks
+Buffers task mutations per project, merges them and flushes in the background
+"""
+
+import asyncio
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from notion_mcp.blocks import TASK_DELETED_STATUS
+from notion_mcp.ratelimit import UNSENT_ERRORS
+
+
+# flush(project_id, new_tasks, updated_tasks, conversation_context) -> [(mutation, error)] of the ones that failed
+FlushCallback = Callable[[str, List[Dict], List[Dict], str], Awaitable[List[Tuple[Dict, BaseException]]]]
+
+TASK_FIELDS = ("task", "title", "assignedTo", "priority", "dueDate", "context")
+
+# Notion statuses worth sending the same mutation again for
+TRANSIENT_STATUS = frozenset({409, 429, 500, 502, 503, 504})
+
+
+def is_transient(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    Failure that may not happen again (rate limit, server or network error)
+    A non-idempotent mutation (a new task) only qualifies when Notion never got it
+    """
+    status = getattr(error, "status_code", None)
+    if not idempotent:
+        return status == 429 or isinstance(error, UNSENT_ERRORS)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    # ValueError: unknown task or invalid mutation, sending it again changes nothing
+    return not isinstance(error, ValueError)
+
+
+def mutation_label(mutation: Dict[str, Any]) -> str:
+    return mutation.get("task") or mutation.get("title") or mutation.get("taskId") or "New task"
+
+
+def _title_key(title: Optional[str]) -> str:
+    return (title or "").strip().casefold()
+
+
+class PendingTasks:
+    """
+    Merged mutations of one project waiting to be flushed
+
+    Every new task is kept as its own add, even when several share a title.
+    An update naming a pending add, by taskId or by a title no other pending
+    add has, is folded into it (a delete then simply drops it); other updates
+    are last-writer-wins per taskId.
+    """
+
+    def __init__(self):
+        self.adds: List[Dict[str, Any]] = []
+        self.updates: Dict[str, Dict[str, Any]] = {}
+        self.contexts: List[str] = []
+        self.mutations = 0
+        # Flushes of this batch that already failed
+        self.attempts = 0
+        # Journal entries of the calls merged into this batch
+        self.entries: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.adds) + len(self.updates)
+
+    def _pending_add(self, ref: str) -> Optional[Dict[str, Any]]:
+        """The pending add ref names without ambiguity, if any"""
+        by_id = next((task for task in self.adds if task.get("taskId") == ref), None)
+        if by_id is not None:
+            return by_id
+        title = _title_key(ref)
+        matches = [task for task in self.adds if _title_key(task.get("task") or task.get("title")) == title]
+        return matches[0] if len(matches) == 1 else None
+
+    def names(self, ref: str) -> bool:
+        """ref is the taskId or title of one of the pending new tasks"""
+        title = _title_key(ref)
+        return any(
+            task.get("taskId") == ref or _title_key(task.get("task") or task.get("title")) == title
+            for task in self.adds
+        )
+
+    def add_task(self, task: Dict[str, Any]):
+        self.adds.append(dict(task))
+        self.mutations += 1
+
+    def update_task(self, update: Dict[str, Any]):
+        key = update["taskId"]
+        status = update.get("newStatus")
+        changes = update.get("updates") or {}
+        self.mutations += 1
+
+        task = self._pending_add(key)
+        if task is not None:
+            if status == TASK_DELETED_STATUS:
+                self.adds.remove(task)
+                return
+            task.update({field: changes[field] for field in TASK_FIELDS if field in changes})
+            if status:
+                task["status"] = status
+            return
+
+        previous = self.updates.get(key)
+        if previous is None or status == TASK_DELETED_STATUS:
+            self.updates[key] = {"taskId": key, "newStatus": status, "updates": dict(changes)}
+            return
+        if previous.get("newStatus") == TASK_DELETED_STATUS:
+            # Nothing to update on a task that is going away
+            return
+        previous["updates"].update(changes)
+        if status:
+            previous["newStatus"] = status
+
+    def absorb(self, newer: "PendingTasks"):
+        """Appends the mutations of a batch queued after this one"""
+        self.adds.extend(newer.adds)
+        for update in newer.updates.values():
+            self.update_task(update)
+        self.mutations += newer.mutations - len(newer.updates)
+        self.contexts.extend(newer.contexts)
+        self.entries.extend(newer.entries)
+
+    def drain(self) -> Tuple[List[Dict], List[Dict], str]:
+        """Returns (new_tasks, updated_tasks, context) ready for one flush"""
+        updated = [
+            {key: value for key, value in update.items() if value}
+            for update in self.updates.values()
+        ]
+        return list(self.adds), updated, "\n".join(self.contexts)
+
+
+class WriteBehindQueue:
+    """
+    Per-project write-behind buffer
+
+    enqueue() merges the mutations into the project's pending batch and
+    returns at once. A batch is flushed after `debounce` seconds without new
+    mutations, or immediately once it holds `max_pending` tasks. Flushes of
+    one project never overlap, so Notion sees the mutations in order.
+
+    Mutations that fail for a transient reason go back in front of the
+    project's pending batch and are retried with exponential backoff, up to
+    `max_retries` times. The others are reported, one by one, by the next
+    enqueue() of that project.
+    """
+
+    def __init__(self, flush: FlushCallback, debounce: Optional[float] = None,
+                 max_pending: Optional[int] = None,
+                 on_flushed: Optional[Callable[[List[Any]], None]] = None,
+                 max_retries: Optional[int] = None, retry_delay: float = 1.0, max_retry_delay: float = 60.0):
+        """
+        Initialize the queue with the coroutine that writes a batch to Notion
+        on_flushed receives the journal entries of each batch Notion is done with
+        """
+        self._flush = flush
+        self.on_flushed = on_flushed
+        self.debounce = debounce if debounce is not None else float(os.getenv("NOTION_WRITE_BEHIND_DEBOUNCE", "2.0"))
+        self.max_pending = max_pending or int(os.getenv("NOTION_WRITE_BEHIND_MAX", "50"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("NOTION_WRITE_BEHIND_RETRIES", "5"))
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._pending: Dict[str, PendingTasks] = {}
+        # Batch being written, per project
+        self._writing: Dict[str, PendingTasks] = {}
+        # Mutations given up on, not reported to a caller yet
+        self._failures: Dict[str, List[Dict[str, str]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._flushes: set = set()
+        self.retried = 0
+        self.failed = 0
+
+    def pending_task(self, project_id: str, ref: str) -> bool:
+        """ref names a new task of the project that is buffered or being written"""
+        return any(batch is not None and batch.names(ref)
+                   for batch in (self._pending.get(project_id), self._writing.get(project_id)))
+
+    def enqueue(self, project_id: str, new_tasks: List[Dict], updated_tasks: List[Dict],
+                context: str = "", entry: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Buffers the mutations and returns an acknowledgement, along with the
+        buffered mutations of the project Notion rejected since the last one
+        """
+        batch = self._pending.setdefault(project_id, PendingTasks())
+        if entry is not None:
+            batch.entries.append(entry)
+        for task in new_tasks:
+            batch.add_task(task)
+        for update in updated_tasks:
+            batch.update_task(update)
+        if context:
+            batch.contexts.append(context)
+
+        if batch.attempts == 0:
+            # A batch waiting for a retry keeps its backoff
+            self._cancel_timer(project_id)
+            if len(batch) >= self.max_pending:
+                self._start_flush(project_id)
+            else:
+                self._schedule(project_id, self.debounce)
+
+        return {
+            "queued": True,
+            "pendingTasks": len(batch),
+            "mergedMutations": batch.mutations,
+            "failedMutations": self._failures.pop(project_id, []),
+        }
+
+    @property
+    def busy(self) -> bool:
+        """Mutations buffered or being written"""
+        return bool(self._pending or self._flushes)
+
+    def _cancel_timer(self, project_id: str):
+        timer = self._timers.pop(project_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _schedule(self, project_id: str, delay: float):
+        loop = asyncio.get_running_loop()
+        self._timers[project_id] = loop.call_later(delay, self._start_flush, project_id)
+
+    def _start_flush(self, project_id: str):
+        self._timers.pop(project_id, None)
+        task = asyncio.get_running_loop().create_task(self.flush(project_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, project_id: str):
+        """Writes the pending batch of one project"""
+        lock = self._locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            batch = self._pending.pop(project_id, None)
+            if batch is None:
+                return
+            self._cancel_timer(project_id)
+            if not batch:
+                # Everything cancelled out (e.g. a new task deleted before it was written)
+                if self.on_flushed is not None and batch.entries:
+                    self.on_flushed(batch.entries)
+                return
+            new_tasks, updated_tasks, context = batch.drain()
+            self._writing[project_id] = batch
+            try:
+                failures = await self._flush(project_id, new_tasks, updated_tasks, context)
+            except Exception as e:
+                failures = [(mutation, e) for mutation in [*new_tasks, *updated_tasks]]
+            finally:
+                del self._writing[project_id]
+
+            retry = PendingTasks()
+            retry.attempts = batch.attempts + 1
+            adds = {id(task) for task in new_tasks}
+            for mutation, error in failures:
+                added = id(mutation) in adds
+                if is_transient(error, idempotent=not added) and retry.attempts <= self.max_retries:
+                    if added:
+                        retry.add_task(mutation)
+                    else:
+                        retry.update_task(mutation)
+                    continue
+                print(f"❌ Write-behind change '{mutation_label(mutation)}' of {project_id} failed: {error}",
+                      file=sys.stderr)
+                self.failed += 1
+                self._failures.setdefault(project_id, []).append(
+                    {"task": mutation_label(mutation), "error": str(error)}
+                )
+
+            if retry:
+                # Ahead of whatever was queued meanwhile, so Notion still sees the mutations in order
+                retry.contexts = batch.contexts
+                retry.entries = batch.entries
+                newer = self._pending.pop(project_id, None)
+                if newer is not None:
+                    retry.absorb(newer)
+                self._pending[project_id] = retry
+                self.retried += 1
+                self._cancel_timer(project_id)
+                delay = min(self.retry_delay * 2 ** (retry.attempts - 1), self.max_retry_delay)
+                print(f"⚠️ {len(retry)} write-behind change(s) of {project_id} failed, "
+                      f"retrying in {delay:.0f}s", file=sys.stderr)
+                self._schedule(project_id, delay)
+            elif self.on_flushed is not None and batch.entries:
+                self.on_flushed(batch.entries)
+
+    async def flush_all(self):
+        """
+        Flushes every project now (used on shutdown)
+        Retries still due afterwards are dropped; journaled calls are replayed on the next start
+        """
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self.flush(project_id) for project_id in list(self._pending)))
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for project_id, batch in self._pending.items():
+            print(f"❌ {len(batch)} write-behind change(s) of {project_id} dropped on shutdown", file=sys.stderr)
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pendingTasks": sum(len(batch) for batch in self._pending.values()),
+            "retriedBatches": self.retried,
+            "failedMutations": self.failed,
+        }
@@ -6,7 +6,11 @@ Connecte le serveur MCP Notion au SDK OpenAI Agents
 
 import asyncio
 import os
+import sys
+import threading
+import time
 from pathlib import Path
+from typing import AsyncIterator, Optional
 
 # Import OpenAI Agents SDK avec MCP
 try:
@@ -20,18 +24,65 @@ except ImportError as e:
     exit(1)
 
 
+# Délai max (secondes) du ping de santé avant chaque tour
+HEALTH_CHECK_TIMEOUT = 5
+
+QUIT_COMMANDS = ('quit', 'exit', 'q')
+# Interrompt le tour en cours sans quitter
+STOP_COMMAND = '/stop'
+# Longueur max des arguments / résultats d'outils affichés pendant le streaming
+TOOL_PREVIEW_CHARS = 120
+
+
+async def read_stdin_lines() -> AsyncIterator[str]:
+    """
+    Lignes tapées par l'utilisateur, lues par un thread dédié
+    La boucle asyncio n'est jamais bloquée par la saisie (trafic MCP, tours en cours)
+    """
+    loop = asyncio.get_running_loop()
+    lines: asyncio.Queue = asyncio.Queue()
+    
+    def pump():
+        try:
+            for line in iter(sys.stdin.readline, ""):
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+        except RuntimeError:
+            # Boucle déjà fermée : le programme se termine
+            pass
+    
+    threading.Thread(target=pump, name="stdin-reader", daemon=True).start()
+    while (line := await lines.get()) is not None:
+        yield line
+
+
+def _preview(value) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= TOOL_PREVIEW_CHARS else text[:TOOL_PREVIEW_CHARS - 1] + "…"
+
+
 class NotionMCPIntegration:
     """Intégration MCP Notion avec OpenAI SDK"""
     
     def __init__(self):
         self.current_dir = Path(__file__).parent
         self.mcp_server_path = self.current_dir / "mcp-notion-server.py"
-        
-    async def create_notion_agent(self):
-        """Crée un agent OpenAI avec accès au serveur MCP Notion"""
-        
-        # Configuration du serveur MCP Notion en mode Stdio
-        async with MCPServerStdio(
+        # Connexion MCP et agent persistants, réutilisés par tous les Runner.run
+        self.mcp_server: Optional[MCPServerStdio] = None
+        self.agent: Optional[Agent] = None
+        self._lock = asyncio.Lock()
+        # Tour en cours en mode interactif (annulable par /stop)
+        self._turn: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    def _create_mcp_server(self) -> MCPServerStdio:
+        """Configuration du serveur MCP Notion en mode Stdio"""
+        return MCPServerStdio(
             name="Notion MCP Server",
             params={
                 "command": "python3",
@@ -39,50 +90,148 @@ class NotionMCPIntegration:
                 "cwd": str(self.current_dir),
                 "env": {
                     "NOTION_TOKEN": os.getenv("NOTION_TOKEN", ""),
+                    "NOTION_PARENT_PAGE_ID": os.getenv("NOTION_PARENT_PAGE_ID", ""),
                     "PYTHONPATH": str(self.current_dir)
                 }
             },
-        ) as mcp_server:
+            # La liste des outils ne change pas pendant la vie du processus
+            cache_tools_list=True,
+            client_session_timeout_seconds=30,
+        )
+    
+    def create_notion_agent(self, mcp_server: MCPServerStdio) -> Agent:
+        """Crée un agent OpenAI avec accès au serveur MCP Notion"""
+        
+        # Création de l'agent avec accès MCP
+        return Agent(
+            name="NotionExpert",
+            instructions="""
+            Vous êtes un expert Notion silencieux et proactif.
             
-            # Création de l'agent avec accès MCP
-            agent = Agent(
-                name="NotionExpert",
-                instructions="""
-                Vous êtes un expert Notion silencieux et proactif.
-                
-                🎯 RÈGLES ABSOLUES:
-                - Vous écoutez TOUT en silence
-                - Vous agissez IMMÉDIATEMENT quand un projet est mentionné
-                - Vous créez des structures COMPLÈTES et ANTICIPATOIRES
-                
-                🏗️ CRÉATION DE PROJETS:
-                Dès qu'un nouveau projet est mentionné, vous créez IMMÉDIATEMENT:
-                - Page principale avec description complète
-                - Structure de dossiers logique et complète
-                - Bases de données pour tâches, équipe, ressources
-                - Liste de tâches initiale avec tâches anticipées
-                - Planning provisoire
-                - Sections pour notes de réunion
-                
-                📋 LISTES DE TÂCHES AUTOMATIQUES:
-                - Créez et mettez à jour les to-do lists en temps réel
-                - Ajoutez automatiquement les tâches mentionnées
-                - Assignez aux bonnes personnes
-                - Définissez priorités et échéances
-                - Organisez par projet et personne
-                
-                🔄 MISES À JOUR CONTINUES:
-                - Mettez à jour Notion en temps réel pendant la conversation
-                - Adaptez la structure selon les nouvelles informations
-                - Enrichissez automatiquement le contenu
-                - Anticipez les besoins futurs du projet
-                
-                Utilisez les outils MCP Notion disponibles pour toutes ces opérations.
-                """,
-                mcp_servers=[mcp_server]
-            )
+            🎯 RÈGLES ABSOLUES:
+            - Vous écoutez TOUT en silence
+            - Vous agissez IMMÉDIATEMENT quand un projet est mentionné
+            - Vous créez des structures COMPLÈTES et ANTICIPATOIRES
+            
+            🏗️ CRÉATION DE PROJETS:
+            Dès qu'un nouveau projet est mentionné, vous créez IMMÉDIATEMENT:
+            - Page principale avec description complète
+            - Structure de dossiers logique et complète
+            - Bases de données pour tâches, équipe, ressources
+            - Liste de tâches initiale avec tâches anticipées
+            - Planning provisoire
+            - Sections pour notes de réunion
+            
+            📋 LISTES DE TÂCHES AUTOMATIQUES:
+            - Créez et mettez à jour les to-do lists en temps réel
+            - Ajoutez automatiquement les tâches mentionnées
+            - Assignez aux bonnes personnes
+            - Définissez priorités et échéances
+            - Organisez par projet et personne
             
-            return agent, mcp_server
+            🔄 MISES À JOUR CONTINUES:
+            - Mettez à jour Notion en temps réel pendant la conversation
+            - Adaptez la structure selon les nouvelles informations
+            - Enrichissez automatiquement le contenu
+            - Anticipez les besoins futurs du projet
+            
+            Utilisez les outils MCP Notion disponibles pour toutes ces opérations.
+            """,
+            mcp_servers=[mcp_server]
+        )
+    
+    async def get_agent(self) -> Agent:
+        """
+        Retourne l'agent en cache, en (re)démarrant le serveur MCP si nécessaire
+        Le sous-processus n'est lancé qu'une fois ; s'il est mort, il est relancé
+        """
+        async with self._lock:
+            if self.mcp_server is not None and not await self._is_healthy():
+                print("🔄 Serveur MCP Notion injoignable, reconnexion...")
+                await self._close_server()
+            
+            if self.mcp_server is None:
+                mcp_server = self._create_mcp_server()
+                await mcp_server.connect()
+                self.mcp_server = mcp_server
+                self.agent = None
+            
+            if self.agent is None:
+                self.agent = self.create_notion_agent(self.mcp_server)
+            return self.agent
+    
+    async def _is_healthy(self) -> bool:
+        """Ping MCP sur la session existante"""
+        session = getattr(self.mcp_server, "session", None)
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+    
+    async def run(self, message: str):
+        """Exécute un tour avec l'agent persistant"""
+        agent = await self.get_agent()
+        return await Runner.run(starting_agent=agent, input=message)
+    
+    async def stream(self, message: str):
+        """
+        Exécute un tour en affichant au fil de l'eau le texte de l'agent
+        et ses appels d'outils ; annuler la tâche interrompt le tour
+        """
+        agent = await self.get_agent()
+        started = time.perf_counter()
+        first_output: Optional[float] = None
+        result = Runner.run_streamed(starting_agent=agent, input=message)
+        try:
+            async for event in result.stream_events():
+                if self._print_event(event) and first_output is None:
+                    first_output = time.perf_counter() - started
+        except asyncio.CancelledError:
+            result.cancel()
+            raise
+        total = time.perf_counter() - started
+        first = f"{first_output:.1f}s" if first_output is not None else "-"
+        print(f"\n⏱️ Premier affichage: {first} · tour complet: {total:.1f}s\n")
+        return result
+    
+    @staticmethod
+    def _print_event(event) -> bool:
+        """Affiche un événement du stream ; True s'il a produit une sortie visible"""
+        if event.type == "raw_response_event":
+            if getattr(event.data, "type", None) == "response.output_text.delta" and event.data.delta:
+                print(event.data.delta, end="", flush=True)
+                return True
+            return False
+        if event.type != "run_item_stream_event":
+            return False
+        if event.name == "tool_called":
+            raw = event.item.raw_item
+            name = getattr(raw, "name", None) or "outil"
+            print(f"\n🔧 {name}({_preview(getattr(raw, 'arguments', ''))})", flush=True)
+            return True
+        if event.name == "tool_output":
+            print(f"📎 {_preview(event.item.output)}", flush=True)
+            return True
+        if event.name == "message_output_created":
+            # Le texte a déjà été affiché delta par delta
+            print(flush=True)
+        return False
+    
+    async def _close_server(self):
+        mcp_server, self.mcp_server, self.agent = self.mcp_server, None, None
+        if mcp_server is not None:
+            try:
+                await mcp_server.cleanup()
+            except Exception as e:
+                print(f"⚠️ Fermeture du serveur MCP: {e}")
+    
+    async def close(self):
+        """Arrête le serveur MCP Notion"""
+        async with self._lock:
+            await self._close_server()
     
     async def test_notion_integration(self):
         """Test de l'intégration Notion MCP"""
@@ -90,8 +239,6 @@ class NotionMCPIntegration:
         print("🚀 Test de l'intégration OpenAI + MCP Notion...")
         
         try:
-            agent, mcp_server = await self.create_notion_agent()
-            
             # Test de création de projet
             test_message = """
             Je commence un nouveau projet appelé "Application Mobile E-commerce".
@@ -102,14 +249,9 @@ class NotionMCPIntegration:
             
             print(f"📝 Test avec le message: {test_message}\n")
             
-            # Exécution avec l'agent
-            result = await Runner.run(
-                starting_agent=agent,
-                input=test_message
-            )
-            
+            # Exécution avec l'agent, affichée au fil de l'eau
             print("✅ Résultat de l'agent:")
-            print(result.final_output)
+            await self.stream(test_message)
             
             # Test de mise à jour de tâches
             update_message = """
@@ -121,56 +263,80 @@ class NotionMCPIntegration:
             
             print(f"\n📋 Test de mise à jour avec: {update_message}\n")
             
-            result2 = await Runner.run(
-                starting_agent=agent,
-                input=update_message
-            )
-            
             print("✅ Résultat de la mise à jour:")
-            print(result2.final_output)
+            await self.stream(update_message)
             
         except Exception as e:
             print(f"❌ Erreur lors du test: {e}")
             print(f"💡 Détails: {type(e).__name__}")
     
     async def run_interactive_mode(self):
-        """Mode interactif avec l'agent Notion"""
+        """
+        Mode interactif avec l'agent Notion
+        La saisie reste possible pendant qu'un tour s'exécute : les messages
+        sont mis en file et traités dans l'ordre, /stop interrompt le tour en cours
+        """
         
         print("🎯 Mode interactif - Agent Notion Expert")
         print("💬 Parlez de vos projets, l'agent va automatiquement créer les structures Notion")
+        print(f"⏹️ Tapez '{STOP_COMMAND}' pour interrompre la réponse en cours")
         print("❌ Tapez 'quit' pour quitter\n")
         
         try:
-            agent, mcp_server = await self.create_notion_agent()
-            
-            while True:
-                try:
-                    user_input = input("👤 Vous: ").strip()
-                    
-                    if user_input.lower() in ['quit', 'exit', 'q']:
-                        break
-                    
-                    if not user_input:
-                        continue
-                    
-                    print("🤖 Agent Notion en action...")
-                    
-                    result = await Runner.run(
-                        starting_agent=agent,
-                        input=user_input
-                    )
-                    
-                    print(f"✅ Action terminée: {result.final_output}\n")
-                    
-                except KeyboardInterrupt:
-                    break
-                except Exception as e:
-                    print(f"❌ Erreur: {e}\n")
-            
+            # Démarre le serveur MCP une seule fois pour toute la session
+            await self.get_agent()
         except Exception as e:
             print(f"❌ Erreur lors de l'initialisation: {e}")
+            print("👋 Agent Notion arrêté")
+            return
+        
+        messages: asyncio.Queue = asyncio.Queue()
+        worker = asyncio.create_task(self._process_turns(messages))
+        print("👤 Vous: ", end="", flush=True)
+        try:
+            async for line in read_stdin_lines():
+                user_input = line.strip()
+                
+                if user_input.lower() in QUIT_COMMANDS:
+                    break
+                
+                if user_input == STOP_COMMAND:
+                    if self._turn is not None and not self._turn.done():
+                        self._turn.cancel()
+                    continue
+                
+                if not user_input:
+                    continue
+                
+                messages.put_nowait(user_input)
+                if self._turn is not None:
+                    print(f"📥 Message en file ({messages.qsize()} en attente)", flush=True)
+        finally:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
         
         print("👋 Agent Notion arrêté")
+    
+    async def _process_turns(self, messages: asyncio.Queue):
+        """Exécute les messages en file, un tour à la fois"""
+        while True:
+            message = await messages.get()
+            print("🤖 Agent Notion en action...", flush=True)
+            self._turn = asyncio.create_task(self.stream(message))
+            try:
+                # wait() ne propage pas l'annulation du tour (/stop) à cette boucle
+                await asyncio.wait([self._turn])
+            finally:
+                turn, self._turn = self._turn, None
+                if not turn.done():
+                    turn.cancel()
+                    await asyncio.gather(turn, return_exceptions=True)
+            if turn.cancelled():
+                print("\n⏹️ Tour interrompu\n")
+            elif turn.exception() is not None:
+                print(f"\n❌ Erreur: {turn.exception()}\n")
+            if messages.empty():
+                print("👤 Vous: ", end="", flush=True)
 
 
 async def main():
@@ -196,12 +362,13 @@ async def main():
     
     mode = input("Choisissez le mode (1=Test, 2=Interactif): ").strip()
     
-    if mode == "1":
-        await integration.test_notion_integration()
-    elif mode == "2":
-        await integration.run_interactive_mode()
-    else:
-        print("❌ Mode invalide")
+    async with integration:
+        if mode == "1":
+            await integration.test_notion_integration()
+        elif mode == "2":
+            await integration.run_interactive_mode()
+        else:
+            print("❌ Mode invalide")
 
 
 if __name__ == "__main__":
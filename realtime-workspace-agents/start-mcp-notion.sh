@@ -11,8 +11,8 @@ if ! command -v python3 &> /dev/null; then
     exit 1
 fi
 
-# Vérifier si le package mcp est installé
-if ! python3 -c "import mcp" 2>/dev/null; then
+# Vérifier si le package mcp est installé (find_spec ne l'importe pas : pas de coût au démarrage)
+if ! python3 -c "import importlib.util, sys; sys.exit(importlib.util.find_spec('mcp') is None)" 2>/dev/null; then
     echo "📦 Installation du package MCP..."
     pip3 install mcp
 fi
@@ -32,10 +32,13 @@ if [ -z "$NOTION_TOKEN" ]; then
     echo "💡 Pour utiliser l'API Notion réelle, définissez NOTION_TOKEN"
 else
     echo "✅ NOTION_TOKEN configuré - mode API réel"
+    if [ -z "$NOTION_PARENT_PAGE_ID" ]; then
+        echo "⚠️  NOTION_PARENT_PAGE_ID non défini - createNotionProject échouera"
+    fi
 fi
 
 # Démarrer le serveur MCP
 echo "🔗 Démarrage du serveur MCP sur stdio..."
-python3 mcp-notion-server.py
+python3 mcp-notion-server.py "$@"
 
 echo "👋 Serveur MCP Notion arrêté"
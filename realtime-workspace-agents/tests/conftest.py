@@ -0,0 +1,28 @@
+"""
+Shared fixtures
+The tests run from any directory: the server's modules are imported from
+the project root, and mcp-notion-server.py is loaded by path
+"""
+
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def server_module(monkeypatch):
+    """mcp-notion-server.py in simulation mode (no token, default settings)"""
+    for name in list(os.environ):
+        if name.startswith("NOTION_") or name.startswith("MCP_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setattr(sys, "argv", ["mcp-notion-server.py"])
+    spec = importlib.util.spec_from_file_location("mcp_notion_server", ROOT / "mcp-notion-server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timezone
+
+from notion_mcp.cache import BlockCache
+
+
+def at(stamp: str) -> float:
+    return datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc).timestamp()
+
+
+class Clock:
+    def __init__(self, stamp: str):
+        self.now = at(stamp)
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakePage:
+    """Notion page whose children and minute-precision last_edited_time can be edited"""
+
+    def __init__(self, children, edited: str):
+        self.children = list(children)
+        self.edited = edited
+        self.children_reads = 0
+
+    async def load_page(self):
+        return {"id": "page", "last_edited_time": self.edited}
+
+    async def load_children(self):
+        self.children_reads += 1
+        return list(self.children)
+
+
+def read(cache: BlockCache, page: FakePage):
+    return asyncio.run(cache.read("page", page.load_page, page.load_children))
+
+
+def test_edit_in_the_minute_of_the_read_is_refetched():
+    clock = Clock("2024-05-01T12:00:10")
+    cache = BlockCache(ttl=0, clock=clock)
+    page = FakePage([{"id": "a"}], "2024-05-01T12:00:00.000Z")
+    read(cache, page)
+
+    # Another client edits the page at 12:00:50: same minute, same stamp
+    page.children.append({"id": "b"})
+    clock.now = at("2024-05-01T12:01:30")
+    _, children = read(cache, page)
+
+    assert [child["id"] for child in children] == ["a", "b"]
+    assert page.children_reads == 2
+    assert cache.stats()["revalidations"] == 0
+
+
+def test_children_captured_after_the_minute_are_revalidated():
+    clock = Clock("2024-05-01T12:01:05")
+    cache = BlockCache(ttl=0, clock=clock)
+    page = FakePage([{"id": "a"}], "2024-05-01T12:00:00.000Z")
+    read(cache, page)
+
+    clock.now = at("2024-05-01T12:30:00")
+    _, children = read(cache, page)
+
+    assert [child["id"] for child in children] == ["a"]
+    assert page.children_reads == 1
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_own_write_is_not_trusted_over_a_same_minute_edit():
+    clock = Clock("2024-05-01T12:05:00")
+    cache = BlockCache(ttl=0, clock=clock)
+    page = FakePage([{"id": "a"}], "2024-05-01T12:00:00.000Z")
+    read(cache, page)
+
+    clock.now = at("2024-05-01T12:10:20")
+    cache.append_children("page", [{"id": "b", "last_edited_time": "2024-05-01T12:10:00.000Z"}])
+    page.children += [{"id": "b"}, {"id": "c"}]
+    page.edited = "2024-05-01T12:10:00.000Z"
+
+    clock.now = at("2024-05-01T12:11:30")
+    _, children = read(cache, page)
+
+    assert [child["id"] for child in children] == ["a", "b", "c"]
+    assert page.children_reads == 2
+
+
+def test_size_is_tracked_per_block():
+    cache = BlockCache(ttl=0)
+    page = FakePage([{"id": "a", "x": "1"}, {"id": "b", "x": "22"}], "2024-05-01T12:00:00.000Z")
+    read(cache, page)
+    cache.append_children("page", [{"id": "c"}], after="a")
+    cache.update_block({"id": "b", "x": "a longer value"})
+    cache.remove_block("a")
+
+    entry = cache.lookup("page")
+    expected = BlockCache(ttl=0)
+    expected.store("page", page=entry.page, children=entry.children)
+    assert cache.stats()["bytes"] == expected.stats()["bytes"]
+
+    cache.invalidate("page")
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,104 @@
+import jsonschema
+import pytest
+
+from notion_mcp.catalogue import ArgumentError, compile_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 2},
+        "kind": {"type": "string", "enum": ["a", "b"], "default": "a"},
+        "count": {"type": "integer"},
+        "ratio": {"type": "number"},
+        "flag": {"type": "boolean"},
+        "tags": {"type": "array", "items": {"type": "string"}, "default": []},
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"title": {"type": "string", "minLength": 1}},
+                "required": ["title"],
+            },
+        },
+    },
+    "required": ["name"],
+}
+
+validate = compile_schema(SCHEMA)
+
+
+@pytest.mark.parametrize("arguments, expected", [
+    ({"name": "ok"}, {"name": "ok", "kind": "a", "tags": []}),
+    ({"name": "ok", "kind": "b", "count": 3, "ratio": 2, "flag": False},
+     {"name": "ok", "kind": "b", "count": 3, "ratio": 2, "flag": False, "tags": []}),
+    ({"name": "ok", "ratio": 0.5, "tags": ["x"]}, {"name": "ok", "ratio": 0.5, "tags": ["x"], "kind": "a"}),
+    # Optional properties sent as null are absent (and get their default)
+    ({"name": "ok", "kind": None, "count": None}, {"name": "ok", "kind": "a", "tags": []}),
+    # Properties the schema does not describe are passed through
+    ({"name": "ok", "extra": {"x": 1}}, {"name": "ok", "extra": {"x": 1}, "kind": "a", "tags": []}),
+    ({"name": "ok", "items": [{"title": "t"}]}, {"name": "ok", "items": [{"title": "t"}], "kind": "a", "tags": []}),
+])
+def test_valid_arguments(arguments, expected):
+    assert validate(arguments) == expected
+    jsonschema.validate({k: v for k, v in arguments.items() if v is not None}, SCHEMA)
+
+
+@pytest.mark.parametrize("arguments, path, message", [
+    ([], "", "expected object, got array"),
+    ({}, "", "missing required property 'name'"),
+    ({"name": None}, "name", "expected string, got null"),
+    ({"name": 5}, "name", "expected string, got integer"),
+    ({"name": "x"}, "name", "must be at least 2 character(s)"),
+    ({"name": "ok", "kind": "c"}, "kind", "'c' is not one of: a, b"),
+    ({"name": "ok", "count": 1.5}, "count", "expected integer, got number"),
+    ({"name": "ok", "count": True}, "count", "expected integer, got boolean"),
+    ({"name": "ok", "ratio": "1"}, "ratio", "expected number, got string"),
+    ({"name": "ok", "flag": 1}, "flag", "expected boolean, got integer"),
+    ({"name": "ok", "tags": "x"}, "tags", "expected array, got string"),
+    ({"name": "ok", "tags": ["x", 2]}, "tags[1]", "expected string, got integer"),
+    ({"name": "ok", "items": [{"title": "t"}, {}]}, "items[1]", "missing required property 'title'"),
+    ({"name": "ok", "items": [{"title": ""}]}, "items[0].title", "must be at least 1 character(s)"),
+])
+def test_invalid_arguments(arguments, path, message):
+    with pytest.raises(ArgumentError) as error:
+        validate(arguments)
+    assert (error.value.path, error.value.message) == (path, message)
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(arguments, SCHEMA)
+
+
+def test_defaults_are_not_shared_between_calls():
+    first = validate({"name": "ok"})
+    first["tags"].append("x")
+    assert validate({"name": "ok"})["tags"] == []
+
+
+def test_tool_schema_error_names_the_argument(server_module):
+    catalogue = server_module.NotionMCPServer().catalogue
+    update = catalogue.get("updateNotionTasks")
+
+    with pytest.raises(ArgumentError) as error:
+        update.validate({"projectId": "p", "newTasks": [{"assignedTo": "Alice"}]})
+    assert str(error.value) == "newTasks[0]: missing required property 'task'"
+    with pytest.raises(ArgumentError) as error:
+        update.validate({"projectId": "p", "newTasks": [{"task": ""}]})
+    assert error.value.path == "newTasks[0].task"
+
+    arguments = update.validate({"projectId": "p"})
+    assert arguments["newTasks"] == [] and arguments["updatedTasks"] == []
+    jsonschema.validate({"projectId": "p"}, update.tool.inputSchema)
+
+
+SUPPORTED_KEYWORDS = {"type", "properties", "required", "default", "enum", "items", "minLength", "description"}
+
+
+def test_tool_schemas_only_use_keywords_the_validator_checks(server_module):
+    def keywords(schema):
+        yield from schema
+        for sub in schema.get("properties", {}).values():
+            yield from keywords(sub)
+        if "items" in schema:
+            yield from keywords(schema["items"])
+
+    for tool in server_module.NotionMCPServer().catalogue.tools:
+        assert set(keywords(tool.inputSchema)) <= SUPPORTED_KEYWORDS, tool.name
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from notion_mcp.blocks import block_plain_text
+from notion_mcp.journal import MutationJournal
+
+
+def records(path):
+    with open(path, encoding="utf-8") as journal:
+        return [json.loads(line) for line in journal]
+
+
+def test_concurrent_records_share_an_fsync(tmp_path):
+    path = tmp_path / "journal.log"
+
+    async def main():
+        journal = MutationJournal(str(path), commit_delay=0.01)
+        entries = await asyncio.gather(*(journal.record("updateNotionTasks", {"n": n}) for n in range(10)))
+        stats = journal.stats()
+        await journal.aclose()
+        return entries, stats
+
+    entries, stats = asyncio.run(main())
+    assert [entry.seq for entry in entries] == list(range(1, 11))
+    assert stats["commits"] < 10
+    assert [entry.arguments["n"] for entry in MutationJournal(str(path)).pending()] == list(range(10))
+
+
+def test_done_entries_and_torn_lines_are_not_pending(tmp_path):
+    path = tmp_path / "journal.log"
+
+    async def main():
+        journal = MutationJournal(str(path))
+        first = await journal.record("createNotionProject", {"projectName": "A"})
+        second = await journal.record("createNotionProject", {"projectName": "B"})
+        await journal.note(second, pageId="page-b")
+        journal.complete(first)
+        await journal.aclose()
+
+    asyncio.run(main())
+    with open(path, "ab") as journal:
+        journal.write(b'{"seq":3,"type":"intent","tool')
+
+    pending = MutationJournal(str(path)).pending()
+    assert [(entry.seq, entry.effects) for entry in pending] == [(2, {"pageId": "page-b"})]
+
+
+def test_compaction_keeps_only_pending_entries(tmp_path):
+    path = tmp_path / "journal.log"
+
+    async def main():
+        journal = MutationJournal(str(path), compact_bytes=1)
+        kept = await journal.record("enrichNotionContent", {"projectId": "p"})
+        await journal.note(kept, sectionId="s")
+        for n in range(5):
+            journal.complete(await journal.record("updateNotionTasks", {"n": n}))
+        await journal.record("updateNotionTasks", {"n": "last"})
+        stats = journal.stats()
+        await journal.aclose()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["compactions"] >= 1
+    assert {record["seq"] for record in records(path)} == {1, 7}
+    pending = MutationJournal(str(path)).pending()
+    assert [(entry.seq, entry.effects) for entry in pending] == [(1, {"sectionId": "s"}), (7, {})]
+
+
+@pytest.fixture
+def journaled(server_module, tmp_path, monkeypatch):
+    """Builds servers sharing one journal file (and, once started, one emulated workspace)"""
+    monkeypatch.setenv("NOTION_JOURNAL_PATH", str(tmp_path / "journal.log"))
+
+    def build(emulated=None):
+        server = server_module.NotionMCPServer()
+        server._ensure_notion_api()
+        if emulated is not None:
+            workspace = server.workspace
+            workspace.emulator = emulated.emulator
+            workspace.parent_page_id = emulated.emulator.root_page_id
+            workspace.notion = server_module.NotionClient(
+                "simulation", scheduler=workspace.rate_limiter, transport=emulated.emulator.transport()
+            )
+        return server
+
+    return build
+
+
+def arguments(server, tool, values):
+    return server.catalogue.get(tool).validate(values)
+
+
+def test_cancelled_call_stays_pending_and_failed_call_does_not(journaled):
+    async def main():
+        server = journaled()
+
+        async def hang(name, values):
+            await asyncio.sleep(10)
+
+        async def fail(name, values):
+            raise ValueError("rejected")
+
+        server.run_tool = hang
+        call = asyncio.ensure_future(server.run_journaled("updateNotionTasks", {"projectId": "p"}))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        server.run_tool = fail
+        with pytest.raises(ValueError):
+            await server.run_journaled("updateNotionTasks", {"projectId": "q"})
+        pending = [entry.arguments["projectId"] for entry in server.journal.pending()]
+        await server.journal.aclose()
+        return pending
+
+    assert asyncio.run(main()) == ["p"]
+
+
+def test_replay_finishes_each_tool_without_repeating_it(journaled):
+    async def main():
+        first = journaled()
+        project = arguments(first, "createNotionProject", {"projectName": "P", "projectDescription": "d"})
+        created = await first.run_journaled("createNotionProject", project)
+        page_id = re.search(r"Page ID: (\S+)", created[0].text).group(1)
+        tasks = arguments(first, "updateNotionTasks", {"projectId": page_id, "newTasks": [{"task": "Alpha"}]})
+        await first.run_journaled("updateNotionTasks", tasks)
+        notes = arguments(first, "enrichNotionContent", {
+            "projectId": page_id, "enrichmentType": "meeting_notes", "content": {"k": "v"}
+        })
+        await first.run_journaled("enrichNotionContent", notes)
+        await first.journal.aclose()
+
+        # A crash left three calls unfinished: a project whose page exists, tasks and notes already written
+        with open(first.journal.path, "a", encoding="utf-8") as journal:
+            unfinished = [
+                ("updateNotionTasks", {**tasks, "newTasks": [{"task": "alpha"}, {"task": "Beta"}]}),
+                ("enrichNotionContent", notes),
+                ("createNotionProject", project),
+            ]
+            for seq, (tool, values) in enumerate(unfinished, 100):
+                journal.write(json.dumps({"seq": seq, "type": "intent", "tool": tool, "arguments": values}) + "\n")
+            journal.write(json.dumps({"seq": 102, "type": "effect", "data": {"pageId": page_id}}) + "\n")
+
+        second = journaled(emulated=first)
+        replayed = [entry.tool for entry in second.journal.pending()]
+        second.start_replay()
+        await second._replay
+        emulator = first.emulator
+        texts = [block_plain_text(block) for block in emulator._visible_children(page_id)]
+        projects = [block["id"] for block in emulator._visible_children(emulator.root_page_id)]
+        pending = second.journal.pending()
+        await second.aclose()
+        return replayed, texts, page_id, projects, pending
+
+    replayed, texts, page_id, projects, pending = asyncio.run(main())
+    assert replayed == ["updateNotionTasks", "enrichNotionContent", "createNotionProject"]
+    # Tasks: "alpha" was already there (as Alpha), only Beta is added
+    assert sum(text.split(" — ")[0].casefold() == "alpha" for text in texts) == 1
+    assert texts[-1].startswith("Beta")
+    # Notes: already written, not appended again
+    assert texts.count("✨ Meeting Notes") == 1
+    # Project: the half-built page is archived and the project rebuilt once
+    assert page_id not in projects
+    assert len(projects) == 1
+    assert pending == []
@@ -0,0 +1,19 @@
+import pytest
+
+from notion_mcp.metrics import route_template
+
+
+@pytest.mark.parametrize("path, route", [
+    ("/pages", "/pages"),
+    ("/pages/59833787-2cf9-4fdf-8782-e53db20768a5", "/pages/{id}"),
+    ("/blocks/598337872cf94fdf8782e53db20768a5/children", "/blocks/{id}/children"),
+    ("/blocks/zzz/children", "/blocks/{id}/children"),
+    ("/blocks/children/children", "/blocks/{id}/children"),
+    ("/blocks/a/children?start_cursor=xyz&page_size=100", "/blocks/{id}/children"),
+    ("/databases/my-db/query", "/databases/{id}/query"),
+    ("/pages/p/properties/title", "/pages/{id}/properties/{id}"),
+    ("/search", "/search"),
+    ("/whatever/anything", "/{id}/{id}"),
+])
+def test_routes_never_carry_caller_ids(path, route):
+    assert route_template(path) == route
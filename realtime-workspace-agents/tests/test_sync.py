@@ -0,0 +1,97 @@
+import asyncio
+import re
+
+from notion_mcp.blocks import block_plain_text, text_block, to_do_block
+from notion_mcp.sync import diff_blocks, section_bounds
+
+
+def block(block_id, block_type, text):
+    return {**text_block(block_type, text), "id": block_id}
+
+
+def bullets(*texts):
+    return [text_block("bulleted_list_item", text) for text in texts]
+
+
+def current(*texts):
+    return [block(f"b{index}", "bulleted_list_item", text) for index, text in enumerate(texts)]
+
+
+def test_unchanged_section_is_kept():
+    plan = diff_blocks(current("a", "b"), bullets("a", "b"), anchor_id="h")
+    assert plan.summary() == {"blocksKept": 2, "blocksUpdated": 0, "blocksInserted": 0, "blocksDeleted": 0}
+    assert (plan.updates, plan.inserts, plan.deletes) == ([], [], [])
+
+
+def test_new_blocks_are_inserted_after_the_last_survivor():
+    plan = diff_blocks(current("a"), bullets("a", "b", "c"), anchor_id="h")
+    assert plan.inserts == [("b0", bullets("b", "c"))]
+    assert plan.deletes == []
+
+
+def test_first_blocks_go_after_the_anchor():
+    plan = diff_blocks([], bullets("a"), anchor_id="h")
+    assert plan.inserts == [("h", bullets("a"))]
+
+
+def test_removed_blocks_are_deleted():
+    plan = diff_blocks(current("a", "b", "c"), bullets("a", "c"), anchor_id="h")
+    assert plan.deletes == ["b1"]
+    assert plan.kept == 2
+    assert plan.inserts == []
+
+
+def test_changed_text_is_updated_in_place():
+    plan = diff_blocks(current("a", "b"), bullets("a", "B"), anchor_id="h")
+    assert plan.updates == [("b1", {"bulleted_list_item": {"rich_text": bullets("B")[0]["bulleted_list_item"]["rich_text"]}})]
+    assert (plan.inserts, plan.deletes) == ([], [])
+
+
+def test_changed_type_is_replaced():
+    desired = [text_block("paragraph", "a")]
+    plan = diff_blocks(current("a"), desired, anchor_id="h")
+    assert plan.updates == []
+    assert plan.deletes == ["b0"]
+    assert plan.inserts == [("h", desired)]
+
+
+def test_to_dos_are_never_touched():
+    blocks = [*current("a"), {**to_do_block("Task"), "id": "t0"}, block("b2", "bulleted_list_item", "b")]
+    plan = diff_blocks(blocks, bullets("a"), anchor_id="h")
+    assert plan.deletes == ["b2"]
+    assert all(block_id != "t0" for block_id, _ in plan.updates)
+
+
+def test_section_stops_at_blocks_of_other_types():
+    blocks = [block("h", "heading_2", "Notes"), *current("a", "b"), {**to_do_block("Task"), "id": "t"},
+              block("p", "paragraph", "later")]
+    assert section_bounds(blocks, "heading_2", "Notes") == (0, 5)
+    assert section_bounds(blocks, "heading_2", "Notes", frozenset({"bulleted_list_item"})) == (0, 3)
+    assert section_bounds(blocks, "heading_2", "Missing") is None
+
+
+def test_sync_leaves_the_blocks_after_the_section_alone(server_module):
+    async def main():
+        server = server_module.NotionMCPServer()
+
+        async def call(tool, arguments):
+            return (await server.run_tool(tool, server.catalogue.get(tool).validate(arguments)))[0].text
+
+        created = await call("createNotionProject", {"projectName": "Sync", "projectDescription": "d"})
+        page_id = re.search(r"Page ID: (\S+)", created).group(1)
+        enrich = {"projectId": page_id, "enrichmentType": "decision_tracking", "strategy": "sync"}
+        await call("enrichNotionContent", {**enrich, "content": {"a": 1, "b": 2}})
+        await call("updateNotionTasks", {"projectId": page_id, "newTasks": [{"task": "Follow-up"}]})
+        await server.notion.patch(f"/blocks/{page_id}/children",
+                                  {"children": [text_block("paragraph", "Written by someone else")]})
+        after = [block_plain_text(b) for b in server.emulator._visible_children(page_id)][-2:]
+
+        result = await call("enrichNotionContent", {**enrich, "content": {"a": 3}})
+        texts = [block_plain_text(b) for b in server.emulator._visible_children(page_id)]
+        await server.aclose()
+        return result, texts, after
+
+    result, texts, after = asyncio.run(main())
+    assert "1 updated" in result and "1 deleted" in result
+    assert texts[-4:] == ["✨ Decision Tracking", "a: 3", *after]
+    assert after == ["Follow-up", "Written by someone else"]
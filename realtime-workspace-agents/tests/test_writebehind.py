@@ -0,0 +1,105 @@
+import asyncio
+
+from notion_mcp.client import NotionAPIError
+from notion_mcp.writebehind import PendingTasks, WriteBehindQueue
+
+
+def run_queue(calls, fail=None, **options):
+    """Enqueues each (new_tasks, updated_tasks) call, flushes, returns the batches written and the acks"""
+    written, done, acks = [], [], []
+
+    async def flush(project_id, new_tasks, updated_tasks, context):
+        written.append((new_tasks, updated_tasks))
+        return fail(new_tasks, updated_tasks) if fail else []
+
+    async def main():
+        queue = WriteBehindQueue(flush, debounce=60, on_flushed=done.extend, **options)
+        for index, (new_tasks, updated_tasks) in enumerate(calls):
+            acks.append(queue.enqueue("project", new_tasks, updated_tasks, entry=index))
+        await queue.flush_all()
+        return queue
+
+    queue = asyncio.run(main())
+    return written, done, acks, queue
+
+
+def test_added_then_deleted_task_is_never_written():
+    written, done, _, _ = run_queue([
+        ([{"task": "Draft"}], []),
+        ([], [{"taskId": "draft ", "newStatus": "deleted"}]),
+    ])
+    assert written == []
+    assert done == [0, 1]
+
+
+def test_add_and_updates_become_one_append():
+    written, done, _, _ = run_queue([
+        ([{"task": "Review", "priority": "low"}], []),
+        ([], [{"taskId": "Review", "updates": {"priority": "high"}}]),
+        ([], [{"taskId": "Review", "newStatus": "in_progress", "updates": {"assignedTo": "Alice"}}]),
+    ])
+    assert written == [(
+        [{"task": "Review", "priority": "high", "assignedTo": "Alice", "status": "in_progress"}], []
+    )]
+    assert done == [0, 1, 2]
+
+
+def test_tasks_sharing_a_title_stay_separate():
+    written, _, _, _ = run_queue([
+        ([{"task": "Review", "assignedTo": "Alice"}], []),
+        ([{"task": "Review", "assignedTo": "Bob"}], []),
+        ([], [{"taskId": "Review", "newStatus": "done"}]),
+    ])
+    new_tasks, updated_tasks = written[0]
+    assert [task["assignedTo"] for task in new_tasks] == ["Alice", "Bob"]
+    # Ambiguous: left to the flush, which resolves it against Notion
+    assert updated_tasks == [{"taskId": "Review", "newStatus": "done"}]
+
+
+def test_updates_of_existing_tasks_merge_per_task():
+    batch = PendingTasks()
+    batch.update_task({"taskId": "t1", "updates": {"priority": "high"}})
+    batch.update_task({"taskId": "t1", "newStatus": "done"})
+    batch.update_task({"taskId": "t2", "newStatus": "deleted"})
+    batch.update_task({"taskId": "t2", "newStatus": "done"})
+    assert batch.drain()[1] == [
+        {"taskId": "t1", "newStatus": "done", "updates": {"priority": "high"}},
+        {"taskId": "t2", "newStatus": "deleted"},
+    ]
+
+
+def test_rejected_update_is_reported_and_the_rest_applied():
+    def reject_missing(new_tasks, updated_tasks):
+        return [(update, NotionAPIError(404, "Could not find block")) for update in updated_tasks
+                if update["taskId"] == "gone"]
+
+    written, done, _, queue = run_queue([
+        ([], [{"taskId": "t1", "newStatus": "done"}]),
+        ([], [{"taskId": "gone", "newStatus": "done"}]),
+    ], fail=reject_missing)
+    assert len(written) == 1
+    assert done == [0, 1]
+    assert queue.stats()["failedMutations"] == 1
+
+
+def test_transient_failure_is_retried_ahead_of_newer_changes():
+    written, done = [], []
+
+    async def flush(project_id, new_tasks, updated_tasks, context):
+        written.append([update["taskId"] for update in updated_tasks])
+        if len(written) == 1:
+            return [(update, NotionAPIError(503, "busy")) for update in updated_tasks]
+        return []
+
+    async def main():
+        queue = WriteBehindQueue(flush, debounce=60, on_flushed=done.extend, retry_delay=0.01)
+        queue.enqueue("project", [], [{"taskId": "t1", "newStatus": "done"}], entry="first")
+        await queue.flush("project")
+        queue.enqueue("project", [], [{"taskId": "t2", "newStatus": "done"}], entry="second")
+        await asyncio.sleep(0.1)
+        return queue
+
+    queue = asyncio.run(main())
+    assert written == [["t1"], ["t1", "t2"]]
+    assert done == ["first", "second"]
+    assert queue.stats()["retriedBatches"] == 1